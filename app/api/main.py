@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.routes import auth, driver, orders
+from app.api.routes import auth, driver, orders, restaurant
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
 api_router.include_router(driver.router)
 api_router.include_router(orders.router)
+api_router.include_router(restaurant.router)
@@ -0,0 +1,63 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Type
+
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import Session
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(response_type: Any) -> TypeAdapter:
+    # Building the validator/serializer of a type is expensive: do it once per type
+    return TypeAdapter(response_type)
+
+
+class PydanticJSONResponse(Response):
+    """
+    JSON response serialized by pydantic-core straight to bytes.
+
+    FastAPI's default path validates the content against the response model, converts it
+    to JSON-compatible Python objects and finally calls json.dumps. Here the content
+    (Pydantic models or ORM objects) is validated once and dumped to JSON in Rust.
+    The endpoint can keep its `response_model` for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        response_type: Any,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.response_type = response_type
+        super().__init__(content=content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        adapter = get_type_adapter(self.response_type)
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+class NDJSONResponse(StreamingResponse):
+    media_type = "application/x-ndjson"
+
+
+def ndjson_lines(
+    rows: Iterable[Any],
+    schema: Type[BaseModel],
+    db: Session,
+    keep: Optional[Callable[[Any], bool]] = None,
+) -> Iterator[bytes]:
+    """
+    Serialize ORM rows one JSON document per line, as they are fetched.
+    """
+    try:
+        for row in rows:
+            if keep is not None and not keep(row):
+                continue
+            yield schema.model_validate(row).model_dump_json().encode() + b"\n"
+    finally:
+        # Dependencies with yield are closed before a streaming response starts:
+        # the session is reused by the generator, so it has to release it
+        db.close()
@@ -1,48 +1,64 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from app.models.user import User
 from app.schemas import Token
 from app.database import create_new_db_session
-from app.auth.utils import verify_password, create_access_token
+from app.auth.utils import (
+    create_access_token,
+    hash_password_async,
+    verify_and_update_password_async,
+)
 
 from app.schemas.user import UserCreate
 from app.crud.user import get_user_by_email, create_user  # We'll define these
-from app.auth.utils import hash_password
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(create_new_db_session),
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Database work stays off the event loop; only the hashing is awaited on it
+    user = await run_in_threadpool(get_user_by_email, db, email=form_data.username)
+    verified, new_hash = (
+        await verify_and_update_password_async(form_data.password, user.hashed_password)
+        if user
+        else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored hash uses an outdated work factor: upgrade it now that we know the password
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
 
-    access_token = create_access_token(data={"user_id": user.id})
+    access_token = create_access_token(
+        data={"user_id": user.id, "role": user.role.value if user.role else None}
+    )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/signup", status_code=201)
-def signup(user_in: UserCreate, db: Session = Depends(create_new_db_session)):
+async def signup(user_in: UserCreate, db: Session = Depends(create_new_db_session)):
     # Check if user exists
-    existing_user = get_user_by_email(db, email=user_in.email)
+    existing_user = await run_in_threadpool(get_user_by_email, db, email=user_in.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Create user
     new_user = User(
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hash_password_async(user_in.password),
         full_name=user_in.full_name,
         role=user_in.role,
     )
-    create_user(db=db, new_user=new_user)
+    await run_in_threadpool(create_user, db=db, new_user=new_user)
     return {"message": "User created successfully"}
@@ -1,12 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
+from app.api.responses import NDJSONResponse, ndjson_lines
 from app.api.routes.orders import get_optimizer
 from app.database import create_new_db_session
-from app.crud import create_driver, update_driver
+from app.crud import create_driver, unknown_restaurant_ids, update_driver
+from app.crud.pagination import fetch_page, iter_rows
 from app.models.driver import Driver
-from app.schemas.driver import DriverCreate, DriverUpdate, DriverOut
+from app.schemas.driver import (
+    DriverCreate,
+    DriverLocationBatch,
+    DriverLocationBatchResult,
+    DriverOut,
+    DriverUpdate,
+)
+from app.schemas.pagination import Page
+from app.services.drivers import (
+    DriverLocationStore,
+    DriverRegistry,
+    get_driver_location_store,
+    get_driver_registry,
+    rank_by_distance,
+)
 from app.services.orders import OrdersOptimizer
 
 router = APIRouter(prefix="/drivers", tags=["Drivers"])
@@ -17,6 +34,8 @@ def create_driver_in_db(
     driver_data: DriverCreate,
     db: Session = Depends(create_new_db_session),
 ):
+    if unknown_restaurant_ids(db=db, restaurant_ids=[driver_data.restaurant_id]):
+        raise HTTPException(status_code=422, detail=f"Unknown restaurant: {driver_data.restaurant_id}")
     new_driver = create_driver(
         db=db,
         driver_data=driver_data,
@@ -29,27 +48,130 @@ def list_drivers(db: Session = Depends(create_new_db_session)):
     return db.query(Driver).all()
 
 
+@router.get("/page", response_model=Page[DriverOut])
+def list_drivers_page(
+    db: Session = Depends(create_new_db_session),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+):
+    """
+    Keyset-paginated variant of the drivers list, sorted by (created_at, id).
+    """
+    try:
+        items, next_cursor = fetch_page(db.query(Driver), Driver, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/stream", response_class=NDJSONResponse)
+def stream_drivers(
+    db: Session = Depends(create_new_db_session),
+    batch_size: int = Query(500, ge=1, le=5000),
+):
+    """
+    Stream all drivers as NDJSON (one DriverOut per line), sorted by (created_at, id).
+    """
+    return NDJSONResponse(
+        ndjson_lines(
+            iter_rows(db.query(Driver), Driver, batch_size=batch_size),
+            schema=DriverOut,
+            db=db,
+        )
+    )
+
+
+@router.post("/locations", response_model=DriverLocationBatchResult, status_code=202)
+def ingest_driver_locations(
+    batch: DriverLocationBatch,
+    store: DriverLocationStore = Depends(get_driver_location_store),
+    registry: DriverRegistry = Depends(get_driver_registry),
+):
+    """
+    Record a batch of GPS pings in memory; positions are written to `drivers` in bulk
+    every DRIVER_LOCATION_FLUSH_INTERVAL_SECONDS. Pings of unknown drivers are dropped
+    at flush time.
+    """
+    accepted = 0
+    for ping in batch.pings:
+        if store.record(
+            driver_id=ping.driver_id,
+            lat=ping.lat,
+            lon=ping.lon,
+            recorded_at=ping.recorded_at,
+        ):
+            accepted += 1
+            registry.update_location(ping.driver_id, lat=ping.lat, lon=ping.lon)
+    return {"accepted": accepted, "stale": len(batch.pings) - accepted}
+
+
 @router.patch("/{driver_id}", response_model=DriverOut)
 def update_driver_in_db(
     driver_id: int,
     driver_update: DriverUpdate,
     db: Session = Depends(create_new_db_session),
+    store: DriverLocationStore = Depends(get_driver_location_store),
 ):
     driver = db.query(Driver).filter(Driver.id == driver_id).first()
     if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
     driver = update_driver(db=db, driver=driver, driver_update=driver_update)
+    if {"lat", "lon"} & driver_update.model_fields_set:
+        # The position written here is newer than any buffered ping
+        store.discard(driver_id)
     return driver
 
 
 @router.get("/available", response_model=List[DriverOut])
 def get_available_drivers_with_location(
     optimizer: OrdersOptimizer = Depends(get_optimizer),
+    registry: DriverRegistry = Depends(get_driver_registry),
     eta_threshold_minutes: int = Query(10, ge=0),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    k: Optional[int] = Query(None, ge=1, le=1000, description="Nearest drivers to (lat, lon)"),
+    radius_km: Optional[float] = Query(None, gt=0, description="Max distance from (lat, lon)"),
 ):
     """
     Get drivers who are available or delivering and finishing soon, with known location.
+    With (lat, lon), drivers are sorted by distance and filtered by `k` and `radius_km`
+    (served from the driver registry when enabled).
     """
-    return optimizer.fetch_available_drivers_with_location(
-        eta_threshold_minutes=eta_threshold_minutes
-    )
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon go together")
+    if lat is None:
+        return optimizer.fetch_available_drivers_with_location(
+            eta_threshold_minutes=eta_threshold_minutes
+        )
+
+    now = datetime.utcnow()
+    if registry.loaded:
+        if k is not None:
+            ranked = registry.nearest(
+                lat=lat,
+                lon=lon,
+                k=k,
+                now=now,
+                eta_threshold_minutes=eta_threshold_minutes,
+                max_radius_km=radius_km,
+            )
+        elif radius_km is not None:
+            ranked = registry.within_radius(
+                lat=lat,
+                lon=lon,
+                radius_km=radius_km,
+                now=now,
+                eta_threshold_minutes=eta_threshold_minutes,
+            )
+        else:
+            ranked = rank_by_distance(
+                registry.available(now=now, eta_threshold_minutes=eta_threshold_minutes),
+                lat,
+                lon,
+            )
+    else:
+        drivers = optimizer.available_drivers_query(
+            eta_threshold_minutes=eta_threshold_minutes, now=now
+        ).all()
+        ranked = rank_by_distance(drivers, lat, lon, k=k, radius_km=radius_km)
+    return [driver for driver, _ in ranked]
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import create_new_db_session, engine
+from app.metrics import (
+    AVAILABLE_DRIVERS,
+    DB_POOL_CONNECTIONS,
+    PENDING_ORDERS,
+    REGISTRY,
+    UNASSIGNED_CLUSTERS,
+)
+from app.models.cluster import OrderCluster
+from app.models.driver import Driver, DriverStatus
+from app.models.order import Order, OrderStatus
+from app.schemas.cluster import ClusterStatus
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def update_dispatch_gauges(db: Session) -> None:
+    # Count queries served by the status indexes on orders, order_clusters and drivers
+    PENDING_ORDERS.set(
+        db.query(func.count(Order.id)).filter(Order.status == OrderStatus.pending).scalar()
+    )
+    UNASSIGNED_CLUSTERS.set(
+        db.query(func.count(OrderCluster.id))
+        .filter(OrderCluster.cluster_status == ClusterStatus.to_be_assigned)
+        .scalar()
+    )
+    AVAILABLE_DRIVERS.set(
+        db.query(func.count(Driver.id))
+        .filter(Driver.status == DriverStatus.AVAILABLE)
+        .scalar()
+    )
+
+
+def update_pool_gauges() -> None:
+    pool = engine.pool
+    # Pools without a fixed size (e.g. StaticPool) do not report utilization
+    for state, method in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            DB_POOL_CONNECTIONS.labels(state).set(getattr(pool, method)())
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(db: Session = Depends(create_new_db_session)):
+    """
+    Prometheus scrape endpoint. Dispatch gauges are computed at scrape time.
+    """
+    update_dispatch_gauges(db)
+    update_pool_gauges()
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
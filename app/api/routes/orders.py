@@ -1,22 +1,58 @@
+import time
+from concurrent.futures import Executor
 from typing import Dict, List, Optional
 from typing_extensions import Annotated
 from datetime import datetime
 from functools import lru_cache
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app import config
-from app.crud import create_order
-from app.models.user import User
+from app.api.responses import NDJSONResponse, PydanticJSONResponse, ndjson_lines
+from app.crud import (
+    create_order,
+    create_orders,
+    get_active_restaurants,
+    get_cluster_route,
+    unknown_restaurant_ids,
+)
+from app.crud.pagination import fetch_page, iter_rows
 from app.models.order import Order
-from app.schemas import OrderCreate, OrderResponse, OrderOut
+from app.schemas import (
+    OrderBatchCreate,
+    OrderBatchItemResult,
+    OrderBatchResponse,
+    OrderCreate,
+    OrderResponse,
+    OrderOut,
+    UserPrincipal,
+)
+from app.schemas.cluster import ClusterRoute, CompactClusterRoute
+from app.schemas.pagination import Page
 from app.database import create_new_db_session
 from app.auth.dependencies import get_current_user
 from app.config_logging import logger
-from app.services.orders import OrdersOptimizer
+from app.services.drivers import get_driver_location_store, get_driver_registry
+from app.services.orders import (
+    ClusterPreviewCache,
+    OrdersOptimizer,
+    WarmStartState,
+    dispatch_partitions,
+    get_dispatch_executor,
+    orders_partition,
+    partition_optimizer,
+    run_partitions,
+    summarize_chained_trips,
+)
 from app.services.route_planner.base import RoutePlannerService
 from app.services.route_planner.factory import get_route_planner
+from app.services.route_planner.geocoding import (
+    address_key,
+    geocode_address,
+    geocode_addresses,
+)
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -26,19 +62,48 @@ def get_clustering_settings():
     return config.ClusteringSettings()
 
 
+@lru_cache
+def get_warm_start_state():
+    # Shared by the runs of this process
+    return WarmStartState()
+
+
+@lru_cache
+def get_partition_warm_start_states():
+    # One state per restaurant (None: the default one), shared by the partitioned runs
+    return {}
+
+
 @lru_cache
 def get_pizza_prep_settings():
     return config.PizzaPreparationSettings()
 
 
+@lru_cache
+def get_profiling_settings():
+    return config.ProfilingSettings()
+
+
 @lru_cache
 def get_optimizer(db: Session = Depends(create_new_db_session)):
+    clustering_settings = get_clustering_settings()
     return OrdersOptimizer(
         db=db,
         route_planner=get_route_planner(),
-        clustering_settings=get_clustering_settings(),
+        clustering_settings=clustering_settings,
         pizza_prep_settings=get_pizza_prep_settings(),
         logger=logger,
+        profiling_settings=get_profiling_settings(),
+        location_store=get_driver_location_store(),
+        driver_registry=get_driver_registry(),
+        warm_start=get_warm_start_state() if clustering_settings.WARM_START else None,
+    )
+
+
+@lru_cache
+def get_cluster_preview_cache():
+    return ClusterPreviewCache(
+        ttl_seconds=get_clustering_settings().CLUSTER_PREVIEW_CACHE_TTL_SECONDS
     )
 
 
@@ -47,72 +112,275 @@ def get_optimizer(db: Session = Depends(create_new_db_session)):
 def create_order_in_db(
     order_data: OrderCreate,
     db: Session = Depends(create_new_db_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     route_planner: RoutePlannerService = Depends(get_route_planner),
+    preview_cache: ClusterPreviewCache = Depends(get_cluster_preview_cache),
 ):
+    if unknown_restaurant_ids(db=db, restaurant_ids=[order_data.restaurant_id]):
+        raise HTTPException(status_code=422, detail=f"Unknown restaurant: {order_data.restaurant_id}")
     # Geocode order address (fetching lat, lon) to fill model's fields
     # Return lon and lat
-    lon, lat = route_planner.get_coordinates(
-        address=order_data.delivery_address.address,
-        postal_code=order_data.delivery_address.postal_code,
-        city=order_data.delivery_address.city,
-        country=order_data.delivery_address.country,
-    )
+    lon, lat = geocode_address(route_planner, order_data.delivery_address)
     new_order = create_order(
         db=db, current_user=current_user, order_data=order_data, lon=lon, lat=lat
     )
+    preview_cache.invalidate()
     return new_order
 
 
+@router.post("/batch", response_model=OrderBatchResponse, status_code=200)
+async def create_orders_batch(
+    batch: OrderBatchCreate,
+    db: Session = Depends(create_new_db_session),
+    current_user: UserPrincipal = Depends(get_current_user),
+    route_planner: RoutePlannerService = Depends(get_route_planner),
+    preview_cache: ClusterPreviewCache = Depends(get_cluster_preview_cache),
+):
+    """
+    Create many orders at once. Distinct addresses are geocoded concurrently and all
+    geocoded orders are inserted in a single transaction.
+    Each submitted order gets a result, holding either the created order or the error.
+    """
+    unknown_restaurants = await run_in_threadpool(
+        unknown_restaurant_ids,
+        db=db,
+        restaurant_ids=[order_data.restaurant_id for order_data in batch.orders],
+    )
+    coords_by_address = await geocode_addresses(
+        route_planner,
+        (
+            order_data.delivery_address
+            for order_data in batch.orders
+            if order_data.restaurant_id not in unknown_restaurants
+        ),
+        max_concurrency=config.settings.GEOCODE_MAX_CONCURRENCY,
+    )
+    results = [OrderBatchItemResult(index=i) for i in range(len(batch.orders))]
+    geocoded = []
+    for result, order_data in zip(results, batch.orders):
+        if order_data.restaurant_id in unknown_restaurants:
+            result.error = f"Unknown restaurant: {order_data.restaurant_id}"
+            continue
+        coords = coords_by_address[address_key(order_data.delivery_address)]
+        if isinstance(coords, BaseException):
+            result.error = f"Geocoding failed: {coords!r}"
+            continue
+        lon, lat = coords
+        geocoded.append((result, (order_data, lon, lat)))
+
+    if geocoded:
+        # The INSERT and the commit block: keep them off the event loop
+        new_orders = await run_in_threadpool(
+            create_orders,
+            db=db,
+            current_user=current_user,
+            orders_data=[item for _, item in geocoded],
+        )
+        for (result, _), new_order in zip(geocoded, new_orders):
+            result.order = OrderResponse.model_validate(new_order)
+        preview_cache.invalidate()
+
+    return OrderBatchResponse(
+        created=len(geocoded),
+        failed=len(results) - len(geocoded),
+        results=results,
+    )
+
+
 @router.post("/optimize", status_code=200)
-async def optimize_orders(optimizer: OrdersOptimizer = Depends(get_optimizer)):
+async def optimize_orders(
+    optimizer: OrdersOptimizer = Depends(get_optimizer),
+    preview_cache: ClusterPreviewCache = Depends(get_cluster_preview_cache),
+    dispatch_executor: Optional[Executor] = Depends(get_dispatch_executor),
+    profile: bool = Query(False, description="Record a cProfile profile of this run"),
+):
+    """
+    Cluster pending orders and assign them to drivers.
+    With restaurants, each restaurant (and the default one) is optimized separately,
+    in parallel, and the response lists the result and timing of each partition.
+    """
     try:
-        out = await optimizer.run()
+        if get_active_restaurants(db=optimizer.db):
+            return await optimize_partitions(
+                optimizer, dispatch_executor, capture_cprofile=profile
+            )
+        out = await optimizer.run(capture_cprofile=profile)
         clustered_orders = out["driver_to_cluster"].items()
         for driver, cluster in clustered_orders:
             cluster_order = cluster["cluster"]
             assignment_cost = cluster["cost"]
             logger.info(
-                f"Driver : {driver} assigned to cluster: {cluster_order.id} with cost: {assignment_cost}"
+                "Driver : %s assigned to cluster: %s with cost: %s",
+                driver,
+                cluster_order.id,
+                assignment_cost,
             )
         unassigned = out["unassigned_clusters"]
-        logger.info(f"Unassigned Clusters: {len(unassigned)}")
+        logger.info("Unassigned Clusters: %d", len(unassigned))
         return {
             "detail": f"Order optimization completed successfully. Number of Clusters: {len(clustered_orders)}. Unassigned Clusters: {len(unassigned)}",
             "unassigned": {k: v["motivations"] for k,v in unassigned.items()},
+            "chained": summarize_chained_trips(out["chained_trips"]),
+            "kitchen_sequence": out["kitchen_sequence"],
+            "approximate": out["approximate_clusters"],
+            "profile": out["profile"],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Orders status may have changed, even if the run failed halfway
+        preview_cache.invalidate()
+
+
+async def optimize_partitions(
+    optimizer: OrdersOptimizer,
+    executor: Optional[Executor],
+    capture_cprofile: bool = False,
+):
+    start = time.perf_counter()
+    partitions = dispatch_partitions(
+        optimizer.db, optimizer.clustering_settings, optimizer.pizza_prep_settings
+    )
+    results = await run_partitions(
+        partitions,
+        db=optimizer.db,
+        route_planner=optimizer.route_planner,
+        logger=logger,
+        profiling_settings=optimizer.profiling_settings,
+        location_store=optimizer.location_store,
+        driver_registry=optimizer.driver_registry,
+        capture_cprofile=capture_cprofile,
+        executor=executor,
+        warm_starts=(
+            get_partition_warm_start_states() if optimizer.warm_start is not None else None
+        ),
+    )
+    for result in results:
+        logger.info(
+            "Restaurant %s: %d clusters assigned, %d unassigned in %.3f s",
+            result["name"],
+            len(result["assigned"]),
+            len(result["unassigned"]),
+            result["wall_s"],
+        )
+    assigned = sum(len(result["assigned"]) for result in results)
+    unassigned = {k: v for result in results for k, v in result["unassigned"].items()}
+    return {
+        "detail": f"Order optimization completed successfully. Number of Clusters: {assigned}. Unassigned Clusters: {len(unassigned)}",
+        "unassigned": unassigned,
+        "profile": {
+            "wall_s": round(time.perf_counter() - start, 6),
+            "parallel": executor is not None,
+        },
+        "partitions": results,
+    }
 
 
 @router.get("/clusters_by_time", response_model=Dict[datetime, List[OrderResponse]])
 def get_clustered_orders_by_time(
     clustering_settings: Annotated[config.Settings, Depends(get_clustering_settings)],
     optimizer: OrdersOptimizer = Depends(get_optimizer),
+    preview_cache: ClusterPreviewCache = Depends(get_cluster_preview_cache),
 ):
+    cache_key = (
+        "clusters_by_time",
+        optimizer.pending_orders_fingerprint(),
+        clustering_settings.CLUSTER_TIME_WINDOW_MINUTES,
+    )
+    cached = preview_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
     ready_orders = optimizer.fetch_unassigned_orders()
     filtered = optimizer.filter_out_unavailable_orders(ready_orders)
     time_buckets = optimizer.cluster_orders_by_time_window(
         orders=filtered,
         time_window_minutes=clustering_settings.CLUSTER_TIME_WINDOW_MINUTES,
     )
-    return time_buckets
+    response = PydanticJSONResponse(time_buckets, Dict[datetime, List[OrderResponse]])
+    preview_cache.set(cache_key, response.body)
+    return response
 
 
 @router.get("/clusters", response_model=List[List[OrderResponse]])
 async def get_clustered_orders_by_geo(
     clustering_settings: Annotated[config.Settings, Depends(get_clustering_settings)],
     optimizer: OrdersOptimizer = Depends(get_optimizer),
+    preview_cache: ClusterPreviewCache = Depends(get_cluster_preview_cache),
 ):
+    # A cache hit costs one indexed query instead of a distance matrix request and clustering
+    cache_key = (
+        "clusters",
+        optimizer.pending_orders_fingerprint(),
+        clustering_settings.MAX_PIZZAS_PER_CLUSTER,
+        clustering_settings.CLUSTER_DISTANCE_THRESHOLD,
+        clustering_settings.LARGE_BUCKET_SIZE,
+        clustering_settings.LARGE_BUCKET_CELL_KM,
+    )
+    cached = preview_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
     ready_orders = optimizer.fetch_unassigned_orders()
     filtered = optimizer.filter_out_unavailable_orders(ready_orders)
-    logger.info(f"{filtered=}")
+    logger.debug("Clustering %d filtered orders", len(filtered))
     clusters = await optimizer.cluster_orders_by_geographic_proximity(
         orders=filtered,
         max_pizzas_per_cluster=clustering_settings.MAX_PIZZAS_PER_CLUSTER,
         cluster_distance_threshold=clustering_settings.CLUSTER_DISTANCE_THRESHOLD,
     )
-    return [[order for order in cluster] for cluster in clusters]
+    response = PydanticJSONResponse(clusters, List[List[OrderResponse]])
+    preview_cache.set(cache_key, response.body)
+    return response
+
+
+@router.get("/clusters/{cluster_id}/route", response_model=CompactClusterRoute)
+def get_compact_cluster_route(
+    cluster_id: str,
+    db: Session = Depends(create_new_db_session),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Return the stored route of a cluster: per-segment durations and distances,
+    visited orders and encoded polyline.
+    """
+    cluster_route = get_cluster_route(db=db, cluster_id=cluster_id)
+    if not cluster_route:
+        raise HTTPException(status_code=404, detail="Cluster route not found")
+    return PydanticJSONResponse(cluster_route, CompactClusterRoute)
+
+
+@router.get("/clusters/{cluster_id}/directions", response_model=ClusterRoute)
+def get_cluster_directions(
+    cluster_id: str,
+    db: Session = Depends(create_new_db_session),
+    optimizer: OrdersOptimizer = Depends(get_optimizer),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Expand the stored route of a cluster into turn-by-turn directions for the driver app.
+    """
+    cluster_route = get_cluster_route(db=db, cluster_id=cluster_id)
+    if not cluster_route:
+        raise HTTPException(status_code=404, detail="Cluster route not found")
+    compact_route = CompactClusterRoute.model_validate(cluster_route)
+    # Start and end at the pizzeria of the cluster's orders
+    partition = orders_partition(
+        optimizer.db,
+        compact_route.order_ids,
+        optimizer.clustering_settings,
+        optimizer.pizza_prep_settings,
+    )
+    if partition.restaurant_id is not None:
+        optimizer = partition_optimizer(
+            partition, db=optimizer.db, route_planner=optimizer.route_planner, logger=logger
+        )
+    try:
+        directions = optimizer.expand_cluster_route(compact_route)
+    except ValueError as e:
+        # Orders deleted since the cluster was stored
+        raise HTTPException(status_code=409, detail=str(e))
+    return PydanticJSONResponse(directions, ClusterRoute)
 
 
 @router.get("/available_orders", response_model=List[OrderOut])
@@ -143,3 +411,77 @@ def get_available_orders(
         return filtered_orders
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def available_orders_query(
+    optimizer: OrdersOptimizer,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+):
+    query = optimizer.unassigned_orders_query()
+    if start_time:
+        query = query.filter(Order.created_at >= start_time)
+    if end_time:
+        query = query.filter(Order.created_at <= end_time)
+    return query
+
+
+@router.get("/available_orders/page", response_model=Page[OrderOut])
+def get_available_orders_page(
+    optimizer: OrdersOptimizer = Depends(get_optimizer),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+    lat: Optional[float] = Query(None),
+    lon: Optional[float] = Query(None),
+    radius_km: Optional[float] = Query(None),
+):
+    """
+    Keyset-paginated variant of /available_orders, sorted by (created_at, id).
+    Pass the returned `next_cursor` to get the following page.
+    """
+    query = available_orders_query(optimizer, start_time=start_time, end_time=end_time)
+    items = []
+    try:
+        # Orders out of radius are discarded after fetching: keep reading until the page is full
+        while len(items) < limit:
+            rows, cursor = fetch_page(query, Order, limit=limit - len(items), cursor=cursor)
+            items.extend(
+                optimizer.filter_out_unavailable_orders(
+                    rows, lat=lat, lon=lon, radius_km=radius_km
+                )
+            )
+            if cursor is None:
+                break
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": cursor}
+
+
+@router.get("/available_orders/stream", response_class=NDJSONResponse)
+def stream_available_orders(
+    optimizer: OrdersOptimizer = Depends(get_optimizer),
+    batch_size: int = Query(500, ge=1, le=5000),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+    lat: Optional[float] = Query(None),
+    lon: Optional[float] = Query(None),
+    radius_km: Optional[float] = Query(None),
+):
+    """
+    Stream available orders as NDJSON (one OrderOut per line), sorted by (created_at, id).
+    """
+    query = available_orders_query(optimizer, start_time=start_time, end_time=end_time)
+    return NDJSONResponse(
+        ndjson_lines(
+            iter_rows(query, Order, batch_size=batch_size),
+            schema=OrderOut,
+            db=optimizer.db,
+            keep=lambda order: bool(
+                optimizer.filter_out_unavailable_orders(
+                    [order], lat=lat, lon=lon, radius_km=radius_km
+                )
+            ),
+        )
+    )
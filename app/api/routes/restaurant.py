@@ -0,0 +1,29 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud import create_restaurant
+from app.database import create_new_db_session
+from app.models.restaurant import Restaurant
+from app.schemas.restaurant import RestaurantCreate, RestaurantOut
+
+router = APIRouter(prefix="/restaurants", tags=["Restaurants"])
+
+
+@router.post("/", response_model=RestaurantOut, status_code=201)
+def create_restaurant_in_db(
+    restaurant_data: RestaurantCreate,
+    db: Session = Depends(create_new_db_session),
+):
+    try:
+        return create_restaurant(db=db, restaurant_data=restaurant_data)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Restaurant name already exists")
+
+
+@router.get("/", response_model=List[RestaurantOut])
+def list_restaurants(db: Session = Depends(create_new_db_session)):
+    return db.query(Restaurant).order_by(Restaurant.id).all()
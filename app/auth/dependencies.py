@@ -1,17 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from app.models.user import User
 from app.database import create_new_db_session
 from app.config import settings
+from app.schemas.user import UserPrincipal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+class PrincipalCache:
+    """
+    Token -> UserPrincipal cache, so that authenticated requests do not query `users`.
+    Entries never outlive the token (`exp` claim) and are dropped when the user changes.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, UserPrincipal]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[UserPrincipal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.time():
+                self._discard(token)
+                return None
+            return principal
+
+    def set(self, token: str, principal: UserPrincipal, token_exp: Optional[float]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[token] = (expires_at, principal)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _discard(self, token: str) -> None:
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
+
+
+# NOTE: bulk query updates/deletes bypass these events
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(create_new_db_session)
-) -> User:
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or missing authentication credentials",
@@ -28,7 +101,16 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    if settings.TRUST_TOKEN_CLAIMS and "role" in payload:
+        return UserPrincipal(id=user_id, role=payload["role"])
+
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = UserPrincipal.model_validate(user)
+    principal_cache.set(token, principal, token_exp=payload.get("exp"))
+    return principal
@@ -1,10 +1,39 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS
+)
+
+# bcrypt is CPU bound (hundreds of ms per call): it runs in a dedicated, bounded process
+# pool so that a login storm cannot starve the request threadpool
+_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            # Forking a multi-threaded server is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
 
 
 def hash_password(password: str) -> str:
@@ -15,6 +44,37 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify the password and return a new hash when the stored one uses an outdated
+    scheme or work factor (None otherwise).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), hash_password, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_hash_executor(), verify_and_update_password, plain_password, hashed_password
+    )
+
+
+def hash_passwords_bulk(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel (e.g. seeding scripts), preserving order.
+    """
+    return list(get_hash_executor().map(hash_password, passwords))
+
+
 # JWT generation
 def create_access_token(data: dict):
     to_encode = data.copy()
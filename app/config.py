@@ -20,6 +20,15 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Authenticated principals are cached per token (bounded by the token expiry)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 300
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+    # Build the principal from the token claims (user_id, role) without hitting `users`
+    TRUST_TOKEN_CLAIMS: bool = False
+    # bcrypt work factor: hashes with a different cost are upgraded at login
+    PASSWORD_HASH_ROUNDS: int = 12
+    # Size of the process pool running bcrypt off the request path
+    PASSWORD_HASH_WORKERS: int = 2
     FIRST_SUPERUSER: str = "user@example.com"
     DB_USERNAME: str = "postgres"
     DB_PASSWORD: str = "postgres"
@@ -27,6 +36,38 @@ class Settings(BaseSettings):
     DB_PORT: str = "5432"
     DB_NAME: str = "pizza_db"
     ROUTE_SERVICE_PROVIDER: str = "openrouteservice"
+    # Record/replay route planner responses (off, record, replay, replay_or_record)
+    ROUTE_PLANNER_FIXTURES_MODE: str = "off"
+    ROUTE_PLANNER_FIXTURES_PATH: str = "tests/fixtures/route_planner/responses.json.gz"
+    # Recorded responses are written at most once per interval, and on shutdown
+    ROUTE_PLANNER_FIXTURES_SAVE_INTERVAL_SECONDS: float = 10.0
+    # Latency injected when replaying (zero, recorded, ors)
+    ROUTE_PLANNER_REPLAY_LATENCY: str = "zero"
+    # Degraded mode: ORS calls time out, share a budget per optimizer run, and are refused
+    # while the circuit breaker is open; matrices and directions then fall back to the last
+    # exact response or to the haversine planner calibrated on ROUTE_PLANNER_FIXTURES_PATH
+    ROUTE_PLANNER_FALLBACK_ENABLED: bool = True
+    ROUTE_PLANNER_TIMEOUT_SECONDS: float = 5.0
+    ROUTE_PLANNER_RUN_BUDGET_SECONDS: float = 30.0
+    ROUTE_PLANNER_BREAKER_FAILURES: int = 3
+    ROUTE_PLANNER_BREAKER_RESET_SECONDS: float = 30.0
+    # Memory of the last exact responses served while ORS is unavailable
+    ROUTE_PLANNER_RESPONSE_CACHE_MB: float = 64.0
+    # Concurrent geocoding requests issued by POST /orders/batch
+    GEOCODE_MAX_CONCURRENCY: int = 8
+    # Geocoded addresses kept in memory (0 disables the cache)
+    GEOCODE_CACHE_MAX_ENTRIES: int = 10_000
+    # Driver pings (POST /drivers/locations) are written to `drivers` in bulk every interval
+    DRIVER_LOCATION_FLUSH_INTERVAL_SECONDS: float = 2.0
+    # In-memory positions older than this are ignored by the optimizer
+    DRIVER_LOCATION_MAX_AGE_SECONDS: int = 120
+    # Serve available drivers from an in-process grid index instead of the drivers table.
+    # Single process only: other workers' writes are not seen
+    DRIVER_REGISTRY_ENABLED: bool = False
+    DRIVER_REGISTRY_CELL_KM: float = 1.0
+    # Processes optimizing the restaurants in parallel (POST /orders/optimize); 0 runs them
+    # one after the other in the request process
+    DISPATCH_WORKERS: int = 2
     POSTAL_CODE: str
     CITY: str
     COUNTRY: str
@@ -44,6 +85,23 @@ class ClusteringSettings(BaseSettings):
     CITY: str
     COUNTRY: str
     ETA_THRESHOLD_MINUTES: int = 10
+    # Only the drivers nearest to the start location are assignment candidates (0: all)
+    MAX_CANDIDATE_DRIVERS: int = 0
+    # Time buckets with more orders than this are clustered on a sparse graph, with road
+    # distances only between orders in neighbouring grid cells (0: always a full matrix)
+    LARGE_BUCKET_SIZE: int = 200
+    # Side of those grid cells: must exceed the straight-line distance that can be covered
+    # within CLUSTER_DISTANCE_THRESHOLD, farther pairs are never compared
+    LARGE_BUCKET_CELL_KM: float = 1.0
+    # Drivers assigned in a run also get the clusters left over, trip after trip, when
+    # they are back at the restaurant within this many minutes (0: one cluster per driver)
+    MULTI_TRIP_HORIZON_MINUTES: int = 0
+    # Reuse the clusters deferred by the previous run while their orders are unchanged
+    WARM_START: bool = False
+    # Added to the cost of moving a reused cluster away from its previous best driver
+    SWITCHING_PENALTY: float = 0.0
+    # TTL of the cached /orders/clusters and /orders/clusters_by_time previews (0 disables)
+    CLUSTER_PREVIEW_CACHE_TTL_SECONDS: int = 30
 
 
 class ChefExperience(str, Enum):
@@ -70,6 +128,13 @@ class PizzaPreparationSettings(BaseSettings):
     PIZZA_TYPE: PizzaType
 
 
+class ProfilingSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PROFILING_SETTINGS__")
+    # Record a cProfile profile of every optimizer run (POST /orders/optimize?profile=true for one run)
+    CPROFILE_OPTIMIZER_RUNS: bool = False
+    CPROFILE_OUTPUT_DIR: str = "profiles"
+
+
 class OpenRouteServiceSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="OPENROUTESERVICE__")
     ROUTE_SERVICE_API_KEY: str
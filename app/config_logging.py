@@ -1,13 +1,63 @@
+import json
 import logging
 import logging.handlers
 import os
 import platform
+import queue
+import random
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
 from app.config import Settings, settings
 
+# Background thread writing the records queued by the application threads
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+# Attributes of every LogRecord: anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, including the fields passed through `extra=`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        return json.dumps(payload, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keeps a `rate` fraction of the DEBUG records; records of other levels always pass.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+def _get_option(app_settings: Optional[Settings], name: str, default: str) -> str:
+    if app_settings and hasattr(app_settings, name.lower()):
+        return str(getattr(app_settings, name.lower()))
+    return os.getenv(name, default)
+
 
 def get_default_log_dir() -> Path:
     """Get the default log directory based on OS standards"""
@@ -27,7 +77,14 @@ def get_default_log_dir() -> Path:
 
 
 def setup_logging(app_settings: Optional[Settings] = None) -> None:
-    """Configure logging for the mcp-simple-server MCP server"""
+    """
+    Configure logging: records are queued by the calling thread and written to stderr
+    and to a rotating file by a background listener thread (stopped by shutdown_logging).
+    LOG_FORMAT=json switches to JSON lines; LOG_DEBUG_SAMPLE_RATE keeps a fraction of DEBUG records.
+    """
+    global _queue_listener, _queue_handler
+    shutdown_logging()
+
     # Get log level from server config, environment, or default to INFO
     log_level = "INFO"
     if app_settings and hasattr(app_settings, "log_level"):
@@ -64,15 +121,18 @@ def setup_logging(app_settings: Optional[Settings] = None) -> None:
             logger.removeHandler(handler)
 
     # Create formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    log_format = _get_option(app_settings, "LOG_FORMAT", "text").lower()
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
 
     # Add stderr handler
     stderr_handler = logging.StreamHandler(sys.stderr)
     stderr_handler.setLevel(effective_level)
     stderr_handler.setFormatter(formatter)
-    root_logger.addHandler(stderr_handler)
 
     # Set up file logging
     log_path = get_default_log_dir()
@@ -85,7 +145,19 @@ def setup_logging(app_settings: Optional[Settings] = None) -> None:
     )
     file_handler.setLevel(effective_level)
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
+
+    # Only the queue handler runs on the calling thread: I/O happens in the listener thread
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _queue_handler.setLevel(effective_level)
+    debug_sample_rate = float(_get_option(app_settings, "LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    if debug_sample_rate < 1.0:
+        _queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    root_logger.addHandler(_queue_handler)
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, stderr_handler, file_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
 
     # Set levels for all loggers
     for logger in [
@@ -96,10 +168,25 @@ def setup_logging(app_settings: Optional[Settings] = None) -> None:
         logger.propagate = True
 
     # Log startup information
-    project_logger.info(f"Log File: {log_file}")
+    project_logger.info("Log File: %s", log_file)
     project_logger.info("Logging Enabled for:")
-    project_logger.info(f"- {project_logger.name} (Project Logger)")
-    project_logger.info(f"Log Level: {log_level}")
+    project_logger.info("- %s (Project Logger)", project_logger.name)
+    project_logger.info("Log Level: %s", log_level)
+
+
+def shutdown_logging() -> None:
+    """
+    Detach the queue handler from the root logger, so that later records are not queued
+    with no one to write them, then stop the listener thread after writing out the queued
+    records.
+    """
+    global _queue_listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
 
 
 # Export the logger for use in other modules
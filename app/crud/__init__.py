@@ -1,4 +1,5 @@
-from .cluster import create_cluster
+from .cluster import create_cluster, create_clusters, get_cluster_route
 from .driver import create_driver, update_driver
-from .order import create_order, update_order_status
+from .order import create_order, create_orders, update_order_status
 from .user import create_user
+from .restaurant import create_restaurant, get_active_restaurants, unknown_restaurant_ids
@@ -1,20 +1,27 @@
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
-from app.models.cluster import OrderCluster as OrderClusterModel
+from app.models.cluster import ClusterRouteRecord, OrderCluster as OrderClusterModel
 from app.models.order import Order
-from app.schemas.cluster import ClusterStatus, OrderCluster
+from app.schemas.cluster import ClusterStatus, CompactClusterRoute, OrderCluster
 
 
-def create_cluster(*, db: Session, order_cluster: OrderCluster) -> OrderClusterModel:
+def _new_cluster(order_cluster: OrderCluster) -> OrderClusterModel:
     new_cluster = OrderClusterModel(
         id=order_cluster.id,
         time_window=order_cluster.time_window,
         total_items=order_cluster.total_items,
         earliest_delivery_time=order_cluster.earliest_delivery_time,
-        cluster_route=order_cluster.cluster_route.model_dump(),
         relaxed_constraints=None,
     )
+    # Only the compact route is persisted (no steps, no repeated addresses)
+    compact_route = CompactClusterRoute.from_cluster_route(order_cluster.cluster_route)
+    new_cluster.route = ClusterRouteRecord(**compact_route.model_dump())
+    return new_cluster
+
+
+def create_cluster(*, db: Session, order_cluster: OrderCluster) -> OrderClusterModel:
+    new_cluster = _new_cluster(order_cluster)
     for idx in order_cluster.get_order_ids:
         order_obj = db.query(Order).get(idx)
         new_cluster.orders.append(order_obj)
@@ -23,6 +30,34 @@ def create_cluster(*, db: Session, order_cluster: OrderCluster) -> OrderClusterM
     db.refresh(new_cluster)
     return new_cluster
 
+
+def create_clusters(*, db: Session, order_clusters: List[OrderCluster]) -> List[OrderClusterModel]:
+    """
+    Store many clusters in one transaction, loading their orders with a single query.
+    The returned clusters are expired (not refreshed).
+    """
+    order_ids = {idx for c in order_clusters for idx in c.get_order_ids}
+    orders_by_id = (
+        {o.id: o for o in db.query(Order).filter(Order.id.in_(order_ids))} if order_ids else {}
+    )
+    new_clusters = []
+    for order_cluster in order_clusters:
+        new_cluster = _new_cluster(order_cluster)
+        new_cluster.orders = [orders_by_id[idx] for idx in order_cluster.get_order_ids]
+        new_clusters.append(new_cluster)
+    db.add_all(new_clusters)
+    db.commit()
+    return new_clusters
+
+
+def get_cluster_route(*, db: Session, cluster_id: str) -> Optional[ClusterRouteRecord]:
+    return (
+        db.query(ClusterRouteRecord)
+        .filter(ClusterRouteRecord.cluster_id == cluster_id)
+        .first()
+    )
+
+
 def update_cluster_status(*, db: Session, order_cluster_ids: List[str]) -> None:
     db.query(OrderClusterModel).filter(
         OrderClusterModel.id.in_(order_cluster_ids)
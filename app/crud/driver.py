@@ -1,8 +1,10 @@
-from typing import List
+from datetime import datetime
+from typing import Dict, List
 from sqlalchemy.orm import Session
 
 from app.models.driver import Driver, DriverStatus
 from app.schemas.driver import DriverCreate, DriverUpdate
+from app.services.drivers.registry import get_driver_registry
 
 
 def create_driver(*, db: Session, driver_data: DriverCreate):
@@ -14,6 +16,7 @@ def create_driver(*, db: Session, driver_data: DriverCreate):
         status=driver_data.status,
         lat=driver_data.lat,
         lon=driver_data.lon,
+        restaurant_id=driver_data.restaurant_id,
     )
     db.add(new_driver)
     db.commit()
@@ -37,3 +40,22 @@ def update_driver_status(*, db: Session, driver_ids: List[int]) -> None:
         synchronize_session=False
     )
     db.commit()
+    # Bulk updates bypass the ORM events keeping the registry in sync
+    get_driver_registry().set_status(driver_ids, DriverStatus.DELIVERING)
+
+
+def update_driver_finish_times(*, db: Session, finish_times: Dict[int, datetime]) -> None:
+    """
+    Mark drivers as delivering until the given times (e.g. the end of their chained trips).
+    """
+    for driver_id, finish_time in finish_times.items():
+        db.query(Driver).filter(Driver.id == driver_id).update(
+            {Driver.status: DriverStatus.DELIVERING, Driver.estimated_finish_time: finish_time},
+            synchronize_session=False,
+        )
+    db.commit()
+    # Bulk updates bypass the ORM events keeping the registry in sync
+    for driver_id, finish_time in finish_times.items():
+        get_driver_registry().set_status(
+            [driver_id], DriverStatus.DELIVERING, estimated_finish_time=finish_time
+        )
@@ -1,13 +1,14 @@
-from typing import List
+from typing import List, Sequence, Tuple
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.order import Order, OrderStatus
-from app.models.user import User
 from app.schemas.order import OrderCreate
+from app.schemas.user import UserPrincipal
 
 
 def create_order(
-    *, db: Session, current_user: User, order_data: OrderCreate, lon: float, lat: float
+    *, db: Session, current_user: UserPrincipal, order_data: OrderCreate, lon: float, lat: float
 ) -> Order:
     new_order = Order(
         creator_id=current_user.id,
@@ -19,6 +20,7 @@ def create_order(
         items=order_data.items.model_dump(),
         estimated_prep_time=order_data.estimated_prep_time,
         desired_delivery_time=order_data.desired_delivery_time,
+        restaurant_id=order_data.restaurant_id,
     )
     db.add(new_order)
     db.commit()
@@ -26,6 +28,43 @@ def create_order(
     return new_order
 
 
+def create_orders(
+    *,
+    db: Session,
+    current_user: UserPrincipal,
+    orders_data: Sequence[Tuple[OrderCreate, float, float]],
+) -> List[Order]:
+    """
+    Insert (order_data, lon, lat) items with a single multi-row INSERT ... RETURNING
+    in one transaction. Orders are returned in input order.
+    """
+    rows = [
+        dict(
+            creator_id=current_user.id,
+            customer_name=order_data.customer_name,
+            customer_phone=order_data.customer_phone,
+            lat=lat,
+            lon=lon,
+            delivery_address=order_data.delivery_address.model_dump(),
+            items=order_data.items.model_dump(),
+            estimated_prep_time=order_data.estimated_prep_time,
+            desired_delivery_time=order_data.desired_delivery_time,
+            restaurant_id=order_data.restaurant_id,
+        )
+        for order_data, lon, lat in orders_data
+    ]
+    if not rows:
+        return []
+    new_orders = db.scalars(
+        insert(Order).returning(Order, sort_by_parameter_order=True), rows
+    ).all()
+    order_ids = [order.id for order in new_orders]
+    db.commit()
+    # Reload the orders expired by the commit with one query, instead of a refresh per order
+    db.query(Order).filter(Order.id.in_(order_ids)).all()
+    return new_orders
+
+
 def update_order_status(*, db: Session, order_ids: List[int]) -> None:
     db.query(Order).filter(Order.id.in_(order_ids)).update(
         {Order.status: OrderStatus.assigned}, synchronize_session=False
@@ -0,0 +1,38 @@
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.restaurant import Restaurant
+from app.schemas.restaurant import RestaurantCreate
+
+
+def create_restaurant(*, db: Session, restaurant_data: RestaurantCreate) -> Restaurant:
+    new_restaurant = Restaurant(**restaurant_data.model_dump())
+    db.add(new_restaurant)
+    db.commit()
+    db.refresh(new_restaurant)
+    return new_restaurant
+
+
+def get_active_restaurants(*, db: Session) -> List[Restaurant]:
+    return (
+        db.query(Restaurant)
+        .filter(Restaurant.is_active.is_(True))
+        .order_by(Restaurant.id)
+        .all()
+    )
+
+
+def unknown_restaurant_ids(*, db: Session, restaurant_ids: Iterable[Optional[int]]) -> Set[int]:
+    """
+    The ids among `restaurant_ids` (None: the default restaurant) that are not the id
+    of an active restaurant.
+    """
+    ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id is not None}
+    if not ids:
+        return set()
+    active = db.scalars(
+        select(Restaurant.id).where(Restaurant.id.in_(ids), Restaurant.is_active.is_(True))
+    )
+    return ids - set(active)
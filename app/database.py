@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
+from app.migrations import run_migrations
 
 DATABASE_URL = "postgresql://{db_username}:{db_passwd}@{db_host}:{db_port}/{db_name}"
 engine = create_engine(
@@ -39,3 +40,8 @@ def create_new_db_session():
 
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
+
+
+def apply_migrations():
+    # Versioned schema changes on top of create_all (see app/migrations)
+    return run_migrations(engine)
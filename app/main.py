@@ -1,18 +1,31 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 
 from app.api.main import api_router
-from app.database import create_db_and_tables
+from app.api.middleware import RequestMetricsMiddleware
+from app.api.routes import metrics
+from app.auth.utils import shutdown_hash_executor
+from app.database import (
+    DatabaseManager,
+    SessionLocal,
+    apply_migrations,
+    create_db_and_tables,
+)
 from app.models import (
     cluster,
     driver,
     order,
+    restaurant,
     user,
 )  # Order matters! (https://sqlmodel.tiangolo.com/tutorial/create-db-and-table/#sqlmodel-metadata-order-matters)
-from app.config_logging import setup_logging
+from app.config_logging import setup_logging, shutdown_logging
 from app.config import settings
+from app.services.drivers import get_driver_location_store, get_driver_registry
+from app.services.orders import shutdown_dispatch_executor
+from app.services.route_planner.factory import save_route_planner_fixtures
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -22,8 +35,24 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    apply_migrations()
     setup_logging(settings)
+    if settings.DRIVER_REGISTRY_ENABLED:
+        with DatabaseManager() as db:
+            get_driver_registry().load(db.query(driver.Driver))
+    location_flusher = asyncio.create_task(
+        get_driver_location_store().run_flusher(
+            SessionLocal, interval=settings.DRIVER_LOCATION_FLUSH_INTERVAL_SECONDS
+        )
+    )
     yield
+    # Cancelling runs a last flush of the buffered driver locations
+    location_flusher.cancel()
+    await asyncio.gather(location_flusher, return_exceptions=True)
+    shutdown_hash_executor()
+    shutdown_dispatch_executor()
+    save_route_planner_fixtures()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -33,4 +62,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# Prometheus scrapes /metrics at the root, outside of the versioned API
+app.include_router(metrics.router)
@@ -0,0 +1,275 @@
+"""
+Minimal Prometheus-compatible metrics (text exposition format 0.0.4).
+
+Counters and histograms keep one slot per writer thread: a thread only ever writes
+its own slot, so recording needs no lock, and a scrape sums the slots.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _ThreadSlots:
+    """
+    Per-thread lists of `size` floats.
+    """
+
+    __slots__ = ("_size", "_slots")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._slots: Dict[int, List[float]] = {}
+
+    def slot(self) -> List[float]:
+        thread_id = threading.get_ident()
+        slot = self._slots.get(thread_id)
+        if slot is None:
+            slot = self._slots[thread_id] = [0.0] * self._size
+        return slot
+
+    def totals(self) -> List[float]:
+        totals = [0.0] * self._size
+        for slot in list(self._slots.values()):
+            for i, value in enumerate(slot):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    __slots__ = ("_slots",)
+
+    def __init__(self):
+        self._slots = _ThreadSlots(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._slots.slot()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._slots.totals()[0]
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_slots")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # One count per bucket, one for +Inf, then the sum of observations
+        self._slots = _ThreadSlots(len(upper_bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        slot = self._slots.slot()
+        slot[bisect_left(self._upper_bounds, value)] += 1
+        slot[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """
+        Returns (cumulative bucket counts including +Inf, count, sum).
+        """
+        totals = self._slots.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values) -> object:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_pairs(self, key: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = tuple(zip(self.labelnames, key)) + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{self._label_pairs(key)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_child(self, key, child) -> List[str]:
+        cumulative, count, total = child.snapshot()
+        lines = [
+            f"{self.name}_bucket{self._label_pairs(key, (('le', _format_value(bound)),))} {_format_value(value)}"
+            for bound, value in zip(self.upper_bounds + (math.inf,), cumulative)
+        ]
+        lines.append(f"{self.name}_sum{self._label_pairs(key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{self._label_pairs(key)} {_format_value(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _register(metric_factory: Callable[..., _Metric], *args, **kwargs):
+    return REGISTRY.register(metric_factory(*args, **kwargs))
+
+
+HTTP_REQUEST_DURATION = _register(
+    Histogram,
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+OPTIMIZER_STAGE_DURATION = _register(
+    Histogram,
+    "optimizer_stage_duration_seconds",
+    "Wall time of the optimizer run stages",
+    ("stage",),
+    buckets=SLOW_LATENCY_BUCKETS,
+)
+ROUTE_PLANNER_REQUEST_DURATION = _register(
+    Histogram,
+    "route_planner_request_duration_seconds",
+    "Route planner (ORS) call latency by method",
+    ("method",),
+    buckets=SLOW_LATENCY_BUCKETS,
+)
+ROUTE_PLANNER_REQUESTS = _register(
+    Counter,
+    "route_planner_requests_total",
+    "Route planner (ORS) calls by method and outcome (success, error)",
+    ("method", "outcome"),
+)
+ROUTE_PLANNER_FALLBACKS = _register(
+    Counter,
+    "route_planner_fallbacks_total",
+    "Route planner calls not served by the exact planner, by method, reason "
+    "(open, timeout, error, budget) and source (cache, approximate)",
+    ("method", "reason", "source"),
+)
+ROUTE_PLANNER_CIRCUIT_OPEN = _register(
+    Gauge,
+    "route_planner_circuit_open",
+    "1 while the route planner circuit breaker is open",
+)
+GEOCODE_CACHE_REQUESTS = _register(
+    Counter,
+    "geocode_cache_requests_total",
+    "Geocode cache lookups by result (hit, miss)",
+    ("result",),
+)
+DB_POOL_CONNECTIONS = _register(
+    Gauge,
+    "db_pool_connections",
+    "Database pool connections by state (size, checked_out, overflow)",
+    ("state",),
+)
+PENDING_ORDERS = _register(Gauge, "dispatch_pending_orders", "Orders waiting to be clustered")
+UNASSIGNED_CLUSTERS = _register(
+    Gauge, "dispatch_unassigned_clusters", "Clusters waiting for a driver"
+)
+AVAILABLE_DRIVERS = _register(Gauge, "dispatch_available_drivers", "Available drivers")
@@ -0,0 +1,126 @@
+"""
+Lightweight versioned schema migrations.
+
+``Base.metadata.create_all`` only creates missing tables, it never alters existing
+ones. Schema changes (new indexes, columns, ...) are shipped as numbered modules in
+``app/migrations/versions`` named ``v<NNNN>_<slug>.py``, each exposing
+``upgrade(connection)`` and ``downgrade(connection)``. Applied versions are tracked
+in the ``schema_migrations`` table.
+"""
+import importlib
+import pkgutil
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from types import ModuleType
+from typing import List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection, Engine
+
+from app.migrations import versions
+
+MIGRATION_MODULE_PATTERN = re.compile(r"^v(?P<version>\d{4})_(?P<name>\w+)$")
+
+_migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migrations_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    def upgrade(self, connection: Connection) -> None:
+        self.module.upgrade(connection)
+
+    def downgrade(self, connection: Connection) -> None:
+        self.module.downgrade(connection)
+
+
+def discover_migrations() -> List[Migration]:
+    """
+    Return all migrations found in ``app.migrations.versions``, sorted by version.
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = MIGRATION_MODULE_PATTERN.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(
+            Migration(
+                version=int(match.group("version")),
+                name=match.group("name"),
+                module=module,
+            )
+        )
+    migrations.sort(key=lambda m: m.version)
+    seen = [m.version for m in migrations]
+    if len(seen) != len(set(seen)):
+        raise RuntimeError(f"Duplicated migration versions: {seen}")
+    return migrations
+
+
+def applied_versions(connection: Connection) -> Set[int]:
+    schema_migrations.create(bind=connection, checkfirst=True)
+    return {
+        row.version for row in connection.execute(schema_migrations.select()).all()
+    }
+
+
+def run_migrations(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations up to ``target`` (all of them when None).
+    Each migration runs in its own transaction, so a failure leaves the schema at
+    the last successfully applied version.
+    """
+    applied = []
+    with engine.connect() as connection:
+        done = applied_versions(connection)
+        connection.commit()
+        for migration in discover_migrations():
+            if migration.version in done:
+                continue
+            if target is not None and migration.version > target:
+                break
+            with connection.begin():
+                migration.upgrade(connection)
+                connection.execute(
+                    schema_migrations.insert().values(
+                        version=migration.version,
+                        name=migration.name,
+                        applied_at=datetime.utcnow(),
+                    )
+                )
+            applied.append(migration)
+    return applied
+
+
+def downgrade_migrations(engine: Engine, target: int) -> List[Migration]:
+    """
+    Revert applied migrations newer than ``target`` (``0`` reverts everything).
+    """
+    reverted = []
+    with engine.connect() as connection:
+        done = applied_versions(connection)
+        connection.commit()
+        for migration in reversed(discover_migrations()):
+            if migration.version <= target or migration.version not in done:
+                continue
+            with connection.begin():
+                migration.downgrade(connection)
+                connection.execute(
+                    schema_migrations.delete().where(
+                        schema_migrations.c.version == migration.version
+                    )
+                )
+            reverted.append(migration)
+    return reverted
@@ -0,0 +1,44 @@
+"""
+Usage:
+    python -m app.migrations upgrade [target_version]
+    python -m app.migrations downgrade <target_version>
+    python -m app.migrations status
+"""
+import argparse
+
+from app.database import engine
+from app.migrations import (
+    applied_versions,
+    discover_migrations,
+    downgrade_migrations,
+    run_migrations,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade")
+    upgrade_parser.add_argument("target", type=int, nargs="?", default=None)
+    downgrade_parser = subparsers.add_parser("downgrade")
+    downgrade_parser.add_argument("target", type=int)
+    subparsers.add_parser("status")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        for migration in run_migrations(engine, target=args.target):
+            print(f"Applied v{migration.version:04d} {migration.name}")
+    elif args.command == "downgrade":
+        for migration in downgrade_migrations(engine, target=args.target):
+            print(f"Reverted v{migration.version:04d} {migration.name}")
+    else:
+        with engine.connect() as connection:
+            done = applied_versions(connection)
+            connection.commit()
+        for migration in discover_migrations():
+            flag = "x" if migration.version in done else " "
+            print(f"[{flag}] v{migration.version:04d} {migration.name}")
+
+
+if __name__ == "__main__":
+    main()
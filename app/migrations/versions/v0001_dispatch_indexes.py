@@ -0,0 +1,33 @@
+"""
+Secondary indexes for the dispatch query patterns:
+- pending orders fetched by the optimizer and the previews (``orders.status``),
+  with partial indexes restricted to ``status = 'pending'``
+- available / soon-free drivers (``drivers.status, drivers.estimated_finish_time``)
+- clusters of an order (``order_cluster_association.order_id``)
+- clusters waiting for a driver (``order_clusters.cluster_status = 'to_be_assigned'``)
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+INDEXES = {
+    "ix_orders_status": "orders (status)",
+    "ix_orders_pending_desired_delivery_time": (
+        "orders (desired_delivery_time) WHERE status = 'pending'"
+    ),
+    "ix_orders_pending_created_at_id": "orders (created_at, id) WHERE status = 'pending'",
+    "ix_drivers_status_estimated_finish_time": "drivers (status, estimated_finish_time)",
+    "ix_order_cluster_association_order_id": "order_cluster_association (order_id)",
+    "ix_order_clusters_to_be_assigned": (
+        "order_clusters (earliest_delivery_time) WHERE cluster_status = 'to_be_assigned'"
+    ),
+}
+
+
+def upgrade(connection: Connection) -> None:
+    for name, definition in INDEXES.items():
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+
+
+def downgrade(connection: Connection) -> None:
+    for name in INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
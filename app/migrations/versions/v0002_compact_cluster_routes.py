@@ -0,0 +1,97 @@
+"""
+Move cluster routes out of ``order_clusters.cluster_route`` (full turn-by-turn JSON)
+into the compact ``cluster_routes`` table.
+
+Existing rows are backfilled with their per-segment distances and durations; their
+steps are dropped, so downgrading cannot restore them.
+"""
+from sqlalchemy import (
+    JSON,
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+order_clusters = Table("order_clusters", metadata, Column("id", String, primary_key=True))
+cluster_routes = Table(
+    "cluster_routes",
+    metadata,
+    Column("cluster_id", String, ForeignKey("order_clusters.id"), primary_key=True),
+    Column("id", String, nullable=False),
+    Column("distance", Float, nullable=False),
+    Column("duration", Float, nullable=False),
+    Column("order_ids", JSON, nullable=False),
+    Column("segment_distances", JSON, nullable=False),
+    Column("segment_durations", JSON, nullable=False),
+    Column("geometry", Text, nullable=True),
+)
+order_cluster_association = Table(
+    "order_cluster_association",
+    metadata,
+    Column("cluster_id", String),
+    Column("order_id", Integer),
+)
+
+
+def _has_legacy_column(connection: Connection) -> bool:
+    columns = inspect(connection).get_columns("order_clusters")
+    return any(column["name"] == "cluster_route" for column in columns)
+
+
+def upgrade(connection: Connection) -> None:
+    if not inspect(connection).has_table("order_clusters"):
+        # Fresh database: create_all takes care of everything
+        return
+    cluster_routes.create(bind=connection, checkfirst=True)
+    if not _has_legacy_column(connection):
+        return
+
+    legacy_route = Column("cluster_route", JSON)
+    legacy_clusters = Table(
+        "order_clusters", MetaData(), Column("id", String, primary_key=True), legacy_route
+    )
+    already_migrated = set(connection.execute(select(cluster_routes.c.cluster_id)).scalars())
+    for cluster_id, route in connection.execute(
+        select(legacy_clusters.c.id, legacy_clusters.c.cluster_route)
+    ):
+        if cluster_id in already_migrated or not route:
+            continue
+        segments = route.get("segments", [])
+        # Visiting order is not recoverable from legacy routes: fall back to the
+        # association table
+        order_ids = connection.execute(
+            select(order_cluster_association.c.order_id).where(
+                order_cluster_association.c.cluster_id == cluster_id
+            )
+        ).scalars()
+        connection.execute(
+            cluster_routes.insert().values(
+                cluster_id=cluster_id,
+                id=route.get("id", cluster_id),
+                distance=route.get("distance", 0.0),
+                duration=route.get("duration", 0.0),
+                order_ids=list(order_ids),
+                segment_distances=[s["distance"] for s in segments],
+                segment_durations=[s["duration"] for s in segments],
+                geometry=None,
+            )
+        )
+    connection.execute(text("ALTER TABLE order_clusters DROP COLUMN cluster_route"))
+
+
+def downgrade(connection: Connection) -> None:
+    if not inspect(connection).has_table("order_clusters"):
+        return
+    if not _has_legacy_column(connection):
+        connection.execute(text("ALTER TABLE order_clusters ADD COLUMN cluster_route JSON"))
+    cluster_routes.drop(bind=connection, checkfirst=True)
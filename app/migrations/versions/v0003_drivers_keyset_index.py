@@ -0,0 +1,16 @@
+"""
+Index backing the keyset pagination of drivers on (created_at, id).
+Pending orders are already covered by ix_orders_pending_created_at_id (v0001).
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def upgrade(connection: Connection) -> None:
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_drivers_created_at_id ON drivers (created_at, id)")
+    )
+
+
+def downgrade(connection: Connection) -> None:
+    connection.execute(text("DROP INDEX IF EXISTS ix_drivers_created_at_id"))
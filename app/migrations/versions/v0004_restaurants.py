@@ -0,0 +1,74 @@
+"""
+Restaurants, and the partition of orders and drivers by restaurant
+(``orders.restaurant_id``, ``drivers.restaurant_id``; NULL is the default restaurant).
+
+SQLite cannot drop columns referenced by a foreign key: there, downgrading only drops
+the indexes and leaves the (nullable) columns and the table in place.
+"""
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    text,
+)
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+restaurants = Table(
+    "restaurants",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, unique=True, nullable=False),
+    Column("lat", Float, nullable=False),
+    Column("lon", Float, nullable=False),
+    Column("address", String, nullable=False),
+    Column("postal_code", String, nullable=False),
+    Column("city", String, nullable=False),
+    Column("country", String, nullable=False),
+    Column("pizza_prep_settings", JSON, nullable=False),
+    Column("is_active", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+PARTITIONED_TABLES = ("orders", "drivers")
+
+
+def _has_column(connection: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(connection).get_columns(table))
+
+
+def upgrade(connection: Connection) -> None:
+    restaurants.create(bind=connection, checkfirst=True)
+    for table in PARTITIONED_TABLES:
+        if not inspect(connection).has_table(table):
+            # Fresh database: create_all takes care of everything
+            continue
+        if not _has_column(connection, table, "restaurant_id"):
+            connection.execute(
+                text(
+                    f"ALTER TABLE {table} ADD COLUMN restaurant_id INTEGER "
+                    "REFERENCES restaurants (id)"
+                )
+            )
+        connection.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_restaurant_id ON {table} (restaurant_id)"
+            )
+        )
+
+
+def downgrade(connection: Connection) -> None:
+    for table in PARTITIONED_TABLES:
+        connection.execute(text(f"DROP INDEX IF EXISTS ix_{table}_restaurant_id"))
+    if connection.dialect.name == "sqlite":
+        return
+    for table in PARTITIONED_TABLES:
+        if inspect(connection).has_table(table) and _has_column(connection, table, "restaurant_id"):
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN restaurant_id"))
+    restaurants.drop(bind=connection, checkfirst=True)
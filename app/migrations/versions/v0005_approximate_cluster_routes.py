@@ -0,0 +1,29 @@
+"""
+Flag cluster routes computed by the approximate route planner (``cluster_routes.approximate``),
+while the exact one was unavailable.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def _has_column(connection: Connection) -> bool:
+    return any(
+        c["name"] == "approximate" for c in inspect(connection).get_columns("cluster_routes")
+    )
+
+
+def upgrade(connection: Connection) -> None:
+    if not inspect(connection).has_table("cluster_routes"):
+        # Fresh database: create_all takes care of everything
+        return
+    if not _has_column(connection):
+        connection.execute(
+            text(
+                "ALTER TABLE cluster_routes ADD COLUMN approximate BOOLEAN NOT NULL DEFAULT FALSE"
+            )
+        )
+
+
+def downgrade(connection: Connection) -> None:
+    if inspect(connection).has_table("cluster_routes") and _has_column(connection):
+        connection.execute(text("ALTER TABLE cluster_routes DROP COLUMN approximate"))
@@ -1,4 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Table, ForeignKey, Enum
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Integer,
+    Float,
+    Text,
+    String,
+    DateTime,
+    JSON,
+    Table,
+    ForeignKey,
+    Enum,
+    Index,
+    text,
+)
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.schemas.cluster import ClusterStatus
@@ -9,17 +23,26 @@ order_cluster_association = Table(
     Base.metadata,
     Column("cluster_id", String, ForeignKey("order_clusters.id"), primary_key=True),
     Column("order_id", Integer, ForeignKey("orders.id"), primary_key=True),
+    # The primary key (cluster_id, order_id) cannot serve lookups by order
+    Index("ix_order_cluster_association_order_id", "order_id"),
 )
 
 
 class OrderCluster(Base):
     __tablename__ = "order_clusters"
+    __table_args__ = (
+        Index(
+            "ix_order_clusters_to_be_assigned",
+            "earliest_delivery_time",
+            postgresql_where=text("cluster_status = 'to_be_assigned'"),
+            sqlite_where=text("cluster_status = 'to_be_assigned'"),
+        ),
+    )
 
     id = Column(String, primary_key=True, index=True, nullable=False)
     time_window = Column(DateTime, nullable=False)
     total_items = Column(Integer, nullable=False)
     earliest_delivery_time = Column(DateTime, nullable=False)
-    cluster_route = Column(JSON, nullable=False)
     cluster_status = Column(Enum(ClusterStatus), default=ClusterStatus.to_be_assigned, nullable=False)
     relaxed_constraints = Column(JSON, nullable=False)
 
@@ -29,3 +52,32 @@ class OrderCluster(Base):
         secondary="order_cluster_association",
         back_populates="clusters",
     )
+    route = relationship(
+        "ClusterRouteRecord",
+        uselist=False,
+        back_populates="cluster",
+        cascade="all, delete-orphan",
+    )
+
+
+class ClusterRouteRecord(Base):
+    """
+    Compact cluster route (see app.schemas.cluster.CompactClusterRoute).
+    Turn-by-turn steps are not stored: they are requested again to the route planner
+    when a driver asks for directions.
+    """
+
+    __tablename__ = "cluster_routes"
+
+    cluster_id = Column(String, ForeignKey("order_clusters.id"), primary_key=True)
+    id = Column(String, nullable=False)
+    distance = Column(Float, nullable=False)
+    duration = Column(Float, nullable=False)
+    order_ids = Column(JSON, nullable=False)  # visiting order
+    segment_distances = Column(JSON, nullable=False)
+    segment_durations = Column(JSON, nullable=False)
+    geometry = Column(Text, nullable=True)  # encoded polyline
+    # Computed by the approximate route planner, while the exact one was unavailable
+    approximate = Column(Boolean, nullable=False, default=False)
+
+    cluster = relationship("OrderCluster", back_populates="route")
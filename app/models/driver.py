@@ -8,9 +8,11 @@ from sqlalchemy import (
     DateTime,
     Enum,
     String,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.restaurant import Restaurant  # noqa: F401 (restaurants.id foreign key)
 import enum
 from datetime import datetime
 
@@ -23,6 +25,12 @@ class DriverStatus(str, enum.Enum):
 
 class Driver(Base):
     __tablename__ = "drivers"
+    __table_args__ = (
+        # Used by OrdersOptimizer.fetch_available_drivers_with_location
+        Index("ix_drivers_status_estimated_finish_time", "status", "estimated_finish_time"),
+        # Keyset pagination (see app/crud/pagination.py)
+        Index("ix_drivers_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -40,6 +48,9 @@ class Driver(Base):
 
     estimated_finish_time = Column(DateTime, nullable=True)
 
+    # NULL: default restaurant
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=True, index=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
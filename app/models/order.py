@@ -8,11 +8,14 @@ from sqlalchemy import (
     Float,
     Boolean,
     JSON,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 from app.models.cluster import order_cluster_association
+from app.models.restaurant import Restaurant  # noqa: F401 (restaurants.id foreign key)
 import enum
 
 
@@ -27,6 +30,23 @@ class OrderStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    # Partial indexes serving the dispatch queries, which only look at pending orders
+    # (see app/migrations/versions/v0001_dispatch_indexes.py)
+    __table_args__ = (
+        Index(
+            "ix_orders_pending_desired_delivery_time",
+            "desired_delivery_time",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_orders_pending_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, nullable=False)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -37,10 +57,14 @@ class Order(Base):
     lon = Column(Float, nullable=False)
     desired_delivery_time = Column(DateTime, nullable=False)
     items = Column(JSON, nullable=False)  # dict from OrderItems
-    status = Column(Enum(OrderStatus), default=OrderStatus.pending, nullable=False)
+    status = Column(
+        Enum(OrderStatus), default=OrderStatus.pending, nullable=False, index=True
+    )
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     estimated_prep_time = Column(Float, default=0.0)  # minutes
     priority = Column(Boolean, nullable=False, default=False)
+    # NULL: default restaurant
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=True, index=True)
 
     creator = relationship("User", backref="orders")
 
@@ -0,0 +1,26 @@
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, JSON, String
+from datetime import datetime
+from app.database import Base
+
+
+class Restaurant(Base):
+    """
+    A pizzeria: start location of its deliveries and kitchen settings.
+    Orders and drivers without a restaurant belong to the default one, configured
+    by ClusteringSettings and PizzaPreparationSettings.
+    """
+
+    __tablename__ = "restaurants"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    lat = Column(Float, nullable=False)
+    lon = Column(Float, nullable=False)
+    address = Column(String, nullable=False)
+    postal_code = Column(String, nullable=False)
+    city = Column(String, nullable=False)
+    country = Column(String, nullable=False, default="Italy")
+    # PizzaPreparationSettings fields overriding the defaults (CHEFS, NUM_OVENS, ...)
+    pizza_prep_settings = Column(JSON, nullable=False, default=dict)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
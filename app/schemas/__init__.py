@@ -1,2 +1,10 @@
-from .order import OrderCreate, OrderResponse, OrderOut
-from .user import UserLogin, Token
+from .order import (
+    OrderCreate,
+    OrderResponse,
+    OrderOut,
+    OrderBatchCreate,
+    OrderBatchItemResult,
+    OrderBatchResponse,
+)
+from .user import UserLogin, Token, UserPrincipal
+from .restaurant import RestaurantCreate, RestaurantOut
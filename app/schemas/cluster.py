@@ -1,6 +1,6 @@
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 import secrets
 import enum
 
@@ -33,10 +33,52 @@ class RouteSegment(BaseModel):
 
 
 class ClusterRoute(BaseModel):
-    id: str = Field(default_factory=lambda: secrets.token_hex(2))
+    id: str = Field(default_factory=lambda: secrets.token_hex(8))
     distance: float = Field(..., description="Total traveled distance in meters")
     duration: float = Field(..., description="Total travel time in seconds")
     segments: List[RouteSegment]
+    order_ids: List[int] = Field(
+        default_factory=list, description="Order ids sorted by visiting order"
+    )
+    geometry: Optional[str] = Field(
+        None, description="Encoded polyline of the whole route"
+    )
+    approximate: bool = Field(
+        False, description="Estimated by the fallback route planner, not by the exact one"
+    )
+
+
+class CompactClusterRoute(BaseModel):
+    """
+    Storage representation of a ClusterRoute: per-segment figures only, without
+    turn-by-turn steps and addresses, which are expanded again on demand.
+    """
+
+    id: str
+    distance: float = Field(..., description="Total traveled distance in meters")
+    duration: float = Field(..., description="Total travel time in seconds")
+    order_ids: List[int] = Field(..., description="Order ids sorted by visiting order")
+    segment_distances: List[float]
+    segment_durations: List[float]
+    geometry: Optional[str] = Field(
+        None, description="Encoded polyline of the whole route"
+    )
+    approximate: bool = False
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def from_cluster_route(cls, cluster_route: ClusterRoute) -> "CompactClusterRoute":
+        return cls(
+            id=cluster_route.id,
+            distance=cluster_route.distance,
+            duration=cluster_route.duration,
+            order_ids=cluster_route.order_ids,
+            segment_distances=[s.distance for s in cluster_route.segments],
+            segment_durations=[s.duration for s in cluster_route.segments],
+            geometry=cluster_route.geometry,
+            approximate=cluster_route.approximate,
+        )
 
 class ClusterStatus(str, enum.Enum):
     to_be_assigned = "to_be_assigned"
@@ -45,7 +87,7 @@ class ClusterStatus(str, enum.Enum):
     cancelled = "cancelled"
 
 class OrderCluster(BaseModel, frozen=False):
-    id: str = Field(default_factory=lambda: secrets.token_hex(2))
+    id: str = Field(default_factory=lambda: secrets.token_hex(8))
     time_window: datetime = Field(
         ..., description="Time window used to aggregate orders in clusters by time"
     )
@@ -69,6 +111,20 @@ class OrderCluster(BaseModel, frozen=False):
     def get_order_ids(self) -> List[int]:
         return [order.id for order in self.orders]
 
+    @property
+    def priority(self) -> bool:
+        """
+        Priority orders (VIP, compensation) are clustered apart: a cluster is all or nothing.
+        """
+        return any(order.priority for order in self.orders)
+
+    @property
+    def approximate(self) -> bool:
+        """
+        Routed by the fallback planner while the exact one was unavailable.
+        """
+        return self.cluster_route.approximate
+
 class OrderClusterUpdate(BaseModel):
     id: str
     time_window: Optional[datetime] = None
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, Any
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional, Any
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -19,6 +19,8 @@ class DriverBase(BaseModel):
     lon: Optional[float] = None
     current_route: Optional[Any] = None  # Could make this List[int] if only IDs
     estimated_finish_time: Optional[datetime] = None
+    # Default restaurant when None
+    restaurant_id: Optional[int] = None
 
 
 class DriverCreate(DriverBase):
@@ -40,3 +42,35 @@ class DriverOut(DriverBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# Upper bound on the number of pings accepted by POST /drivers/locations
+MAX_DRIVER_LOCATION_BATCH_SIZE = 1000
+
+
+class DriverLocationPing(BaseModel):
+    driver_id: int
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    # Device time of the fix; reception time when missing
+    recorded_at: Optional[datetime] = None
+
+    @field_validator("recorded_at")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored positions are compared with naive UTC times
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class DriverLocationBatch(BaseModel):
+    pings: List[DriverLocationPing] = Field(
+        ..., min_length=1, max_length=MAX_DRIVER_LOCATION_BATCH_SIZE
+    )
+
+
+class DriverLocationBatchResult(BaseModel):
+    accepted: int
+    # Pings older than the stored position of their driver
+    stale: int
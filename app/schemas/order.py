@@ -41,6 +41,8 @@ class OrderCreate(BaseModel):
     items: OrderItems
     estimated_prep_time: float
     desired_delivery_time: datetime
+    # Default restaurant when None
+    restaurant_id: Optional[int] = None
 
 
 class OrderResponse(BaseModel):
@@ -55,6 +57,7 @@ class OrderResponse(BaseModel):
     estimated_prep_time: float
     desired_delivery_time: datetime
     priority: bool = False
+    restaurant_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -67,3 +70,23 @@ class OrderOut(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# Upper bound on the number of orders accepted by POST /orders/batch
+MAX_ORDER_BATCH_SIZE = 1000
+
+
+class OrderBatchCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=MAX_ORDER_BATCH_SIZE)
+
+
+class OrderBatchItemResult(BaseModel):
+    index: int  # position of the order in the submitted batch
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBatchItemResult]
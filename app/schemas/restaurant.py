@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class RestaurantCreate(BaseModel):
+    name: str = Field(..., min_length=1, example="Bella Calda Navigli")
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    address: str = Field(..., example="Via Vigevano 18")
+    postal_code: str = Field(..., example="20144")
+    city: str = Field(..., example="Milan")
+    country: str = Field(default="Italy")
+    # Overrides of PizzaPreparationSettings (e.g. {"CHEFS": 3, "NUM_OVENS": 1})
+    pizza_prep_settings: Dict[str, Any] = Field(default_factory=dict)
+    is_active: bool = True
+
+
+class RestaurantOut(RestaurantCreate):
+    id: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
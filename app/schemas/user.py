@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, constr
-from typing import Literal
+from pydantic import BaseModel, ConfigDict, EmailStr, constr
+from typing import Literal, Optional
 
 
 class UserLogin(BaseModel):
@@ -17,3 +17,17 @@ class UserCreate(BaseModel):
     full_name: str
     password: constr(min_length=6)
     role: Literal["user", "staff", "admin", "driver"]
+
+
+class UserPrincipal(BaseModel):
+    """
+    Authenticated user, as resolved by get_current_user.
+    email and full_name are not available when built from trusted token claims.
+    """
+
+    id: int
+    role: Optional[str] = None
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,2 @@
+from .location_store import DriverLocation, DriverLocationStore, get_driver_location_store
+from .registry import DriverRegistry, get_driver_registry, is_dispatchable, rank_by_distance
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.config_logging import logger
+from app.models.driver import Driver
+
+
+@dataclass(frozen=True)
+class DriverLocation:
+    lat: float
+    lon: float
+    recorded_at: datetime
+
+
+class DriverLocationStore:
+    """
+    Latest reported position per driver, kept in memory.
+
+    Pings are coalesced: only the most recent position of a driver is kept, and pings older
+    than it are ignored. Positions changed since the last flush are written to
+    `drivers.lat`/`lon` by `flush` in a single bulk UPDATE. Positions older than
+    `max_age_seconds` are no longer served by `get`/`fresh_locations` (the database then
+    holds the last flushed one): `flush` evicts them once written, along with the pings of
+    unknown drivers, so memory follows the active drivers. Pings already older than
+    `max_age_seconds` are ignored, as the newer position they would overwrite may be evicted.
+    """
+
+    def __init__(
+        self,
+        max_age_seconds: float,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.max_age = timedelta(seconds=max_age_seconds)
+        self.clock = clock
+        self._locations: Dict[int, DriverLocation] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def record(
+        self, driver_id: int, lat: float, lon: float, recorded_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Store a ping; returns False when it is older than the stored position or than
+        `max_age_seconds`. Times ahead of the clock (e.g. a fast device clock) count as the
+        reception time, so that they neither lock out the next pings nor stay fresh forever.
+        """
+        now = self.clock()
+        if recorded_at is None or recorded_at > now:
+            recorded_at = now
+        if recorded_at < now - self.max_age:
+            return False
+        location = DriverLocation(lat=lat, lon=lon, recorded_at=recorded_at)
+        with self._lock:
+            current = self._locations.get(driver_id)
+            if current is not None and current.recorded_at > location.recorded_at:
+                return False
+            self._locations[driver_id] = location
+            self._dirty.add(driver_id)
+        return True
+
+    def discard(self, driver_id: int) -> None:
+        """
+        Forget a driver, e.g. when its location is written directly (PATCH /drivers/{id}).
+        """
+        with self._lock:
+            self._locations.pop(driver_id, None)
+            self._dirty.discard(driver_id)
+
+    def get(self, driver_id: int) -> Optional[DriverLocation]:
+        location = self._locations.get(driver_id)
+        if location is None or location.recorded_at < self.clock() - self.max_age:
+            return None
+        return location
+
+    def fresh_locations(self, driver_ids: Iterable[int]) -> Dict[int, DriverLocation]:
+        fresh = {}
+        for driver_id in driver_ids:
+            location = self.get(driver_id)
+            if location is not None:
+                fresh[driver_id] = location
+        return fresh
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    def _take_dirty(self) -> List[Tuple[int, DriverLocation]]:
+        with self._lock:
+            dirty = [(driver_id, self._locations[driver_id]) for driver_id in self._dirty]
+            self._dirty.clear()
+        return dirty
+
+    def _restore_dirty(self, rows: List[Tuple[int, DriverLocation]]) -> None:
+        with self._lock:
+            for driver_id, location in rows:
+                # Still the latest position: it has to be written by the next flush
+                if self._locations.get(driver_id) is location:
+                    self._dirty.add(driver_id)
+
+    def _evict(self, rows: List[Tuple[int, DriverLocation]]) -> None:
+        """
+        Forget the given positions unless newer pings replaced them, and the flushed
+        positions older than `max_age_seconds`.
+        """
+        expired_before = self.clock() - self.max_age
+        with self._lock:
+            for driver_id, location in rows:
+                if self._locations.get(driver_id) is location:
+                    del self._locations[driver_id]
+                    self._dirty.discard(driver_id)
+            expired = [
+                driver_id
+                for driver_id, location in self._locations.items()
+                if location.recorded_at < expired_before and driver_id not in self._dirty
+            ]
+            for driver_id in expired:
+                del self._locations[driver_id]
+
+    def flush(self, db: Session) -> int:
+        """
+        Write the positions changed since the last flush; returns the number of drivers written.
+        Positions of drivers that do not exist are dropped.
+        """
+        rows = self._take_dirty()
+        if not rows:
+            self._evict([])
+            return 0
+        statement = (
+            update(Driver.__table__)
+            .where(Driver.__table__.c.id == bindparam("driver_id"))
+            .values(lat=bindparam("lat"), lon=bindparam("lon"))
+        )
+        try:
+            known = set(
+                db.scalars(select(Driver.id).where(Driver.id.in_([i for i, _ in rows])))
+            )
+            written = [(driver_id, location) for driver_id, location in rows if driver_id in known]
+            if written:
+                db.execute(
+                    statement,
+                    [
+                        {"driver_id": driver_id, "lat": location.lat, "lon": location.lon}
+                        for driver_id, location in written
+                    ],
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore_dirty(rows)
+            raise
+        self._evict([(driver_id, location) for driver_id, location in rows if driver_id not in known])
+        return len(written)
+
+    async def run_flusher(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """
+        Flush every `interval` seconds until cancelled, then flush a last time.
+        """
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await asyncio.to_thread(self._flush_logged, session_factory)
+        finally:
+            await asyncio.to_thread(self._flush_logged, session_factory)
+
+    def _flush_logged(self, session_factory: Callable[[], Session]) -> None:
+        start = time.perf_counter()
+        db = session_factory()
+        try:
+            written = self.flush(db)
+        except Exception:
+            logger.exception("Driver locations flush failed (%d pending)", self.pending)
+            return
+        finally:
+            db.close()
+        if written:
+            logger.debug(
+                "Flushed %d driver locations in %.1f ms",
+                written,
+                (time.perf_counter() - start) * 1000,
+            )
+
+
+@lru_cache
+def get_driver_location_store() -> DriverLocationStore:
+    return DriverLocationStore(max_age_seconds=settings.DRIVER_LOCATION_MAX_AGE_SECONDS)
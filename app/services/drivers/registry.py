@@ -0,0 +1,310 @@
+import math
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.driver import Driver, DriverStatus
+from app.schemas.driver import DriverOut
+from app.services.route_planner.geometry import KM_PER_DEGREE_LAT, haversine_matrix
+
+Cell = Tuple[int, int]
+# Snapshots of the drivers changed by a session, applied to the registry on commit
+_PENDING_KEY = "driver_registry_pending"
+
+
+def is_dispatchable(driver, now: datetime, eta_threshold_minutes: int) -> bool:
+    """
+    Same rule as OrdersOptimizer.available_drivers_query: available, or delivering and
+    finishing within the threshold, with a known location.
+    """
+    if driver.lat is None or driver.lon is None:
+        return False
+    if driver.status == DriverStatus.AVAILABLE:
+        return True
+    return (
+        driver.status == DriverStatus.DELIVERING
+        and driver.estimated_finish_time is not None
+        and driver.estimated_finish_time <= now + timedelta(minutes=eta_threshold_minutes)
+    )
+
+
+def rank_by_distance(
+    drivers: Sequence,
+    lat: float,
+    lon: float,
+    k: Optional[int] = None,
+    radius_km: Optional[float] = None,
+) -> List[Tuple[object, float]]:
+    """
+    (driver, distance in km) sorted by distance, within `radius_km`, at most `k`.
+    """
+    if not drivers:
+        return []
+    distances = haversine_matrix([(lon, lat)], [(d.lon, d.lat) for d in drivers])[0] / 1000
+    ranked = sorted(zip(drivers, distances.tolist()), key=lambda pair: pair[1])
+    if radius_km is not None:
+        ranked = [pair for pair in ranked if pair[1] <= radius_km]
+    return ranked[:k] if k is not None else ranked
+
+
+class DriverRegistry:
+    """
+    In-memory driver snapshots (DriverOut) indexed by a uniform grid of `cell_km` cells.
+
+    `load` fills it from the database; it is then kept in sync by the session events below
+    (ORM inserts, updates, deletes, applied on commit), by `set_status` for bulk status
+    updates and by `update_location` for buffered GPS pings. Queries do not touch the database:
+    `nearest` and `within_radius` only visit the grid cells around the query point.
+    Each process has its own registry: with several workers, only writes made by the same
+    process are seen.
+    """
+
+    def __init__(self, cell_km: float = 1.0, reference_lat: float = 45.0):
+        self.cell_km = cell_km
+        self.cell_lat = cell_km / KM_PER_DEGREE_LAT
+        self.cell_lon = self.cell_lat / math.cos(math.radians(reference_lat))
+        self.loaded = False
+        self._drivers: Dict[int, DriverOut] = {}
+        self._cells: Dict[Cell, Set[int]] = {}
+        self._cell_of: Dict[int, Cell] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def cell(self, lat: float, lon: float) -> Cell:
+        return (math.floor(lat / self.cell_lat), math.floor(lon / self.cell_lon))
+
+    # Writes
+
+    def load(self, drivers: Iterable) -> None:
+        with self._lock:
+            self.clear()
+            for driver in drivers:
+                self._put(DriverOut.model_validate(driver))
+            self.loaded = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._drivers.clear()
+            self._cells.clear()
+            self._cell_of.clear()
+            self.loaded = False
+
+    def upsert(self, driver) -> None:
+        snapshot = driver if isinstance(driver, DriverOut) else DriverOut.model_validate(driver)
+        with self._lock:
+            self._put(snapshot)
+
+    def remove(self, driver_id: int) -> None:
+        with self._lock:
+            self._drivers.pop(driver_id, None)
+            self._unindex(driver_id)
+
+    def update_location(self, driver_id: int, lat: float, lon: float) -> None:
+        with self._lock:
+            snapshot = self._drivers.get(driver_id)
+            if snapshot is not None:
+                self._put(snapshot.model_copy(update={"lat": lat, "lon": lon}))
+
+    def set_status(
+        self,
+        driver_ids: Iterable[int],
+        status: DriverStatus,
+        estimated_finish_time: Optional[datetime] = None,
+    ) -> None:
+        update = {"status": status}
+        if estimated_finish_time is not None:
+            update["estimated_finish_time"] = estimated_finish_time
+        with self._lock:
+            for driver_id in driver_ids:
+                snapshot = self._drivers.get(driver_id)
+                if snapshot is not None:
+                    self._drivers[driver_id] = snapshot.model_copy(update=update)
+
+    def _put(self, snapshot: DriverOut) -> None:
+        self._drivers[snapshot.id] = snapshot
+        cell = (
+            self.cell(snapshot.lat, snapshot.lon)
+            if snapshot.lat is not None and snapshot.lon is not None
+            else None
+        )
+        if self._cell_of.get(snapshot.id) == cell:
+            return
+        self._unindex(snapshot.id)
+        if cell is not None:
+            self._cells.setdefault(cell, set()).add(snapshot.id)
+            self._cell_of[snapshot.id] = cell
+
+    def _unindex(self, driver_id: int) -> None:
+        cell = self._cell_of.pop(driver_id, None)
+        if cell is not None:
+            members = self._cells[cell]
+            members.discard(driver_id)
+            if not members:
+                del self._cells[cell]
+
+    # Reads
+
+    def get(self, driver_id: int) -> Optional[DriverOut]:
+        return self._drivers.get(driver_id)
+
+    def available(self, now: datetime, eta_threshold_minutes: int) -> List[DriverOut]:
+        with self._lock:
+            drivers = list(self._drivers.values())
+        return [d for d in drivers if is_dispatchable(d, now, eta_threshold_minutes)]
+
+    def within_radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        now: datetime,
+        eta_threshold_minutes: int,
+    ) -> List[Tuple[DriverOut, float]]:
+        """
+        Dispatchable drivers within `radius_km` of (lat, lon), with their distance in km,
+        nearest first.
+        """
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lon_span = lat_span / max(math.cos(math.radians(lat)), 1e-6)
+        min_i, min_j = self.cell(lat - lat_span, lon - lon_span)
+        max_i, max_j = self.cell(lat + lat_span, lon + lon_span)
+        with self._lock:
+            candidates = [
+                self._drivers[driver_id]
+                for i in range(min_i, max_i + 1)
+                for j in range(min_j, max_j + 1)
+                for driver_id in self._cells.get((i, j), ())
+            ]
+        candidates = [d for d in candidates if is_dispatchable(d, now, eta_threshold_minutes)]
+        return rank_by_distance(candidates, lat, lon, radius_km=radius_km)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        now: datetime,
+        eta_threshold_minutes: int,
+        max_radius_km: Optional[float] = None,
+    ) -> List[Tuple[DriverOut, float]]:
+        """
+        The `k` dispatchable drivers nearest to (lat, lon), with their distance in km.
+        Visits rings of cells around the query cell until the k-th distance found is
+        closer than any unvisited cell. Once the rings cover more cells than are occupied
+        (fewer than k drivers, or far away ones), ranks every dispatchable driver instead.
+        """
+        if k <= 0:
+            return []
+        center_i, center_j = self.cell(lat, lon)
+        # Smallest cell side (km) at this latitude: lower bound of the distance to ring r+1
+        lon_cell_km = self.cell_lon * KM_PER_DEGREE_LAT * math.cos(math.radians(lat))
+        min_side_km = min(self.cell_km, lon_cell_km)
+        found: List[Tuple[DriverOut, float]] = []
+        with self._lock:
+            if not self._cells:
+                return []
+            rows = [i for i, _ in self._cells]
+            cols = [j for _, j in self._cells]
+            max_ring = max(
+                abs(center_i - min(rows)), abs(center_i - max(rows)),
+                abs(center_j - min(cols)), abs(center_j - max(cols)),
+            )
+            occupied = len(self._cells)
+            for ring in range(max_ring + 1):
+                # Rings 0..ring hold (2 * ring + 1)^2 cells
+                if (2 * ring + 1) ** 2 > occupied:
+                    found = self._rank_dispatchable(lat, lon, now, eta_threshold_minutes)
+                    break
+                ring_drivers = [
+                    self._drivers[driver_id]
+                    for cell in _ring_cells(center_i, center_j, ring)
+                    for driver_id in self._cells.get(cell, ())
+                ]
+                ring_drivers = [
+                    d for d in ring_drivers if is_dispatchable(d, now, eta_threshold_minutes)
+                ]
+                found = sorted(
+                    found + rank_by_distance(ring_drivers, lat, lon), key=lambda pair: pair[1]
+                )
+                # Unvisited cells are at least `ring * min_side_km` away
+                reach_km = ring * min_side_km
+                if len(found) >= k and found[k - 1][1] <= reach_km:
+                    break
+                if max_radius_km is not None and reach_km > max_radius_km:
+                    break
+        if max_radius_km is not None:
+            found = [pair for pair in found if pair[1] <= max_radius_km]
+        return found[:k]
+
+    def _rank_dispatchable(
+        self, lat: float, lon: float, now: datetime, eta_threshold_minutes: int
+    ) -> List[Tuple[DriverOut, float]]:
+        drivers = [
+            self._drivers[driver_id]
+            for members in self._cells.values()
+            for driver_id in members
+        ]
+        drivers = [d for d in drivers if is_dispatchable(d, now, eta_threshold_minutes)]
+        return rank_by_distance(drivers, lat, lon)
+
+
+def _ring_cells(center_i: int, center_j: int, ring: int) -> List[Cell]:
+    if ring == 0:
+        return [(center_i, center_j)]
+    cells = []
+    for dj in range(-ring, ring + 1):
+        cells.append((center_i - ring, center_j + dj))
+        cells.append((center_i + ring, center_j + dj))
+    for di in range(-ring + 1, ring):
+        cells.append((center_i + di, center_j - ring))
+        cells.append((center_i + di, center_j + ring))
+    return cells
+
+
+@lru_cache
+def get_driver_registry() -> DriverRegistry:
+    return DriverRegistry(cell_km=settings.DRIVER_REGISTRY_CELL_KM)
+
+
+# Sync with ORM writes. Snapshots are taken at flush (attributes are still loaded) and
+# applied on commit, so rolled back changes never reach the registry.
+# NOTE: bulk query updates bypass these events (see crud.update_driver_status)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_driver_changes(session, flush_context) -> None:
+    registry = get_driver_registry()
+    if not registry.loaded:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Driver):
+            pending[obj.id] = DriverOut.model_validate(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Driver):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_driver_changes(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    registry = get_driver_registry()
+    for driver_id, snapshot in pending.items():
+        if snapshot is None:
+            registry.remove(driver_id)
+        else:
+            registry.upsert(snapshot)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_driver_changes(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1 +1,14 @@
-from .orders_optimizer import OrdersOptimizer
+from .orders_optimizer import ALL_RESTAURANTS, OrdersOptimizer
+from .preview_cache import ClusterPreviewCache
+from .run_profiler import RunProfiler
+from .warm_start import WarmStartState
+from .partitioned import (
+    DispatchPartition,
+    dispatch_partitions,
+    get_dispatch_executor,
+    orders_partition,
+    partition_optimizer,
+    run_partitions,
+    shutdown_dispatch_executor,
+    summarize_chained_trips,
+)
@@ -1,8 +1,12 @@
+import json
 import secrets
 
-from sqlalchemy.orm import Session
-from typing import Any, Dict, List, Optional, Tuple, Callable
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Callable, Union
 from collections import defaultdict
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from logging import Logger
 
@@ -12,16 +16,43 @@ from sklearn.cluster import AgglomerativeClustering
 from scipy.optimize import linear_sum_assignment
 import numpy as np
 
-from app.config import ClusteringSettings, PizzaPreparationSettings
-from app.crud.cluster import create_cluster, update_cluster_status
-from app.crud.driver import update_driver_status
+from app.config import ClusteringSettings, PizzaPreparationSettings, ProfilingSettings
+from app.crud.cluster import create_clusters, update_cluster_status
+from app.crud.driver import update_driver_finish_times, update_driver_status
 from app.crud.order import update_order_status
+from app.metrics import OPTIMIZER_STAGE_DURATION
 from app.models.driver import Driver, DriverStatus
 from app.models.order import Order
-from app.schemas.cluster import ClusterRoute, ClusterStatus, OrderCluster, DeliveryStep, RouteSegment
+from app.schemas.cluster import (
+    ClusterRoute,
+    ClusterStatus,
+    CompactClusterRoute,
+    OrderCluster,
+    DeliveryStep,
+    RouteSegment,
+)
 from app.schemas.order import DeliveryAddress, OrderResponse
+from app.schemas.driver import DriverOut
+from app.services.drivers import DriverLocationStore, DriverRegistry, rank_by_distance
 from app.services.route_planner.base import RoutePlannerService
-
+from app.services.route_planner.resilient import APPROXIMATE_KEY, ResilientRoutePlanner
+from .run_profiler import (
+    RunProfiler,
+    profile_stage,
+    record_matrix,
+    record_route_planner_call,
+)
+from .sparse_clustering import (
+    UNREACHABLE_DISTANCE,
+    SparseDistances,
+    partition_grid,
+    windows,
+)
+from .warm_start import WarmStartState
+
+
+# restaurant_id of an optimizer that dispatches every order and driver, whatever the restaurant
+ALL_RESTAURANTS = object()
 
 RelaxationStrategy = Callable[
     [Dict[str, Any], int],
@@ -33,6 +64,10 @@ class OrdersOptimizer:
 
     DEFAULT_CONSTRAINTS: Dict[str, Any] = {"max_hotness": 20, "lateness_tol": 10}
     DEFAULT_WEIGHTS: Dict[str, float] = {"wait_time": 0.2, "max_lateness": 0.5, "route_duration": 0.3}
+    # Priority clusters: tighter constraints, and lateness weighs more in the cost
+    PRIORITY_CONSTRAINTS: Dict[str, Any] = {"max_hotness": 15, "lateness_tol": 5}
+    PRIORITY_WEIGHTS: Dict[str, float] = {"wait_time": 0.2, "max_lateness": 1.5, "route_duration": 0.3}
+    PREP_CYCLE_SECONDS = 120
 
     def __init__(
         self,
@@ -41,86 +76,167 @@ class OrdersOptimizer:
         clustering_settings: ClusteringSettings,
         pizza_prep_settings: PizzaPreparationSettings,
         logger: Logger,
+        profiling_settings: Optional[ProfilingSettings] = None,
+        location_store: Optional[DriverLocationStore] = None,
+        driver_registry: Optional[DriverRegistry] = None,
+        restaurant_id: Any = ALL_RESTAURANTS,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        relaxation_strategies: Optional[List[RelaxationStrategy]] = None,
+        warm_start: Optional[WarmStartState] = None,
     ):
         self.db = db
         self.route_planner = route_planner
         self.clustering_settings = clustering_settings
         self.pizza_prep_settings = pizza_prep_settings
         self.logger = logger
+        self.profiling_settings = profiling_settings
+        self.location_store = location_store
+        self.driver_registry = driver_registry
+        # None: orders and drivers of the default restaurant (restaurant_id IS NULL)
+        self.restaurant_id = restaurant_id
+        # "Now" of the run: simulations replay an evening on a simulated clock
+        self.clock = clock
+        self.relaxation_strategies = (
+            relaxation_strategies
+            if relaxation_strategies is not None
+            else [self.relax_hotness, self.relax_lateness]
+        )
+        # Clusters deferred by the previous run, reused while their orders are unchanged
+        self.warm_start = warm_start
 
-    def _default_profile(self) -> Dict[str, Any]:
-        # profile structure: constraints + weights + log
+    def _default_profile(self, priority: bool = False) -> Dict[str, Any]:
+        # profile structure: constraints + weights + log, and the constraints relaxation starts from
+        constraints = self.PRIORITY_CONSTRAINTS if priority else self.DEFAULT_CONSTRAINTS
         return {
-            "constraints": dict(self.DEFAULT_CONSTRAINTS),
-            "weights": dict(self.DEFAULT_WEIGHTS),
+            "constraints": dict(constraints),
+            "weights": dict(self.PRIORITY_WEIGHTS if priority else self.DEFAULT_WEIGHTS),
+            "base": dict(constraints),
             "log": [],
         }
 
-    async def run(self):
+    async def run(self, capture_cprofile: bool = False):
+        """
+        Cluster pending orders and assign them to drivers.
+        The result includes the run profile (see RunProfiler), which is also logged.
+        A cProfile dump is written when requested or enabled in the profiling settings.
+        With a ResilientRoutePlanner, the route planner calls of the run share its budget.
+        """
+        cprofile_dir = None
+        if self.profiling_settings and (
+            capture_cprofile or self.profiling_settings.CPROFILE_OPTIMIZER_RUNS
+        ):
+            cprofile_dir = self.profiling_settings.CPROFILE_OUTPUT_DIR
+        # Route planner calls share a time budget: past it, they fall back to approximations
+        budget = (
+            self.route_planner.budget()
+            if isinstance(self.route_planner, ResilientRoutePlanner)
+            else nullcontext()
+        )
+        with RunProfiler(db=self.db, cprofile_dir=cprofile_dir) as profiler, budget:
+            out = await self._run()
+        profile = profiler.report()
+        self.logger.info("Optimizer run profile: %s", json.dumps(profile))
+        # Stage durations are accumulated over the run (e.g. all directions calls)
+        OPTIMIZER_STAGE_DURATION.labels("total").observe(profile["wall_s"])
+        for stage, stats in profile["stages"].items():
+            OPTIMIZER_STAGE_DURATION.labels(stage).observe(stats["wall_s"])
+        out["profile"] = profile
+        return out
+
+    def warm_start_key(self) -> Tuple:
+        # Deferred clusters are only valid for the settings that built them
+        settings = self.clustering_settings
+        return (
+            self.restaurant_id if self.restaurant_id is not ALL_RESTAURANTS else "all",
+            settings.START_LOCATION_LAT,
+            settings.START_LOCATION_LON,
+            settings.MAX_PIZZAS_PER_CLUSTER,
+            settings.CLUSTER_DISTANCE_THRESHOLD,
+            settings.LARGE_BUCKET_SIZE,
+            settings.LARGE_BUCKET_CELL_KM,
+            getattr(self.route_planner, "metric", None),
+        )
+
+    async def _run(self):
+        if self.warm_start is not None:
+            self.warm_start.begin_run(self.warm_start_key())
+
         # 1) Prepare inputs
-        ready_orders = self.fetch_unassigned_orders()
-        filtered_orders = self.filter_out_unavailable_orders(ready_orders)
+        with profile_stage("fetch_orders"):
+            ready_orders = self.fetch_unassigned_orders()
+            filtered_orders = self.filter_out_unavailable_orders(ready_orders)
         self.logger.info(
-            f"Fetched {len(ready_orders)} orders, {len(filtered_orders)} after filtering."
+            "Fetched %d orders, %d after filtering.", len(ready_orders), len(filtered_orders)
         )
 
-        clustered_orders = await self.compute_clustered_orders(
-            filtered_orders=filtered_orders
-        )
-        clusters = sorted(clustered_orders, key=lambda x: x.earliest_delivery_time)
-        for c in clusters:
-            create_cluster(db=self.db, order_cluster=c)
-        drivers = self.fetch_available_drivers_with_location(
-            eta_threshold_minutes=self.clustering_settings.ETA_THRESHOLD_MINUTES
-        )
+        with profile_stage("cluster_orders"):
+            clustered_orders = await self.compute_clustered_orders(
+                filtered_orders=filtered_orders, warm_start=self.warm_start
+            )
+        # Priority clusters first: the kitchen prepares assigned clusters in this order
+        clusters = sorted(clustered_orders, key=self.kitchen_order)
+        # Reused clusters were persisted by the run that built them
+        new_clusters = [
+            c for c in clusters if self.warm_start is None or c.id not in self.warm_start.reused
+        ]
+        with profile_stage("persist_clusters"):
+            if new_clusters:
+                create_clusters(db=self.db, order_clusters=new_clusters)
+        with profile_stage("fetch_drivers"):
+            drivers = self.fetch_available_drivers_with_location(
+                eta_threshold_minutes=self.clustering_settings.ETA_THRESHOLD_MINUTES
+            )
         self.logger.info(
-            f"Total Clusters: {len(clusters)} | Available Drivers: {len(drivers)}"
+            "Total Clusters: %d | Available Drivers: %d", len(clusters), len(drivers)
         )
 
         # ---- First strict assignment (no relaxation) ----
-        first_pass = self.try_assign_cluster(clusters=clusters, drivers=drivers)
+        with profile_stage("assignment"):
+            first_pass = self.try_assign_cluster(clusters=clusters, drivers=drivers)
         driver_to_cluster = first_pass["driver_to_cluster"]
         unassigned_clusters = first_pass["unassigned_clusters"]
 
         # ---- Apply DB updates for first pass ----
-        order_idxs_to_update = [
-            order_ids
-            for v in driver_to_cluster.values()
-            for order_ids in v["cluster"].get_order_ids
-        ]
-        if order_idxs_to_update:
-            # Update orders status
-            self.logger.info("Updating orders status ...")
-            update_order_status(db=self.db, order_ids=order_idxs_to_update)
-
-        cluster_idxs_to_update = [v["cluster"].id for v in driver_to_cluster.values()]
-        if cluster_idxs_to_update:
-            # Updating cluster's status
-            self.logger.info("Updating clusters status ...")
-            update_cluster_status(db=self.db, order_cluster_ids=cluster_idxs_to_update)
-        
-        assigned_driver_ids = list(driver_to_cluster)
-        if assigned_driver_ids:
-            # Marking drivers as delivering
-            self.logger.info(" Marking drivers as delivering ...")
-            update_driver_status(db=self.db, driver_ids=assigned_driver_ids)
+        with profile_stage("persist_assignment"):
+            order_idxs_to_update = [
+                order_ids
+                for v in driver_to_cluster.values()
+                for order_ids in v["cluster"].get_order_ids
+            ]
+            if order_idxs_to_update:
+                # Update orders status
+                self.logger.info("Updating orders status ...")
+                update_order_status(db=self.db, order_ids=order_idxs_to_update)
+
+            cluster_idxs_to_update = [v["cluster"].id for v in driver_to_cluster.values()]
+            if cluster_idxs_to_update:
+                # Updating cluster's status
+                self.logger.info("Updating clusters status ...")
+                update_cluster_status(db=self.db, order_cluster_ids=cluster_idxs_to_update)
+
+            assigned_driver_ids = list(driver_to_cluster)
+            if assigned_driver_ids:
+                # Marking drivers as delivering
+                self.logger.info(" Marking drivers as delivering ...")
+                update_driver_status(db=self.db, driver_ids=assigned_driver_ids)
 
         # ---- Relaxation phase only on unassigned clusters, with remaining drivers ----
-        self.logger.info(f"{unassigned_clusters.keys()=}")
-        relaxed, still_unassigned = self.relax_unassigned_batch(
-            unassigned_clusters=unassigned_clusters,
-            drivers=[d for d in drivers if d.id not in driver_to_cluster],  # remaining drivers
-            strategies=[self.relax_hotness, self.relax_lateness],
-            max_rounds=100,
-        )
-        self.logger.info(f"{relaxed=}")
+        self.logger.debug("Unassigned clusters: %s", list(unassigned_clusters))
+        with profile_stage("relaxation"):
+            relaxed, still_unassigned = self.relax_unassigned_batch(
+                unassigned_clusters=unassigned_clusters,
+                drivers=[d for d in drivers if d.id not in driver_to_cluster],  # remaining drivers
+                strategies=self.relaxation_strategies,
+                max_rounds=100,
+            )
+        self.logger.debug("Relaxed assignments: %s", relaxed)
 
         # ---- Apply incremental DB updates for newly assigned from relaxation ----
         if relaxed:
             order_ids_relaxed = [
                 order_id
                 for v in relaxed.values()
-                for order_id in v["cluster"].get_order_ids()
+                for order_id in v["cluster"].get_order_ids
             ]
             if order_ids_relaxed:
                 update_order_status(db=self.db, order_ids=order_ids_relaxed)
@@ -132,13 +248,74 @@ class OrdersOptimizer:
         
         # Merge final mapping & return
         driver_to_cluster.update(relaxed)
+
+        # ---- Further trips for the assigned drivers, within the horizon ----
+        chained_trips: Dict[int, List[Dict[str, Any]]] = {}
+        horizon_minutes = self.clustering_settings.MULTI_TRIP_HORIZON_MINUTES
+        if horizon_minutes > 0 and still_unassigned and driver_to_cluster:
+            with profile_stage("chaining"):
+                chained_trips, still_unassigned = self.chain_trips(
+                    unassigned_clusters=still_unassigned,
+                    assignments=driver_to_cluster,
+                    drivers=drivers,
+                    horizon_minutes=horizon_minutes,
+                )
+            chained_clusters = [trip["cluster"] for trips in chained_trips.values() for trip in trips]
+            if chained_clusters:
+                self.logger.info("Chained %d clusters to returning drivers", len(chained_clusters))
+                update_order_status(
+                    db=self.db,
+                    order_ids=[order_id for c in chained_clusters for order_id in c.get_order_ids],
+                )
+                update_cluster_status(db=self.db, order_cluster_ids=[c.id for c in chained_clusters])
+                # Busy until the last trip: not a candidate again in between
+                update_driver_finish_times(
+                    db=self.db,
+                    finish_times={
+                        driver_id: trips[-1]["return_time"]
+                        for driver_id, trips in chained_trips.items()
+                    },
+                )
+        if self.warm_start is not None:
+            # Approximate routes are computed again, hopefully by the exact planner
+            self.warm_start.remember(
+                [v["cluster"] for v in still_unassigned.values() if not v["cluster"].approximate]
+            )
+            self.logger.info(
+                "Warm start: reused %d clusters, re-clustered %d orders, kept %d for the next run",
+                len(self.warm_start.reused),
+                self.warm_start.reclustered_orders,
+                len(self.warm_start),
+            )
         return {
             "driver_to_cluster": driver_to_cluster,
+            "chained_trips": chained_trips,
             "unassigned_clusters": still_unassigned,
+            # Clusters routed by the fallback planner
+            "approximate_clusters": [c.id for c in clusters if c.approximate],
+            # Order in which the kitchen should prepare the assigned clusters
+            "kitchen_sequence": [
+                v["cluster"].id
+                for v in sorted(driver_to_cluster.values(), key=lambda v: self.kitchen_order(v["cluster"]))
+            ],
         }
     
     def try_assign_cluster(self, clusters: List[OrderCluster], drivers: List[Driver], cluster_profiles: Optional[Dict[str, Dict[str, Any]]] = None,) -> Dict[str, Dict]:
-        current_time = datetime.utcnow()
+        # Priority clusters are matched first: other clusters only get the drivers left
+        priority_clusters = [c for c in clusters if c.priority]
+        if priority_clusters and len(priority_clusters) < len(clusters):
+            first = self.try_assign_cluster(priority_clusters, drivers, cluster_profiles)
+            rest = self.try_assign_cluster(
+                [c for c in clusters if not c.priority],
+                [d for d in drivers if d.id not in first["driver_to_cluster"]],
+                cluster_profiles,
+            )
+            return {
+                "driver_to_cluster": {**first["driver_to_cluster"], **rest["driver_to_cluster"]},
+                "unassigned_clusters": {**first["unassigned_clusters"], **rest["unassigned_clusters"]},
+            }
+
+        current_time = self.clock()
         D, C = len(drivers), len(clusters)
         # No clusters -> nothing to do
         if C == 0:
@@ -157,65 +334,60 @@ class OrdersOptimizer:
             }
 
         # 2) Build rectangular cost matrix with NaNs for infeasible pairs
+        record_matrix("assignment_cost", (D, C))
         costs = np.full((D, C), np.nan, dtype=float)
         motivations = {}  # (driver_id, cluster_id) -> reason/feasible
 
         for j, cluster in enumerate(clusters):
-            prof = (cluster_profiles or {}).get(cluster.id, self._default_profile())
+            prof = (cluster_profiles or {}).get(cluster.id) or self._default_profile(cluster.priority)
             constraints = prof["constraints"]
             weights = prof["weights"]
 
-            latest_prep_time = self.estimate_latest_pizza_ready_time(
-                total_pizzas=cluster.total_items,
-                chefs=self.pizza_prep_settings.CHEFS,
-                chef_experience=self.pizza_prep_settings.CHEF_EXPERIENCE,
-                chef_capacity=self.pizza_prep_settings.CHEF_CAPACITY,
-                bake_times=self.pizza_prep_settings.BAKE_TIMES,
-                num_ovens=self.pizza_prep_settings.NUM_OVENS,
-                single_oven_capacity=self.pizza_prep_settings.SINGLE_OVEN_CAPACITY,
-                pizza_type=self.pizza_prep_settings.PIZZA_TYPE,
-                now=current_time,
+            dispatch_ready_time = self.cluster_ready_time(cluster, current_time)
+
+            # TODO: time_for_payment should be a parameter
+            # Delivery times and feasibility depend on the cluster only: the route starts
+            # from the restaurant once the pizzas are ready
+            delivery_estimates = self.simulate_delivery_times(
+                cluster=cluster,
+                dispatch_ready_time=dispatch_ready_time,
+                time_for_payment=timedelta(seconds=120),
             )
-            dispatch_ready_time = max(current_time, latest_prep_time)
+
+            # ---- Feasibility checks (hard constraints) ----
+            max_hotness = constraints["max_hotness"]
+            lateness_tol = constraints["lateness_tol"]
+
+            # Hotness constraint: 20 minutes max from bake/dispatch to drop
+            violates_hotness = any(
+                est["delivery_time"] - dispatch_ready_time > timedelta(minutes=max_hotness)
+                for est in delivery_estimates.values()
+            )
+            # Lateness check
+            violates_lateness = any(
+                est["delivery_time"] - cluster.earliest_delivery_time > timedelta(minutes=lateness_tol)
+                for est in delivery_estimates.values()
+            )
+            if violates_hotness or violates_lateness:
+                reason = (
+                    "Hotness constraint not met"
+                    if violates_hotness
+                    else f"Lateness > {lateness_tol} mins"
+                )
+                for driver in drivers:
+                    motivations[(driver.id, cluster.id)] = reason
+                # leave the column as NaN (infeasible)
+                continue
 
             for i, driver in enumerate(drivers):
+                # Drivers still delivering are ready once they finish their current route
                 driver_ready_time = (
-                    current_time - driver.estimated_finish_time
+                    max(current_time, driver.estimated_finish_time)
                     if getattr(driver, "estimated_finish_time", None)
                     else current_time
                 )
                 wait_time = max(timedelta(0), dispatch_ready_time - driver_ready_time)
 
-                # TODO: time_for_payment should be a parameter
-                delivery_estimates = self.simulate_delivery_times(
-                    cluster=cluster,
-                    dispatch_ready_time=dispatch_ready_time,
-                    time_for_payment=timedelta(seconds=120),
-                )
-
-                # ---- Feasibility checks (hard constraints) ----
-                max_hotness = constraints["max_hotness"]
-                lateness_tol = constraints["lateness_tol"]
-
-                # Hotness constraint: 20 minutes max from bake/dispatch to drop
-                violates_hotness = any(
-                    est["delivery_time"] - dispatch_ready_time > timedelta(minutes=max_hotness)
-                    for est in delivery_estimates.values()
-                )
-                # Lateness check
-                violates_lateness = any(
-                    est["delivery_time"] - cluster.earliest_delivery_time > timedelta(minutes=lateness_tol)
-                    for est in delivery_estimates.values()
-                )
-                if violates_hotness:
-                    motivations[(driver.id, cluster.id)] = "Hotness constraint not met"
-                    # leave as NaN (infeasible)
-                    continue
-                if violates_lateness:
-                    motivations[(driver.id, cluster.id)] = f"Lateness > {lateness_tol} mins"
-                    continue
-
-
                 # Compute finite cost
                 cost = self.compute_assignment_cost(
                     wait_time=wait_time,
@@ -228,6 +400,9 @@ class OrdersOptimizer:
                 costs[i, j] = float(cost)
                 motivations[(driver.id, cluster.id)] = "Feasible"
 
+            if self.warm_start is not None:
+                self.apply_switching_penalty(costs[:, j], cluster, drivers)
+
         # 3) Replace NaNs with a large finite penalty (Big-M), solve assignment
         #    Big-M must dominate any real cost. Derive from observed finite costs.
         finite_vals = costs[np.isfinite(costs)]
@@ -268,33 +443,75 @@ class OrdersOptimizer:
                         (driver.id, cluster.id), "No feasible driver"
                     )
                 }
-                self.logger.info(
-                    f"Defer Cluster {cluster.id} (infeasible for all drivers)."
-                )
+                self.logger.debug("Defer Cluster %s (infeasible for all drivers).", cluster.id)
             else:
-                assign_prof = (cluster_profiles or {}).get(cluster.id, self._default_profile())
+                assign_prof = (cluster_profiles or {}).get(cluster.id) or self._default_profile(cluster.priority)
                 driver_to_cluster[driver.id] = {
                     "cluster": cluster,
                     "cost": float(cost_ij),
                     "relaxation_log": assign_prof.get("log", []),
                 }
                 assigned_cluster_idx.add(j)
-                self.logger.info(
-                    f"Assign Driver: {driver.full_name} -> Cluster: {cluster.id} | "
-                    f"Cost: {cost_ij:.2f} | Relaxations: {assign_prof.get('log') or 'none'}"
+                self.logger.debug(
+                    "Assign Driver: %s -> Cluster: %s | Cost: %.2f | Relaxations: %s",
+                    driver.full_name,
+                    cluster.id,
+                    cost_ij,
+                    assign_prof.get("log") or "none",
                 )
 
         # 5) Any cluster not selected at all (when D < C) is unassigned
         for j, cluster in enumerate(clusters):
             if j not in assigned_cluster_idx and cluster.id not in unassigned_clusters:
                 unassigned_clusters[cluster.id] = {"cluster": cluster, "motivations": "No driver available"}
-                self.logger.info(f"Cluster {cluster.id} deferred (not enough drivers).")
+                self.logger.debug("Cluster %s deferred (not enough drivers).", cluster.id)
 
         return {
             "driver_to_cluster": driver_to_cluster,
             "unassigned_clusters": unassigned_clusters,
         }
 
+    @staticmethod
+    def kitchen_order(cluster: OrderCluster) -> Tuple[bool, datetime]:
+        # Sort key: priority clusters have their own slot, ahead of the others
+        return (not cluster.priority, cluster.earliest_delivery_time)
+
+    def cluster_ready_time(self, cluster: OrderCluster, now: datetime) -> datetime:
+        # When the cluster's pizzas are out of the oven, with the kitchen starting now
+        latest_prep_time = self.estimate_latest_pizza_ready_time(
+            total_pizzas=cluster.total_items,
+            chefs=self.pizza_prep_settings.CHEFS,
+            chef_experience=self.pizza_prep_settings.CHEF_EXPERIENCE,
+            chef_capacity=self.pizza_prep_settings.CHEF_CAPACITY,
+            bake_times=self.pizza_prep_settings.BAKE_TIMES,
+            num_ovens=self.pizza_prep_settings.NUM_OVENS,
+            single_oven_capacity=self.pizza_prep_settings.SINGLE_OVEN_CAPACITY,
+            pizza_type=self.pizza_prep_settings.PIZZA_TYPE,
+            now=now,
+        )
+        return max(now, latest_prep_time)
+
+    def apply_switching_penalty(
+        self, cluster_costs: np.ndarray, cluster: OrderCluster, drivers: List[Driver]
+    ) -> None:
+        """
+        Add SWITCHING_PENALTY to the feasible drivers of a reused cluster other than
+        the one preferred by the previous run (when it is still a candidate), so
+        assignments only change when it pays off. Then remember this run's preferred
+        driver: the feasible one with the lowest cost.
+        """
+        feasible = np.isfinite(cluster_costs)
+        if not feasible.any():
+            return
+        penalty = self.clustering_settings.SWITCHING_PENALTY
+        previous = self.warm_start.preferred_driver(cluster.id)
+        driver_ids = [driver.id for driver in drivers]
+        if penalty and previous in driver_ids:
+            switching = feasible & (np.array(driver_ids) != previous)
+            cluster_costs[switching] += penalty
+        best = int(np.nanargmin(cluster_costs))
+        self.warm_start.prefer(cluster.id, driver_ids[best])
+
     def relax_unassigned_batch(
         self,
         unassigned_clusters: Dict[str, Dict],
@@ -305,11 +522,15 @@ class OrdersOptimizer:
         """
         Progressive relaxation over unassigned clusters.
         Keeps profiles separately (no mutation of Pydantic cluster objects).
+        Stops at the first round without assignments, except for priority clusters, which
+        are relaxed until assigned or `max_rounds`.
         """
         profiles: Dict[str, Dict[str, Any]] = {}
         relaxed_assignments: Dict[int, Dict[str, Any]] = {}
         still_unassigned = dict(unassigned_clusters)
         remaining_drivers = list(drivers)
+        # Once a round assigns nothing, only priority clusters keep being relaxed
+        priority_only = False
 
         for round_num in range(1, max_rounds + 1):
             if not still_unassigned or not remaining_drivers:
@@ -319,7 +540,9 @@ class OrdersOptimizer:
             adjusted_clusters: List["OrderCluster"] = []
             for cluster_id in list(still_unassigned.keys()):
                 cluster = still_unassigned[cluster_id]["cluster"]
-                prof = profiles.get(cluster_id) or self._default_profile()
+                if priority_only and not cluster.priority:
+                    continue
+                prof = profiles.get(cluster_id) or self._default_profile(cluster.priority)
                 # apply all strategies for this round
                 for strat in strategies:
                     before = (prof["constraints"].copy(), prof["weights"].copy())
@@ -332,7 +555,7 @@ class OrdersOptimizer:
                 adjusted_clusters.append(cluster)
 
             # Run assignment with relaxed constraints
-            self.logger.info(f"Run assignment with relaxed constraints")
+            self.logger.debug("Run assignment with relaxed constraints (round %d)", round_num)
             result = self.try_assign_cluster(
                 clusters=adjusted_clusters,
                 drivers=remaining_drivers,
@@ -352,32 +575,166 @@ class OrdersOptimizer:
                 profiles.setdefault(cid, profiles.get(cid, self._default_profile()))  # keep final profile
             remaining_drivers = [d for d in remaining_drivers if d.id not in assigned_driver_ids]
 
-            # Early stop if nothing improved
+            # Early stop if nothing improved, unless priority clusters are left: they
+            # are not deferred while a driver may take them
             if not round_assign:
-                break
+                if not any(v["cluster"].priority for v in still_unassigned.values()):
+                    break
+                priority_only = True
 
         return relaxed_assignments, still_unassigned
 
+    def chain_trips(
+        self,
+        unassigned_clusters: Dict[str, Dict],
+        assignments: Dict[int, Dict[str, Any]],
+        drivers: List[Driver],
+        horizon_minutes: int,
+    ) -> Tuple[Dict[int, List[Dict[str, Any]]], Dict[str, Dict]]:
+        """
+        Give drivers assigned in this run more trips, over a rolling horizon.
+
+        A driver is back at the restaurant after the last segment of its route. Each
+        round matches the drivers back within `horizon_minutes` to the unassigned
+        clusters (one cluster per driver and round), leaving when both the driver and
+        the pizzas are ready: the kitchen times the bake to the driver's return, so
+        hotness is measured from that departure. Hotness and lateness hold for every trip
+        (default or priority constraints, no relaxation). Rounds stop when nothing is assigned.
+        Trips beyond the horizon are left to the next runs.
+        """
+        now = self.clock()
+        horizon_end = now + timedelta(minutes=horizon_minutes)
+        drivers_by_id = {driver.id: driver for driver in drivers}
+        back_at: Dict[int, datetime] = {}
+        for driver_id, assignment in assignments.items():
+            driver = drivers_by_id[driver_id]
+            driver_ready_time = (
+                max(now, driver.estimated_finish_time)
+                if getattr(driver, "estimated_finish_time", None)
+                else now
+            )
+            cluster = assignment["cluster"]
+            departure = max(self.cluster_ready_time(cluster, now), driver_ready_time)
+            deliveries = self.simulate_delivery_times(
+                cluster=cluster, dispatch_ready_time=departure, time_for_payment=timedelta(seconds=120)
+            )
+            back_at[driver_id] = self.trip_return_time(cluster, deliveries)
+
+        chained: Dict[int, List[Dict[str, Any]]] = {}
+        still_unassigned = dict(unassigned_clusters)
+        while still_unassigned:
+            returning = [driver_id for driver_id, at in back_at.items() if at <= horizon_end]
+            if not returning:
+                break
+            clusters = [v["cluster"] for v in still_unassigned.values()]
+            record_matrix("chaining_cost", (len(returning), len(clusters)))
+            trips: Dict[Tuple[int, int], Dict[str, Any]] = {}
+            costs = np.full((len(returning), len(clusters)), np.nan, dtype=float)
+            for j, cluster in enumerate(clusters):
+                ready_time = self.cluster_ready_time(cluster, now)
+                for i, driver_id in enumerate(returning):
+                    trip = self.plan_trip(cluster, ready_time, back_at[driver_id])
+                    if trip is not None:
+                        trips[i, j] = trip
+                        costs[i, j] = trip["cost"]
+            finite_vals = costs[np.isfinite(costs)]
+            if finite_vals.size == 0:
+                break
+            BIG_M = max(1.0, float(np.max(finite_vals))) * 1e6
+            row_ind, col_ind = linear_sum_assignment(np.where(np.isfinite(costs), costs, BIG_M))
+            for i, j in zip(row_ind, col_ind):
+                if (i, j) not in trips:
+                    continue
+                driver_id, cluster, trip = returning[i], clusters[j], trips[i, j]
+                chained.setdefault(driver_id, []).append({"cluster": cluster, **trip})
+                back_at[driver_id] = trip["return_time"]
+                still_unassigned.pop(cluster.id)
+                self.logger.debug(
+                    "Chain Cluster: %s -> Driver: %s | Departure: %s | Cost: %.2f",
+                    cluster.id,
+                    driver_id,
+                    trip["departure_time"],
+                    trip["cost"],
+                )
+        return chained, still_unassigned
+
+    def plan_trip(
+        self, cluster: OrderCluster, cluster_ready_time: datetime, driver_ready_time: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Departure, return and cost of a trip starting when both the pizzas and the driver
+        are ready, or None when it breaks the hotness or lateness constraints.
+        """
+        profile = self._default_profile(cluster.priority)
+        constraints, weights = profile["constraints"], profile["weights"]
+        departure = max(cluster_ready_time, driver_ready_time)
+        deliveries = self.simulate_delivery_times(
+            cluster=cluster, dispatch_ready_time=departure, time_for_payment=timedelta(seconds=120)
+        )
+        if any(
+            est["delivery_time"] - departure > timedelta(minutes=constraints["max_hotness"])
+            or est["delivery_time"] - cluster.earliest_delivery_time
+            > timedelta(minutes=constraints["lateness_tol"])
+            for est in deliveries.values()
+        ):
+            return None
+        cost = self.compute_assignment_cost(
+            wait_time=max(timedelta(0), departure - driver_ready_time),
+            delivery_times=deliveries,
+            route_duration=cluster.cluster_route.duration,
+            weight_wait_time=weights["wait_time"],
+            weight_max_lateness=weights["max_lateness"],
+            weight_route_duration=weights["route_duration"],
+        )
+        return {
+            "cost": float(cost),
+            "departure_time": departure,
+            "return_time": self.trip_return_time(cluster, deliveries),
+        }
+
+    @staticmethod
+    def trip_return_time(cluster: OrderCluster, deliveries: Dict[int, dict]) -> datetime:
+        # The last segment of the route is the way back to the restaurant
+        last_delivery = max(est["delivery_time"] for est in deliveries.values())
+        return last_delivery + timedelta(seconds=cluster.cluster_route.segments[-1].duration)
+
     @staticmethod
     def relax_hotness(profile: Dict[str, Any], round_num: int) -> Dict[str, Any]:
-        """Set hotness tolerance based on round number."""
+        """Set hotness tolerance based on round number, from the profile's base tolerance."""
         c = profile.setdefault("constraints", {})
-        base = 20
+        base = profile.get("base", {}).get("max_hotness", 20)
         c["max_hotness"] = base + 5 * round_num
         profile.setdefault("log", []).append(f"Relaxed hotness tolerance to {c['max_hotness']} mins")
         return profile
 
     @staticmethod
     def relax_lateness(profile: Dict[str, Any], round_num: int) -> Dict[str, Any]:
-        """Set lateness tolerance based on round number."""
+        """Set lateness tolerance based on round number, from the profile's base tolerance."""
         c = profile.setdefault("constraints", {})
-        base = 10
+        base = profile.get("base", {}).get("lateness_tol", 10)
         c["lateness_tol"] = base + 5 * round_num
         profile.setdefault("log", []).append(f"Relaxed lateness tolerance to {c['lateness_tol']} mins")
         return profile
 
+    def unassigned_orders_query(self) -> Query:
+        # Served by ix_orders_status / the partial indexes on pending orders
+        query = self.db.query(Order).filter(Order.status == "pending")
+        return self._filter_restaurant(query, Order.restaurant_id)
+
     def fetch_unassigned_orders(self) -> List[Order]:
-        return self.db.query(Order).filter(Order.status == "pending").all()
+        return self.unassigned_orders_query().all()
+
+    def pending_orders_fingerprint(self) -> Tuple[int, Optional[int], Optional[datetime]]:
+        """
+        Cheap fingerprint (count, max id, max created_at) of the pending orders,
+        answered from the index on orders.status.
+        """
+        count, max_id, max_created_at = (
+            self.unassigned_orders_query()
+            .with_entities(func.count(Order.id), func.max(Order.id), func.max(Order.created_at))
+            .one()
+        )
+        return count, max_id, max_created_at
 
     def filter_out_unavailable_orders(
         self,
@@ -427,19 +784,48 @@ class OrdersOptimizer:
         max_pizzas_per_cluster: int = 10,
         cluster_distance_threshold: int = 120,
     ) -> List[List[Order]]:
+        groups, _ = self.geographic_clusters(
+            orders=orders,
+            max_pizzas_per_cluster=max_pizzas_per_cluster,
+            cluster_distance_threshold=cluster_distance_threshold,
+        )
+        return groups
+
+    def geographic_clusters(
+        self,
+        orders: List[Order],
+        max_pizzas_per_cluster: int,
+        cluster_distance_threshold: int,
+    ) -> Tuple[List[List[Order]], bool]:
+        """
+        Orders grouped by geographic proximity, and whether a distance matrix they were
+        grouped on was approximate (served by the fallback route planner).
+        """
         if len(orders) < 2:
-            return [orders]
+            return [orders], False
+
+        large_bucket_size = self.clustering_settings.LARGE_BUCKET_SIZE
+        if large_bucket_size and len(orders) > large_bucket_size:
+            groups, approximate = self.cluster_large_bucket(
+                orders=orders,
+                cluster_distance_threshold=cluster_distance_threshold,
+                max_component_size=large_bucket_size,
+            )
+            return self.split_by_capacity(groups, max_pizzas_per_cluster), approximate
 
         # One or more pairs of lng/lat values: https://openrouteservice-py.readthedocs.io/en/latest/#module-openrouteservice.distance_matrix
         coords = [(order.lon, order.lat) for order in orders]
-        self.logger.info(f"{coords=}")
+        self.logger.debug("Distance matrix for %d locations: %s", len(coords), coords)
 
         try:
-            matrix_response = self.route_planner.compute_distance_matrix(
-                coords=coords,
-            )
+            with profile_stage("distance_matrix"):
+                matrix_response = self.route_planner.compute_distance_matrix(
+                    coords=coords,
+                )
         except Exception as e:
             raise Exception(f"Route Planner API error: {e}")
+        record_route_planner_call("distance_matrix", matrix_response)
+        record_matrix("distance_matrix", (len(coords), len(coords)))
 
         matrix_metrics = (
             "durations" if self.route_planner.metric == "duration" else "distances"
@@ -452,15 +838,93 @@ class OrdersOptimizer:
             linkage="average",
             distance_threshold=cluster_distance_threshold,  # max N minutes between points
         )
-        labels = clustering.fit_predict(dist_matrix)
+        with profile_stage("agglomerative_clustering"):
+            labels = clustering.fit_predict(dist_matrix)
 
         clustered_orders = {}
         for label, order in zip(labels, orders):
             clustered_orders.setdefault(label, []).append(order)
 
+        approximate = bool(matrix_response.get(APPROXIMATE_KEY, False))
+        return self.split_by_capacity(clustered_orders.values(), max_pizzas_per_cluster), approximate
+
+    def cluster_large_bucket(
+        self,
+        orders: List[Order],
+        cluster_distance_threshold: int,
+        max_component_size: int,
+    ) -> Tuple[List[List[Order]], bool]:
+        """
+        Cluster a bucket too large for a full distance matrix.
+        Orders are partitioned by a grid of LARGE_BUCKET_CELL_KM cells, and each 2 x 2
+        window of cells gets its own distance matrix, so memory and matrix sizes grow with
+        the orders, not with their square. The pairs within the threshold split the bucket
+        into connected components, clustered by average linkage on their own; pairs never
+        compared count as unreachable. Components larger than `max_component_size` are
+        clustered by complete linkage on the compared pairs, which keeps every pair of a
+        cluster within the threshold. Also returns whether a window's matrix was approximate.
+        """
+        coords = [(order.lon, order.lat) for order in orders]
+        cells = partition_grid(coords, self.clustering_settings.LARGE_BUCKET_CELL_KM)
+        matrix_metrics = (
+            "durations" if self.route_planner.metric == "duration" else "distances"
+        )
+        distances = SparseDistances(len(orders))
+        approximate = False
+        for block in windows(cells):
+            if len(block) < 2:
+                continue
+            try:
+                with profile_stage("distance_matrix"):
+                    matrix_response = self.route_planner.compute_distance_matrix(
+                        coords=[coords[i] for i in block],
+                    )
+            except Exception as e:
+                raise Exception(f"Route Planner API error: {e}")
+            record_route_planner_call("distance_matrix", matrix_response)
+            record_matrix("distance_matrix", (len(block), len(block)))
+            approximate = approximate or bool(matrix_response.get(APPROXIMATE_KEY, False))
+            distances.add_block(block, matrix_response[matrix_metrics])
+
+        groups = []
+        with profile_stage("agglomerative_clustering"):
+            components = distances.components(cluster_distance_threshold)
+            for component in components:
+                if len(component) < 2:
+                    groups.append([orders[i] for i in component])
+                    continue
+                if len(component) > max_component_size:
+                    for cluster in distances.complete_linkage(
+                        component, cluster_distance_threshold
+                    ):
+                        groups.append([orders[i] for i in cluster])
+                    continue
+                clustering = AgglomerativeClustering(
+                    n_clusters=None,
+                    metric="precomputed",
+                    linkage="average",
+                    distance_threshold=cluster_distance_threshold,
+                )
+                labels = clustering.fit_predict(
+                    distances.submatrix(component, fill=UNREACHABLE_DISTANCE)
+                )
+                clustered = {}
+                for label, index in zip(labels, component):
+                    clustered.setdefault(label, []).append(orders[index])
+                groups.extend(clustered.values())
+        self.logger.info(
+            "Clustered a bucket of %d orders over %d cells and %d components (%d compared pairs)",
+            len(orders), len(cells), len(components), len(distances),
+        )
+        return groups, approximate
+
+    @staticmethod
+    def split_by_capacity(
+        clusters: Iterable[List[Order]], max_pizzas_per_cluster: int
+    ) -> List[List[Order]]:
         # Now enforce driver capacity (max pizzas per cluster)
         final_clusters = []
-        for cluster in clustered_orders.values():
+        for cluster in clusters:
             buffer = []
             total_pizzas = 0
             for order in cluster:
@@ -478,14 +942,77 @@ class OrdersOptimizer:
 
     def fetch_available_drivers_with_location(
         self, eta_threshold_minutes: int = 10
-    ) -> List[Driver]:
+    ) -> List[Union[Driver, DriverOut]]:
         """
         Fetch drivers who are available or whose delivery will finish soon,
         and have a known location.
+        With a loaded driver registry, drivers are its snapshots and the database is not read.
+        Otherwise, positions buffered in the location store, not flushed yet, replace the
+        stored ones. With MAX_CANDIDATE_DRIVERS, only the drivers nearest to the start
+        location are returned.
         """
-        now = datetime.utcnow()
+        now = self.clock()
+        limit = self.clustering_settings.MAX_CANDIDATE_DRIVERS or None
+        start_lat = self.clustering_settings.START_LOCATION_LAT
+        start_lon = self.clustering_settings.START_LOCATION_LON
+
+        if self.driver_registry is not None and self.driver_registry.loaded:
+            if self.restaurant_id is not ALL_RESTAURANTS:
+                drivers = [
+                    driver
+                    for driver in self.driver_registry.available(
+                        now=now, eta_threshold_minutes=eta_threshold_minutes
+                    )
+                    if driver.restaurant_id == self.restaurant_id
+                ]
+                if limit:
+                    drivers = [
+                        driver
+                        for driver, _ in rank_by_distance(drivers, start_lat, start_lon, k=limit)
+                    ]
+            elif limit:
+                drivers = [
+                    driver
+                    for driver, _ in self.driver_registry.nearest(
+                        lat=start_lat,
+                        lon=start_lon,
+                        k=limit,
+                        now=now,
+                        eta_threshold_minutes=eta_threshold_minutes,
+                    )
+                ]
+            else:
+                drivers = self.driver_registry.available(
+                    now=now, eta_threshold_minutes=eta_threshold_minutes
+                )
+            self.logger.info("Fetched %d available drivers from the registry", len(drivers))
+            return drivers
+
+        drivers = self.available_drivers_query(
+            eta_threshold_minutes=eta_threshold_minutes, now=now
+        ).all()
+        if self.location_store is not None:
+            fresh = self.location_store.fresh_locations(driver.id for driver in drivers)
+            for driver in drivers:
+                location = fresh.get(driver.id)
+                if location is not None:
+                    # Not marked as modified: the store flushes positions on its own
+                    set_committed_value(driver, "lat", location.lat)
+                    set_committed_value(driver, "lon", location.lon)
+            self.logger.debug("Overlaid %d fresh driver locations", len(fresh))
+        if limit:
+            drivers = [
+                driver for driver, _ in rank_by_distance(drivers, start_lat, start_lon, k=limit)
+            ]
+
+        self.logger.info("Fetched %d available drivers with location", len(drivers))
+        return drivers
 
-        drivers = (
+    def available_drivers_query(
+        self, eta_threshold_minutes: int, now: datetime
+    ) -> Query:
+        # Served by ix_drivers_status_estimated_finish_time
+        query = (
             self.db.query(Driver)
             .filter(
                 (Driver.status == DriverStatus.AVAILABLE)
@@ -498,65 +1025,96 @@ class OrdersOptimizer:
                 )
             )
             .filter(Driver.lat.isnot(None), Driver.lon.isnot(None))
-            .all()
         )
-        # drivers = self.db.query(Driver).all()
+        return self._filter_restaurant(query, Driver.restaurant_id)
 
-        self.logger.info(f"Fetched {len(drivers)} available drivers with location")
-        return drivers
+    def _filter_restaurant(self, query: Query, column) -> Query:
+        if self.restaurant_id is ALL_RESTAURANTS:
+            # No filter: keeps the plans on the status indexes unchanged
+            return query
+        if self.restaurant_id is None:
+            return query.filter(column.is_(None))
+        return query.filter(column == self.restaurant_id)
 
     def compute_total_items(self, orders: List[Order]) -> int:
         return sum([len(o.items["food"]) for o in orders])
 
     async def compute_clustered_orders(
-        self, filtered_orders: List[Order]
+        self, filtered_orders: List[Order], warm_start: Optional[WarmStartState] = None
     ) -> List[OrderCluster]:
         clustered_orders = []
 
         # Cluster orders by time
-        self.logger.info(f"Cluster orders by time ...")
+        self.logger.info("Cluster orders by time ...")
         # TODO: how to deal with time_window parameter ?
         time_clusters = self.cluster_orders_by_time_window(orders=filtered_orders)
 
         # Cluster order by geographic proximity
         for time_window, time_cluster in time_clusters.items():
-            self.logger.info(f"Cluster orders by geographic proximity ...")
-            geo_clusters = await self.cluster_orders_by_geographic_proximity(
-                orders=time_cluster
-            )
-            for geo_cluster in geo_clusters:
-                # Compute total items
-                total_items = self.compute_total_items(geo_cluster)
-
-                # Compute cluster_route
-                cluster_route = self.compute_cluster_route(
-                    orders=geo_cluster,
-                    start_location=(
-                        self.clustering_settings.START_LOCATION_LON,
-                        self.clustering_settings.START_LOCATION_LAT,
-                    ),
-                )
-
-                # Compute earliest delivery
-                earliest_delivery_time = min(
-                    [o.desired_delivery_time for o in geo_cluster]
-                )
-                # Store cluster
-                cluster_obj = OrderCluster(
-                    cluster_id=cluster_route.id,
-                    time_window=time_window,
-                    orders=[OrderResponse.model_validate(o) for o in geo_cluster],
-                    total_items=total_items,
-                    earliest_delivery_time=earliest_delivery_time,
-                    cluster_route=cluster_route,
-                    cluster_status=ClusterStatus.to_be_assigned,
-                    relaxed_constraints=None,
+            if warm_start is not None:
+                # Keep the deferred clusters whose orders did not change
+                intact, time_cluster = warm_start.split_bucket(time_window, time_cluster)
+                clustered_orders.extend(intact)
+                if not time_cluster:
+                    continue
+            self.logger.debug("Cluster orders by geographic proximity (%s) ...", time_window)
+            # Priority orders are clustered apart, so that normal orders never hold them back
+            geo_clusters = []
+            for group in (
+                [o for o in time_cluster if o.priority],
+                [o for o in time_cluster if not o.priority],
+            ):
+                if group:
+                    groups, approximate = self.geographic_clusters(
+                        orders=group,
+                        max_pizzas_per_cluster=self.clustering_settings.MAX_PIZZAS_PER_CLUSTER,
+                        cluster_distance_threshold=self.clustering_settings.CLUSTER_DISTANCE_THRESHOLD,
+                    )
+                    geo_clusters.extend((geo_cluster, approximate) for geo_cluster in groups)
+            for geo_cluster, approximate in geo_clusters:
+                cluster_obj = self.build_order_cluster(
+                    time_window, geo_cluster, approximate=approximate
                 )
+                if warm_start is not None:
+                    warm_start.track(cluster_obj, geo_cluster)
                 clustered_orders.append(cluster_obj)
         return clustered_orders
 
+    def build_order_cluster(
+        self, time_window: datetime, orders: List[Order], approximate: bool = False
+    ) -> OrderCluster:
+        # Compute total items
+        total_items = self.compute_total_items(orders)
+
+        # Compute cluster_route
+        cluster_route = self.compute_cluster_route(
+            orders=orders,
+            start_location=(
+                self.clustering_settings.START_LOCATION_LON,
+                self.clustering_settings.START_LOCATION_LAT,
+            ),
+        )
+        # Grouped on an approximate distance matrix, even if routed exactly
+        cluster_route.approximate = cluster_route.approximate or approximate
+
+        # Compute earliest delivery
+        earliest_delivery_time = min([o.desired_delivery_time for o in orders])
+        return OrderCluster(
+            cluster_id=cluster_route.id,
+            time_window=time_window,
+            orders=[OrderResponse.model_validate(o) for o in orders],
+            total_items=total_items,
+            earliest_delivery_time=earliest_delivery_time,
+            cluster_route=cluster_route,
+            cluster_status=ClusterStatus.to_be_assigned,
+            relaxed_constraints=None,
+        )
+
     def compute_cluster_route(
-        self, orders: List[Order], start_location: Tuple[float]
+        self,
+        orders: List[Order],
+        start_location: Tuple[float],
+        optimize_waypoints: bool = True,
     ) -> ClusterRoute:
         # Building coordinates: driver starts and ends at pizza restaurant location (start_location)
         coordinates = (
@@ -571,9 +1129,11 @@ class OrdersOptimizer:
         )
 
         # Get directions
-        direction_response = self.route_planner.get_directions(
-            coordinates=coordinates, optimize_waypoints=True, format="json"
-        )
+        with profile_stage("directions"):
+            direction_response = self.route_planner.get_directions(
+                coordinates=coordinates, optimize_waypoints=optimize_waypoints, format="json"
+            )
+        record_route_planner_call("directions", direction_response)
         # Parse response
         parsed_route = self.route_planner.format_direction_response(
             coordinates=coordinates,
@@ -650,12 +1210,54 @@ class OrdersOptimizer:
             )
             route_segment_list.append(route_segment)
         return ClusterRoute(
-            id=secrets.token_hex(2),
+            id=secrets.token_hex(8),
             distance=parsed_route["distance"],
             duration=parsed_route["duration"],
             segments=route_segment_list,
+            order_ids=[
+                orders[visited_to_coord[i]].id for i in range(len(visited_to_coord))
+            ],
+            geometry=route.get("geometry"),
+            approximate=bool(direction_response.get(APPROXIMATE_KEY, False)),
         )
 
+    def expand_cluster_route(self, compact_route: CompactClusterRoute) -> ClusterRoute:
+        """
+        Rebuild the full route (steps and addresses) of a stored compact route,
+        visiting orders in the stored sequence. Raises ValueError when some of its orders
+        no longer exist.
+        """
+        orders_by_id = {
+            o.id: o
+            for o in self.db.query(Order).filter(Order.id.in_(compact_route.order_ids))
+        }
+        missing = [order_id for order_id in compact_route.order_ids if order_id not in orders_by_id]
+        if missing:
+            raise ValueError(f"Orders {missing} of cluster {compact_route.id} no longer exist")
+        orders = [orders_by_id[order_id] for order_id in compact_route.order_ids]
+        cluster_route = self.compute_cluster_route(
+            orders=orders,
+            start_location=(
+                self.clustering_settings.START_LOCATION_LON,
+                self.clustering_settings.START_LOCATION_LAT,
+            ),
+            optimize_waypoints=False,
+        )
+        cluster_route.id = compact_route.id
+        return cluster_route
+
+    @staticmethod
+    def prep_capacity(chefs: int, chef_experience: str, chef_capacity: Dict[str, int]) -> int:
+        """
+        Pizzas prepared per prep cycle (PREP_CYCLE_SECONDS) by the chefs.
+        """
+        base_capacity = chef_capacity[chef_experience]
+        if chefs == 1:
+            return base_capacity
+        if chefs == 2:
+            return base_capacity * 3  # nonlinear boost for 2 chefs
+        return base_capacity * chefs  # assume linear for >2
+
     def estimate_latest_pizza_ready_time(
         self,
         total_pizzas: int,
@@ -678,16 +1280,8 @@ class OrdersOptimizer:
             return now
 
         # --- Step 2. Prep capacity ---
-        base_capacity = chef_capacity[chef_experience]
-
-        if chefs == 1:
-            prep_capacity = base_capacity
-        elif chefs == 2:
-            prep_capacity = base_capacity * 3  # nonlinear boost for 2 chefs
-        else:
-            prep_capacity = base_capacity * chefs  # assume linear for >2
-
-        prep_cycle_time = 120  # seconds per prep cycle
+        prep_capacity = self.prep_capacity(chefs, chef_experience, chef_capacity)
+        prep_cycle_time = self.PREP_CYCLE_SECONDS
 
         # --- Step 3. Prep finish times ---
         prep_finish_times = []
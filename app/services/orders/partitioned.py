@@ -0,0 +1,336 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from logging import Logger
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import ClusteringSettings, PizzaPreparationSettings, ProfilingSettings, settings
+from app.crud.restaurant import get_active_restaurants
+from app.models.driver import Driver
+from app.models.order import Order
+from app.models.restaurant import Restaurant
+from app.services.drivers import DriverLocationStore, DriverRegistry
+from app.services.route_planner.base import RoutePlannerService
+from .orders_optimizer import OrdersOptimizer
+from .warm_start import WarmStartState
+
+
+@dataclass
+class DispatchPartition:
+    """
+    Orders and drivers of one restaurant (None: the default restaurant), optimized
+    with the restaurant's start location and kitchen settings.
+    """
+
+    restaurant_id: Optional[int]
+    name: str
+    clustering_settings: ClusteringSettings
+    pizza_prep_settings: PizzaPreparationSettings
+
+
+def restaurant_partition(
+    restaurant: Restaurant,
+    clustering_settings: ClusteringSettings,
+    pizza_prep_settings: PizzaPreparationSettings,
+) -> DispatchPartition:
+    """
+    The default settings, with the restaurant's location and kitchen overrides.
+    """
+    return DispatchPartition(
+        restaurant_id=restaurant.id,
+        name=restaurant.name,
+        clustering_settings=clustering_settings.model_copy(
+            update={
+                "START_LOCATION_LAT": restaurant.lat,
+                "START_LOCATION_LON": restaurant.lon,
+                "ADDRESS": restaurant.address,
+                "POSTAL_CODE": restaurant.postal_code,
+                "CITY": restaurant.city,
+                "COUNTRY": restaurant.country,
+            }
+        ),
+        # Validated again, so that overrides are coerced (e.g. "senior" -> ChefExperience)
+        pizza_prep_settings=PizzaPreparationSettings(
+            **{**pizza_prep_settings.model_dump(), **(restaurant.pizza_prep_settings or {})}
+        ),
+    )
+
+
+def default_partition(
+    clustering_settings: ClusteringSettings,
+    pizza_prep_settings: PizzaPreparationSettings,
+) -> DispatchPartition:
+    return DispatchPartition(
+        restaurant_id=None,
+        name="default",
+        clustering_settings=clustering_settings,
+        pizza_prep_settings=pizza_prep_settings,
+    )
+
+
+def dispatch_partitions(
+    db: Session,
+    clustering_settings: ClusteringSettings,
+    pizza_prep_settings: PizzaPreparationSettings,
+) -> List[DispatchPartition]:
+    """
+    The default restaurant partition followed by one partition per active restaurant.
+    """
+    partitions = [default_partition(clustering_settings, pizza_prep_settings)]
+    for restaurant in get_active_restaurants(db=db):
+        partitions.append(
+            restaurant_partition(restaurant, clustering_settings, pizza_prep_settings)
+        )
+    return partitions
+
+
+def orders_partition(
+    db: Session,
+    order_ids: Iterable[int],
+    clustering_settings: ClusteringSettings,
+    pizza_prep_settings: PizzaPreparationSettings,
+) -> DispatchPartition:
+    """
+    The partition of the restaurant the orders belong to (partitions are disjoint, so
+    the orders of a cluster share it); the default one for orders without restaurant.
+    """
+    restaurant_id = (
+        db.query(Order.restaurant_id)
+        .filter(Order.id.in_(list(order_ids)), Order.restaurant_id.isnot(None))
+        .limit(1)
+        .scalar()
+    )
+    restaurant = db.get(Restaurant, restaurant_id) if restaurant_id is not None else None
+    if restaurant is None:
+        return default_partition(clustering_settings, pizza_prep_settings)
+    return restaurant_partition(restaurant, clustering_settings, pizza_prep_settings)
+
+
+def partition_optimizer(
+    partition: DispatchPartition,
+    db: Session,
+    route_planner: RoutePlannerService,
+    logger: Logger,
+    **kwargs,
+) -> OrdersOptimizer:
+    """
+    An optimizer restricted to the partition's restaurant, with its settings.
+    """
+    return OrdersOptimizer(
+        db=db,
+        route_planner=route_planner,
+        clustering_settings=partition.clustering_settings,
+        pizza_prep_settings=partition.pizza_prep_settings,
+        logger=logger,
+        restaurant_id=partition.restaurant_id,
+        **kwargs,
+    )
+
+
+def summarize_chained_trips(chained_trips: Dict[int, List[Dict[str, Any]]]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Further trips of each driver, in order (see OrdersOptimizer.chain_trips).
+    """
+    return {
+        driver_id: [
+            {
+                "cluster_id": trip["cluster"].id,
+                "departure_time": trip["departure_time"].isoformat(),
+                "cost": trip["cost"],
+            }
+            for trip in trips
+        ]
+        for driver_id, trips in chained_trips.items()
+    }
+
+
+def summarize_run(partition: DispatchPartition, out: Dict[str, Any], wall_s: float) -> Dict[str, Any]:
+    """
+    Picklable summary of an optimizer run (clusters and ORM objects stay in the worker).
+    """
+    return {
+        "restaurant_id": partition.restaurant_id,
+        "name": partition.name,
+        "assigned": {
+            driver_id: {"cluster_id": v["cluster"].id, "cost": float(v["cost"])}
+            for driver_id, v in out["driver_to_cluster"].items()
+        },
+        "chained": summarize_chained_trips(out["chained_trips"]),
+        "kitchen_sequence": out["kitchen_sequence"],
+        "approximate": out["approximate_clusters"],
+        "unassigned": {k: v["motivations"] for k, v in out["unassigned_clusters"].items()},
+        "profile": out["profile"],
+        "wall_s": round(wall_s, 6),
+    }
+
+
+async def run_partition(
+    partition: DispatchPartition,
+    db: Session,
+    route_planner: RoutePlannerService,
+    logger: Logger,
+    profiling_settings: Optional[ProfilingSettings] = None,
+    location_store: Optional[DriverLocationStore] = None,
+    driver_registry: Optional[DriverRegistry] = None,
+    capture_cprofile: bool = False,
+    warm_start: Optional[WarmStartState] = None,
+) -> Dict[str, Any]:
+    start = time.perf_counter()
+    optimizer = partition_optimizer(
+        partition,
+        db=db,
+        route_planner=route_planner,
+        logger=logger,
+        profiling_settings=profiling_settings,
+        location_store=location_store,
+        driver_registry=driver_registry,
+        warm_start=warm_start,
+    )
+    out = await optimizer.run(capture_cprofile=capture_cprofile)
+    return summarize_run(partition, out, time.perf_counter() - start)
+
+
+def run_partition_in_worker(
+    partition: DispatchPartition,
+    profiling_settings: Optional[ProfilingSettings] = None,
+    capture_cprofile: bool = False,
+) -> Dict[str, Any]:
+    """
+    Entry point of the dispatch process pool: the worker opens its own session and
+    route planner. Positions still buffered by the parent's location store are not seen
+    (see run_partitions) and the parent's driver registry is not used: run_partitions
+    reloads the dispatched drivers into it.
+    """
+    from app.config_logging import logger
+    from app.database import SessionLocal
+    from app.services.route_planner.factory import get_route_planner
+
+    db = SessionLocal()
+    try:
+        return asyncio.run(
+            run_partition(
+                partition,
+                db=db,
+                route_planner=get_route_planner(),
+                logger=logger,
+                profiling_settings=profiling_settings,
+                capture_cprofile=capture_cprofile,
+            )
+        )
+    finally:
+        db.close()
+
+
+async def run_partitions(
+    partitions: List[DispatchPartition],
+    db: Session,
+    route_planner: RoutePlannerService,
+    logger: Logger,
+    profiling_settings: Optional[ProfilingSettings] = None,
+    location_store: Optional[DriverLocationStore] = None,
+    driver_registry: Optional[DriverRegistry] = None,
+    capture_cprofile: bool = False,
+    executor: Optional[Executor] = None,
+    warm_starts: Optional[Dict[Optional[int], WarmStartState]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Optimize each partition; partitions are disjoint (orders, drivers), so they run
+    in parallel in `executor`. Without one, they run one after the other with `db`.
+    Results are in the order of `partitions`. Drivers dispatched by the workers are reloaded
+    into `driver_registry`, which the workers do not see.
+    With `warm_starts`, each restaurant keeps its own warm start state (created on first
+    use) from run to run. Only in this process: partitions run by workers start cold.
+    """
+    if executor is None:
+        return [
+            await run_partition(
+                partition,
+                db=db,
+                route_planner=route_planner,
+                logger=logger,
+                profiling_settings=profiling_settings,
+                location_store=location_store,
+                driver_registry=driver_registry,
+                capture_cprofile=capture_cprofile,
+                warm_start=(
+                    warm_starts.setdefault(partition.restaurant_id, WarmStartState())
+                    if warm_starts is not None
+                    else None
+                ),
+            )
+            for partition in partitions
+        ]
+
+    if warm_starts is not None:
+        logger.warning(
+            "Warm start is not kept by dispatch worker processes: %d partitions start cold",
+            len(partitions),
+        )
+    if location_store is not None:
+        # Workers read driver positions from the database
+        await asyncio.to_thread(location_store.flush, db)
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                executor,
+                run_partition_in_worker,
+                partition,
+                profiling_settings,
+                capture_cprofile,
+            )
+            for partition in partitions
+        )
+    )
+    if driver_registry is not None and driver_registry.loaded:
+        driver_ids = {
+            driver_id
+            for result in results
+            for driver_id in list(result["assigned"]) + list(result["chained"])
+        }
+        if driver_ids:
+            await asyncio.to_thread(reload_drivers, db, driver_registry, driver_ids)
+    return results
+
+
+def reload_drivers(db: Session, driver_registry: DriverRegistry, driver_ids: Iterable[int]) -> None:
+    """
+    Refresh the registry snapshots of drivers written by another process.
+    """
+    drivers = (
+        db.query(Driver)
+        .filter(Driver.id.in_(list(driver_ids)))
+        # Overwrite the instances already loaded by this session
+        .execution_options(populate_existing=True)
+    )
+    for driver in drivers:
+        driver_registry.upsert(driver)
+
+
+# Partitions are CPU bound (clustering, assignment): they run in a process pool,
+# created on first use. DISPATCH_WORKERS=0 runs them in the request process.
+_dispatch_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_dispatch_executor() -> Optional[ProcessPoolExecutor]:
+    global _dispatch_executor
+    if settings.DISPATCH_WORKERS <= 0:
+        return None
+    if _dispatch_executor is None:
+        _dispatch_executor = ProcessPoolExecutor(
+            max_workers=settings.DISPATCH_WORKERS,
+            # Forking a multi-threaded server is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _dispatch_executor
+
+
+def shutdown_dispatch_executor() -> None:
+    global _dispatch_executor
+    if _dispatch_executor is not None:
+        _dispatch_executor.shutdown(wait=True)
+        _dispatch_executor = None
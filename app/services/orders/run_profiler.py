@@ -0,0 +1,200 @@
+import cProfile
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Profiler of the optimizer run executing in the current context (None outside of runs)
+_current_profiler: ContextVar[Optional["RunProfiler"]] = ContextVar(
+    "run_profiler", default=None
+)
+# Key tagging the DB connections used by a profiled session
+_CONNECTION_KEY = "run_profiler"
+# Matrices of the responses are sized from their shape, at this many JSON bytes per cell
+MATRIX_KEYS = ("durations", "distances")
+MATRIX_CELL_BYTES = 8
+
+
+def response_bytes(response: Any) -> int:
+    """
+    Approximate JSON size of a route planner response. Serializing a large matrix costs about
+    as much as receiving it, so matrices are sized from their shape instead.
+    """
+    if not isinstance(response, dict):
+        return len(json.dumps(response, separators=(",", ":"), default=str))
+    rest, cells = {}, 0
+    for key, value in response.items():
+        if key in MATRIX_KEYS and isinstance(value, list):
+            cells += len(value) * (len(value[0]) if value else 0)
+        else:
+            rest[key] = value
+    return len(json.dumps(rest, separators=(",", ":"), default=str)) + cells * MATRIX_CELL_BYTES
+
+
+class RunProfiler:
+    """
+    Collects timings and counters of a single optimizer run:
+    - wall and CPU (process) time per stage; nested stages are included in their parent
+    - DB statements issued by the run's session, attributed to the innermost stage
+    - route planner calls and response sizes (JSON bytes; matrices estimated from their shape)
+    - dimensions of the distance and assignment matrices
+    Optionally records a cProfile profile of the run into `cprofile_dir`.
+    """
+
+    def __init__(self, db: Optional[Session] = None, cprofile_dir: Optional[str] = None):
+        self.db = db
+        self.cprofile_dir = cprofile_dir
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.db_statements = 0
+        self.route_planner_calls: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "bytes": 0}
+        )
+        self.matrices: Dict[str, List[List[int]]] = defaultdict(list)
+        self.cprofile_file: Optional[str] = None
+        self._stage_stack: List[str] = []
+        self._tagged_connections: List[Dict[str, Any]] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._wall = self._cpu = 0.0
+
+    def __enter__(self) -> "RunProfiler":
+        self._token = _current_profiler.set(self)
+        if self.db is not None:
+            self._attach_db()
+        if self.cprofile_dir:
+            self._cprofile = cProfile.Profile()
+            try:
+                self._cprofile.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                self._cprofile = None
+        self._wall_start, self._cpu_start = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._wall = time.perf_counter() - self._wall_start
+        self._cpu = time.process_time() - self._cpu_start
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            self.cprofile_file = os.path.join(
+                self.cprofile_dir,
+                f"optimizer_run_{datetime.utcnow():%Y%m%dT%H%M%S%f}.prof",
+            )
+            self._cprofile.dump_stats(self.cprofile_file)
+        if self.db is not None:
+            self._detach_db()
+        _current_profiler.reset(self._token)
+
+    @contextmanager
+    def stage(self, name: str):
+        stats = self.stages.setdefault(
+            name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "db_statements": 0}
+        )
+        self._stage_stack.append(name)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats["wall_s"] += time.perf_counter() - wall
+            stats["cpu_s"] += time.process_time() - cpu
+            stats["calls"] += 1
+            self._stage_stack.pop()
+
+    def add_route_planner_call(self, kind: str, response: Any) -> None:
+        stats = self.route_planner_calls[kind]
+        stats["calls"] += 1
+        stats["bytes"] += response_bytes(response)
+
+    def add_matrix(self, kind: str, shape: Sequence[int]) -> None:
+        self.matrices[kind].append([int(dim) for dim in shape])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "wall_s": round(self._wall, 4),
+            "cpu_s": round(self._cpu, 4),
+            "stages": {
+                name: {
+                    "wall_s": round(stats["wall_s"], 4),
+                    "cpu_s": round(stats["cpu_s"], 4),
+                    "calls": stats["calls"],
+                    "db_statements": stats["db_statements"],
+                }
+                for name, stats in self.stages.items()
+            },
+            "db_statements": self.db_statements,
+            "route_planner": dict(self.route_planner_calls),
+            "matrices": dict(self.matrices),
+            "cprofile_file": self.cprofile_file,
+        }
+
+    # Statements are counted on the connections the session checks out during the run,
+    # so that concurrent requests sharing the engine are not attributed to this run
+
+    def _attach_db(self) -> None:
+        event.listen(self.db.get_bind(), "before_cursor_execute", self._on_statement)
+        event.listen(self.db, "after_begin", self._on_begin)
+        event.listen(self.db, "after_transaction_end", self._on_transaction_end)
+        if self.db.in_transaction():
+            self._tag_connection(self.db.connection())
+
+    def _detach_db(self) -> None:
+        event.remove(self.db.get_bind(), "before_cursor_execute", self._on_statement)
+        event.remove(self.db, "after_begin", self._on_begin)
+        event.remove(self.db, "after_transaction_end", self._on_transaction_end)
+        self._untag_connections()
+
+    def _tag_connection(self, connection) -> None:
+        connection.info[_CONNECTION_KEY] = self
+        self._tagged_connections.append(connection.info)
+
+    def _untag_connections(self) -> None:
+        for info in self._tagged_connections:
+            if info.get(_CONNECTION_KEY) is self:
+                del info[_CONNECTION_KEY]
+        self._tagged_connections.clear()
+
+    def _on_begin(self, session, transaction, connection) -> None:
+        self._tag_connection(connection)
+
+    def _on_transaction_end(self, session, transaction) -> None:
+        if transaction.parent is None:
+            # The connection goes back to the pool
+            self._untag_connections()
+
+    def _on_statement(self, conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get(_CONNECTION_KEY) is not self:
+            return
+        self.db_statements += 1
+        if self._stage_stack:
+            self.stages[self._stage_stack[-1]]["db_statements"] += 1
+
+
+def current_profiler() -> Optional[RunProfiler]:
+    return _current_profiler.get()
+
+
+def profile_stage(name: str):
+    """
+    Time a stage of the current run; no-op when no run is being profiled.
+    """
+    profiler = _current_profiler.get()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+def record_route_planner_call(kind: str, response: Any) -> None:
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.add_route_planner_call(kind, response)
+
+
+def record_matrix(kind: str, shape: Sequence[int]) -> None:
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.add_matrix(kind, shape)
@@ -0,0 +1,206 @@
+"""
+Helpers to cluster large time buckets without a full N x N distance matrix.
+
+Orders are partitioned by a grid of `cell_km` cells on their straight-line position, and road
+distances are only requested between orders of the same or touching cells. The pairs
+closer than the clustering threshold form a sparse graph: average linkage never merges two
+orders of different connected components (a merge needs at least one pair within the
+threshold), so each component is clustered on its own. Components too large for a dense
+matrix are clustered by complete linkage on the compared pairs instead.
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+
+from app.services.route_planner.geometry import KM_PER_DEGREE_LAT
+
+Cell = Tuple[int, int]
+# Stands for the pairs never compared: any average including one is above the threshold
+UNREACHABLE_DISTANCE = 1e9
+
+
+def partition_grid(
+    coords: Sequence[Tuple[float, float]], cell_km: float
+) -> Dict[Cell, List[int]]:
+    """
+    Indices of the (lon, lat) `coords` by grid cell.
+    """
+    reference_lat = float(np.mean([lat for _, lat in coords]))
+    cell_lat = cell_km / KM_PER_DEGREE_LAT
+    cell_lon = cell_lat / math.cos(math.radians(reference_lat))
+    cells: Dict[Cell, List[int]] = {}
+    for index, (lon, lat) in enumerate(coords):
+        cell = (math.floor(lat / cell_lat), math.floor(lon / cell_lon))
+        cells.setdefault(cell, []).append(index)
+    return cells
+
+
+def windows(cells: Dict[Cell, List[int]]) -> List[List[int]]:
+    """
+    Indices of the orders in each 2 x 2 window of occupied cells. Any two orders of the same
+    or touching cells (diagonals included) share at least one window.
+    """
+    # Occupied cells of the window anchored (lower left) at each anchor
+    by_anchor: Dict[Cell, Tuple[Cell, ...]] = {}
+    for cell in cells:
+        for anchor in _anchors(cell):
+            if anchor not in by_anchor:
+                anchor_i, anchor_j = anchor
+                by_anchor[anchor] = tuple(
+                    other
+                    for other in (
+                        (anchor_i, anchor_j),
+                        (anchor_i + 1, anchor_j),
+                        (anchor_i, anchor_j + 1),
+                        (anchor_i + 1, anchor_j + 1),
+                    )
+                    if other in cells
+                )
+    # A window that is part of another one adds no pair. Only the (at most four) windows
+    # holding its first cell can contain it.
+    kept = set()
+    for group in set(by_anchor.values()):
+        cells_of_group = set(group)
+        if not any(
+            cells_of_group < set(by_anchor[anchor]) for anchor in _anchors(group[0])
+        ):
+            kept.add(group)
+    return [[index for cell in sorted(group) for index in cells[cell]] for group in sorted(kept)]
+
+
+def _anchors(cell: Cell) -> Tuple[Cell, ...]:
+    i, j = cell
+    return ((i - 1, j - 1), (i - 1, j), (i, j - 1), (i, j))
+
+
+class SparseDistances:
+    """
+    Road distances between the pairs of orders that were compared, as sorted
+    `row * n + column` keys and their values. Memory follows the number of compared pairs,
+    i.e. the orders times the orders around them.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0, dtype=float)
+        self._blocks: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        self._merge()
+        return len(self.keys)
+
+    def add_block(self, block: List[int], matrix: Sequence[Sequence[float]]) -> None:
+        """
+        Keep the pairs of a `block` x `block` matrix; missing values (no route) are skipped.
+        """
+        block = np.asarray(block, dtype=np.int64)
+        values = np.asarray(matrix, dtype=float).ravel()
+        rows, cols = np.repeat(block, len(block)), np.tile(block, len(block))
+        keep = (rows != cols) & ~np.isnan(values)
+        self._blocks.append((rows[keep] * self.n + cols[keep], values[keep]))
+
+    def components(self, threshold: float) -> List[np.ndarray]:
+        """
+        Connected components of the graph of pairs within `threshold`, each in
+        breadth-first order from its first index, so that neighbours stay close.
+        """
+        self._merge()
+        edges = self.keys[self.values <= threshold]
+        graph = coo_matrix(
+            (np.ones(len(edges), dtype=np.int8), (edges // self.n, edges % self.n)),
+            shape=(self.n, self.n),
+        ).tocsr()
+        n_components, labels = connected_components(graph, directed=False)
+        order = np.argsort(labels, kind="stable")
+        starts = np.searchsorted(labels[order], np.arange(n_components))
+        components = []
+        for members in np.split(order, starts[1:]):
+            if len(members) == 1:
+                components.append(members)
+            else:
+                components.append(
+                    breadth_first_order(
+                        graph, members[0], directed=False, return_predecessors=False
+                    )
+                )
+        return components
+
+    def complete_linkage(self, indices: Iterable[int], threshold: float) -> List[List[int]]:
+        """
+        Complete linkage clusters of `indices` under `threshold`, without a dense matrix: two
+        clusters merge only when every pair between them was compared and is within the
+        threshold, so no cluster has a pair above it. Memory follows the pairs within the
+        threshold.
+        """
+        self._merge()
+        indices = np.asarray(list(indices), dtype=np.int64)
+        members = {int(index): [int(index)] for index in indices}
+        rows, cols = self.keys // self.n, self.keys % self.n
+        keep = (
+            (self.values <= threshold)
+            & (rows < cols)
+            & np.isin(rows, indices)
+            & np.isin(cols, indices)
+        )
+        # Cluster -> neighbour cluster -> [max distance, compared pairs] between them
+        links: Dict[int, Dict[int, list]] = {index: {} for index in members}
+        heap = []
+        for a, b, value in zip(
+            rows[keep].tolist(), cols[keep].tolist(), self.values[keep].tolist()
+        ):
+            links[a][b] = links[b][a] = [value, 1]
+            heap.append((value, a, b))
+        heapq.heapify(heap)
+
+        while heap:
+            value, a, b = heapq.heappop(heap)
+            link = links.get(a, {}).get(b) if b in members else None
+            if link is None or link[0] != value or link[1] < len(members[a]) * len(members[b]):
+                continue  # stale, or some pair between them is missing or above the threshold
+            # Merge b into a
+            members[a].extend(members.pop(b))
+            b_links = links.pop(b)
+            del links[a][b]
+            for other in set(links[a]) | set(b_links):
+                if other == a:
+                    continue
+                merged = [0.0, 0]
+                for part in (links[a].get(other), b_links.get(other)):
+                    if part is not None:
+                        merged = [max(merged[0], part[0]), merged[1] + part[1]]
+                links[other].pop(b, None)
+                links[a][other] = links[other][a] = merged
+                if merged[1] == len(members[a]) * len(members[other]):
+                    heapq.heappush(heap, (merged[0], min(a, other), max(a, other)))
+        return list(members.values())
+
+    def submatrix(self, indices: Iterable[int], fill: float) -> np.ndarray:
+        """
+        Dense matrix between `indices`, with `fill` for the pairs never compared.
+        """
+        self._merge()
+        indices = np.asarray(list(indices), dtype=np.int64)
+        keys = (indices[:, None] * self.n + indices[None, :]).ravel()
+        positions = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        found = self.keys[positions] == keys if len(self.keys) else np.zeros(len(keys), bool)
+        matrix = np.full(len(keys), fill, dtype=float)
+        matrix[found] = self.values[positions[found]]
+        matrix = matrix.reshape(len(indices), len(indices))
+        np.fill_diagonal(matrix, 0.0)
+        return matrix
+
+    def _merge(self) -> None:
+        # Pairs compared in several windows are kept once
+        if not self._blocks:
+            return
+        keys = np.concatenate([self.keys] + [keys for keys, _ in self._blocks])
+        values = np.concatenate([self.values] + [values for _, values in self._blocks])
+        self._blocks = []
+        self.keys, first = np.unique(keys, return_index=True)
+        self.values = values[first]
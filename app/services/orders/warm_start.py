@@ -0,0 +1,130 @@
+import threading
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from app.models.order import Order
+from app.schemas.cluster import OrderCluster
+
+
+def order_signature(order) -> Tuple[float, float, datetime, int, bool]:
+    """
+    What a cluster depends on: location, desired delivery time, number of pizzas and priority.
+    """
+    return (
+        order.lat,
+        order.lon,
+        order.desired_delivery_time,
+        len(order.items["food"]),
+        bool(order.priority),
+    )
+
+
+class WarmStartState:
+    """
+    Clusters deferred by the previous optimizer run, kept for the next one.
+
+    A deferred cluster is reused as is (same id, same route) when all its orders are
+    still pending and unchanged, and no order joined its time window. Only the other
+    time windows are clustered again, so the work of a run follows the orders that
+    changed, not the size of the backlog. The lowest-cost feasible driver of each cluster
+    is remembered too: with a switching penalty, the next run prefers to keep it.
+
+    The state is dropped when the clustering settings change (see `settings_key`).
+    """
+
+    def __init__(self):
+        self.settings_key: Optional[Hashable] = None
+        self.reused: Set[str] = set()
+        self.reclustered_orders = 0
+        self._clusters: Dict[datetime, List[OrderCluster]] = {}
+        self._signatures: Dict[str, Dict[int, Tuple]] = {}
+        self._preferred_drivers: Dict[str, int] = {}
+        self._next_signatures: Dict[str, Dict[int, Tuple]] = {}
+        self._next_preferred_drivers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def begin_run(self, settings_key: Hashable) -> None:
+        with self._lock:
+            if settings_key != self.settings_key:
+                self._reset()
+                self.settings_key = settings_key
+            self.reused = set()
+            self.reclustered_orders = 0
+            self._next_signatures = {}
+            self._next_preferred_drivers = {}
+
+    def split_bucket(
+        self, time_window: datetime, orders: List[Order]
+    ) -> Tuple[List[OrderCluster], List[Order]]:
+        """
+        Deferred clusters of `time_window` that are still valid for `orders`, and the
+        orders left to cluster. A cluster is dropped when one of its orders changed or
+        is no longer pending. New orders in the window re-cluster all of it, so they
+        can be batched with their neighbours.
+        """
+        by_id = {order.id: order for order in orders}
+        intact, covered, known = [], set(), set()
+        with self._lock:
+            clusters = self._clusters.get(time_window, [])
+            for cluster in clusters:
+                signatures = self._signatures[cluster.id]
+                known.update(signatures)
+                if all(
+                    order_id in by_id and order_signature(by_id[order_id]) == signature
+                    for order_id, signature in signatures.items()
+                ):
+                    intact.append((cluster, signatures))
+                    covered.update(signatures)
+            if any(order.id not in known for order in orders):
+                intact, covered = [], set()
+            for cluster, signatures in intact:
+                self.reused.add(cluster.id)
+                self._next_signatures[cluster.id] = signatures
+        leftovers = [order for order in orders if order.id not in covered]
+        self.reclustered_orders += len(leftovers)
+        return [cluster for cluster, _ in intact], leftovers
+
+    def track(self, cluster: OrderCluster, orders: List[Order]) -> None:
+        """
+        Record the orders a new cluster was built from.
+        """
+        self._next_signatures[cluster.id] = {
+            order.id: order_signature(order) for order in orders
+        }
+
+    def preferred_driver(self, cluster_id: str) -> Optional[int]:
+        return self._preferred_drivers.get(cluster_id)
+
+    def prefer(self, cluster_id: str, driver_id: int) -> None:
+        self._next_preferred_drivers[cluster_id] = driver_id
+
+    def remember(self, clusters: List[OrderCluster]) -> None:
+        """
+        Replace the state with the clusters deferred by this run.
+        """
+        with self._lock:
+            self._clusters = {}
+            self._signatures = {}
+            for cluster in clusters:
+                signatures = self._next_signatures.get(cluster.id)
+                if signatures is None:
+                    continue
+                self._clusters.setdefault(cluster.time_window, []).append(cluster)
+                self._signatures[cluster.id] = signatures
+            self._preferred_drivers = {
+                cluster.id: self._next_preferred_drivers[cluster.id]
+                for cluster in clusters
+                if cluster.id in self._next_preferred_drivers
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self._clusters = {}
+        self._signatures = {}
+        self._preferred_drivers = {}
@@ -1 +1,23 @@
 from .open_route_service import OpenRouteService
+from .metered import MeteredRoutePlanner
+from .recording import (
+    FixtureMissError,
+    FixtureMode,
+    LatencyProfile,
+    RecordingRoutePlanner,
+    get_latency_profile,
+)
+from .haversine import (
+    HaversineRoutePlanner,
+    TravelTimeModel,
+    error_stats,
+    evaluate_travel_time_model,
+    fit_travel_time_model,
+)
+from .resilient import (
+    CircuitBreaker,
+    CircuitState,
+    ResilientRoutePlanner,
+    ResponseCache,
+    RoutePlannerUnavailableError,
+)
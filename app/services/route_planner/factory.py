@@ -1,5 +1,17 @@
+from functools import lru_cache
+
 from app.services.route_planner.base import RoutePlannerService
-from app.services.route_planner import OpenRouteService
+from app.services.route_planner import (
+    CircuitBreaker,
+    FixtureMode,
+    HaversineRoutePlanner,
+    MeteredRoutePlanner,
+    OpenRouteService,
+    RecordingRoutePlanner,
+    ResilientRoutePlanner,
+    ResponseCache,
+    get_latency_profile,
+)
 # from app.services.route_planner.googlemaps import GoogleMapsService # future
 
 from app.config import settings, open_route_settings, google_maps_settings
@@ -10,15 +22,115 @@ def get_route_planner() -> RoutePlannerService:
     provider = settings.ROUTE_SERVICE_PROVIDER.lower()
 
     if provider == "openrouteservice":
-        return OpenRouteService(
-            api_key=open_route_settings.ROUTE_SERVICE_API_KEY,
-            profile=open_route_settings.PROFILE,
+        return with_fallback(MeteredRoutePlanner(get_recorded_route_planner()))
+    elif provider == "synthetic":
+        return MeteredRoutePlanner(get_recorded_route_planner())
+    elif provider == "haversine":
+        # Approximate travel times calibrated on the recorded responses; ORS geocodes
+        return HaversineRoutePlanner(
+            model=get_fallback_route_planner().model,
             metric=open_route_settings.METRIC,
-            units=open_route_settings.UNITS,
-            logger=logger,
+            geocoder=MeteredRoutePlanner(build_open_route_service()),
         )
     elif provider == "googlemaps":
         # return GoogleMapsService(api_key=google_maps_settings.ROUTE_SERVICE_API_KEY)
         raise NotImplementedError("Google Maps service is not yet implemented.")
     else:
         raise ValueError(f"Unsupported route service provider: {provider}")
+
+
+def build_open_route_service() -> OpenRouteService:
+    return OpenRouteService(
+        api_key=open_route_settings.ROUTE_SERVICE_API_KEY,
+        profile=open_route_settings.PROFILE,
+        metric=open_route_settings.METRIC,
+        units=open_route_settings.UNITS,
+        logger=logger,
+    )
+
+
+@lru_cache
+def get_recorded_route_planner() -> RoutePlannerService:
+    """
+    The provider's planner, wrapped in a RecordingRoutePlanner when
+    ROUTE_PLANNER_FIXTURES_MODE is set. Shared by the process, so that all requests record
+    to (and replay from) the same entries.
+    """
+    if settings.ROUTE_SERVICE_PROVIDER.lower() == "synthetic":
+        # Offline stand-in (load tests, demos): deterministic geocoding and synthetic road metric
+        from app.services.synthetic import SyntheticRoutePlanner
+
+        route_planner = SyntheticRoutePlanner(metric=open_route_settings.METRIC)
+    else:
+        route_planner = build_open_route_service()
+    mode = FixtureMode(settings.ROUTE_PLANNER_FIXTURES_MODE.lower())
+    if mode == FixtureMode.OFF:
+        return route_planner
+    logger.info(
+        "Route planner fixtures: mode=%s path=%s",
+        mode.value,
+        settings.ROUTE_PLANNER_FIXTURES_PATH,
+    )
+    return RecordingRoutePlanner(
+        route_planner=route_planner,
+        fixture_path=settings.ROUTE_PLANNER_FIXTURES_PATH,
+        mode=mode,
+        latency=get_latency_profile(settings.ROUTE_PLANNER_REPLAY_LATENCY),
+        autosave_interval_s=settings.ROUTE_PLANNER_FIXTURES_SAVE_INTERVAL_SECONDS,
+    )
+
+
+def save_route_planner_fixtures() -> None:
+    """
+    Write the responses recorded since the last autosave, e.g. on shutdown.
+    """
+    if not get_recorded_route_planner.cache_info().currsize:
+        return
+    route_planner = get_recorded_route_planner()
+    if isinstance(route_planner, RecordingRoutePlanner) and route_planner.unsaved:
+        route_planner.save()
+
+
+def with_fallback(route_planner: RoutePlannerService) -> RoutePlannerService:
+    """
+    Wrap the planner in a ResilientRoutePlanner when ROUTE_PLANNER_FALLBACK_ENABLED is set.
+    The breaker, the response cache and the fallback planner are shared by the process.
+    """
+    if not settings.ROUTE_PLANNER_FALLBACK_ENABLED:
+        return route_planner
+    return ResilientRoutePlanner(
+        route_planner=route_planner,
+        fallback=get_fallback_route_planner(),
+        breaker=get_route_planner_breaker(),
+        cache=get_route_planner_response_cache(),
+        timeout_s=settings.ROUTE_PLANNER_TIMEOUT_SECONDS,
+        run_budget_s=settings.ROUTE_PLANNER_RUN_BUDGET_SECONDS,
+        logger=logger,
+    )
+
+
+@lru_cache
+def get_fallback_route_planner() -> HaversineRoutePlanner:
+    route_planner = HaversineRoutePlanner.from_fixtures(
+        settings.ROUTE_PLANNER_FIXTURES_PATH, metric=open_route_settings.METRIC
+    )
+    logger.info(
+        "Haversine route planner calibrated on %s: %d detour and %d speed groups",
+        settings.ROUTE_PLANNER_FIXTURES_PATH,
+        len(route_planner.model.detours),
+        len(route_planner.model.speeds),
+    )
+    return route_planner
+
+
+@lru_cache
+def get_route_planner_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=settings.ROUTE_PLANNER_BREAKER_FAILURES,
+        reset_timeout_s=settings.ROUTE_PLANNER_BREAKER_RESET_SECONDS,
+    )
+
+
+@lru_cache
+def get_route_planner_response_cache() -> ResponseCache:
+    return ResponseCache(max_bytes=int(settings.ROUTE_PLANNER_RESPONSE_CACHE_MB * 2**20))
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.metrics import GEOCODE_CACHE_REQUESTS
+from app.schemas.order import DeliveryAddress
+from .base import RoutePlannerService
+
+AddressKey = Tuple[str, str, str, str]
+
+
+def address_key(address: DeliveryAddress) -> AddressKey:
+    """
+    Normalized address used to geocode identical addresses once.
+    """
+    return tuple(
+        " ".join(part.split()).lower()
+        for part in (address.address, address.postal_code, address.city, address.country)
+    )
+
+
+class GeocodeCache:
+    """
+    LRU cache of geocoded addresses (address_key -> [lon, lat]); 0 entries disables it.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[AddressKey, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = GEOCODE_CACHE_REQUESTS.labels("hit")
+        self._misses = GEOCODE_CACHE_REQUESTS.labels("miss")
+
+    def get(self, key: AddressKey) -> Optional[List[float]]:
+        with self._lock:
+            coords = self._entries.get(key)
+            if coords is not None:
+                self._entries.move_to_end(key)
+        (self._hits if coords is not None else self._misses).inc()
+        return coords
+
+    def set(self, key: AddressKey, coords: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = coords
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache
+def get_geocode_cache() -> GeocodeCache:
+    return GeocodeCache(max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES)
+
+
+def geocode_address(
+    route_planner: RoutePlannerService, address: DeliveryAddress
+) -> List[float]:
+    """
+    Geocode one address, going through the geocode cache.
+    """
+    cache = get_geocode_cache()
+    key = address_key(address)
+    coords = cache.get(key)
+    if coords is None:
+        coords = route_planner.get_coordinates(
+            address=address.address,
+            postal_code=address.postal_code,
+            city=address.city,
+            country=address.country,
+        )
+        cache.set(key, coords)
+    return coords
+
+
+async def geocode_addresses(
+    route_planner: RoutePlannerService,
+    addresses: Iterable[DeliveryAddress],
+    max_concurrency: int,
+) -> Dict[AddressKey, Union[List[float], Exception]]:
+    """
+    Geocode distinct addresses concurrently (at most `max_concurrency` requests in flight),
+    going through the geocode cache.
+    Returns address_key -> [lon, lat], or the exception raised for that address.
+    """
+    unique: Dict[AddressKey, DeliveryAddress] = {}
+    for address in addresses:
+        unique.setdefault(address_key(address), address)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def geocode(address: DeliveryAddress) -> List[float]:
+        async with semaphore:
+            # Route planner clients are blocking: run them in worker threads
+            return await asyncio.to_thread(geocode_address, route_planner, address)
+
+    results = await asyncio.gather(
+        *(geocode(address) for address in unique.values()), return_exceptions=True
+    )
+    return dict(zip(unique.keys(), results))
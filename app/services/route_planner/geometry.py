@@ -0,0 +1,79 @@
+"""
+Spherical geometry helpers on (lon, lat) coordinates in degrees, the order used by ORS.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_008.8
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_matrix(
+    sources: Sequence[Sequence[float]],
+    destinations: Optional[Sequence[Sequence[float]]] = None,
+) -> np.ndarray:
+    """
+    Great-circle distances in meters between every source and destination
+    (sources x sources when destinations is None).
+    """
+    src = np.radians(np.asarray(sources, dtype=float).reshape(-1, 2))
+    dst = src if destinations is None else np.radians(
+        np.asarray(destinations, dtype=float).reshape(-1, 2)
+    )
+    lon1, lat1 = src[:, 0][:, None], src[:, 1][:, None]
+    lon2, lat2 = dst[:, 0][None, :], dst[:, 1][None, :]
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    return float(haversine_matrix([(lon1, lat1)], [(lon2, lat2)])[0, 0])
+
+
+def offset_coordinates(
+    lon: float, lat: float, dx_km: np.ndarray, dy_km: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Move (lon, lat) by dx_km eastwards and dy_km northwards (equirectangular approximation).
+    """
+    new_lat = lat + np.asarray(dy_km) / KM_PER_DEGREE_LAT
+    new_lon = lon + np.asarray(dx_km) / (KM_PER_DEGREE_LAT * np.cos(np.radians(lat)))
+    return new_lon, new_lat
+
+
+def encode_polyline(coordinates: Sequence[Sequence[float]], precision: int = 5) -> str:
+    """
+    Encode (lon, lat) points with the Google polyline algorithm, as ORS does for
+    `format="json"` geometries (points are encoded as lat, lon).
+    """
+    factor = 10**precision
+    encoded, prev_lat, prev_lon = [], 0, 0
+    for lon, lat in coordinates:
+        lat_i, lon_i = int(round(lat * factor)), int(round(lon * factor))
+        for delta in (lat_i - prev_lat, lon_i - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+        prev_lat, prev_lon = lat_i, lon_i
+    return "".join(encoded)
+
+
+def nearest_neighbour_order(matrix: np.ndarray) -> List[int]:
+    """
+    Visit order of the points 1..n-1 of `matrix`, from point 0, always moving to the
+    nearest point not visited yet.
+    """
+    remaining = list(range(1, len(matrix)))
+    current, ordered = 0, []
+    while remaining:
+        current = min(remaining, key=lambda j: matrix[current, j])
+        remaining.remove(current)
+        ordered.append(current)
+    return ordered
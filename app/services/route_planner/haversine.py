@@ -0,0 +1,365 @@
+"""
+Approximate route planner: road distances and durations estimated from great-circle
+distances, calibrated on responses recorded from an exact planner (see RecordingRoutePlanner).
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import RoutePlannerService
+from .geometry import KM_PER_DEGREE_LAT, haversine_matrix, nearest_neighbour_order
+from .parsing import build_directions_response, parse_directions_response
+
+# Shorter pairs (same building, rounding noise) say nothing about detours and speeds
+MIN_SAMPLE_M = 50.0
+ANY = "*"
+
+
+@dataclass
+class TravelTimeModel:
+    """
+    Road distance is the great-circle distance times a detour factor, travelled at a speed.
+    Both are fitted per zone (`zone_km` grid cell of the origin) and time band (`band_hours`
+    hours of the day, UTC). A group with fewer than `min_samples` samples falls back to its
+    time band over all zones (traffic depends on the hour more than on the place), then to
+    its zone over the whole day, then to the global figures, and finally to
+    `detour_factor` and `speed_kmh`.
+    """
+
+    detour_factor: float = 1.3
+    speed_kmh: float = 25.0
+    zone_km: float = 2.0
+    band_hours: int = 3
+    min_samples: int = 20
+    reference_lat: float = 45.0
+    detours: Dict[str, float] = field(default_factory=dict)
+    speeds: Dict[str, float] = field(default_factory=dict)
+
+    def zones(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cell_lat = self.zone_km / KM_PER_DEGREE_LAT
+        cell_lon = cell_lat / math.cos(math.radians(self.reference_lat))
+        return (
+            np.floor(coords[:, 1] / cell_lat).astype(np.int64),
+            np.floor(coords[:, 0] / cell_lon).astype(np.int64),
+        )
+
+    def band(self, at: Optional[datetime]) -> Optional[int]:
+        return None if at is None else at.hour // self.band_hours
+
+    def lookup(
+        self, values: Dict[str, float], zone: Optional[Tuple[int, int]], band: Optional[int]
+    ) -> Optional[float]:
+        zone_key = ANY if zone is None else f"{zone[0]},{zone[1]}"
+        band_key = ANY if band is None else str(band)
+        for key in (
+            f"{zone_key}|{band_key}",
+            f"{ANY}|{band_key}",
+            f"{zone_key}|{ANY}",
+            f"{ANY}|{ANY}",
+        ):
+            if key in values:
+                return values[key]
+        return None
+
+    def factors(
+        self, origins: np.ndarray, at: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Detour factor and speed (km/h) of the legs leaving each of the (lon, lat) `origins`.
+        """
+        rows, cols = self.zones(origins)
+        zones, inverse = np.unique(np.stack([rows, cols], axis=1), axis=0, return_inverse=True)
+        band = self.band(at)
+        detours, speeds = [], []
+        for i, j in zones:
+            detour = self.lookup(self.detours, (i, j), band)
+            speed = self.lookup(self.speeds, (i, j), band)
+            detours.append(self.detour_factor if detour is None else detour)
+            speeds.append(self.speed_kmh if speed is None else speed)
+        inverse = inverse.ravel()
+        return np.array(detours)[inverse], np.array(speeds)[inverse]
+
+    def estimate(
+        self,
+        sources: Sequence[Sequence[float]],
+        destinations: Optional[Sequence[Sequence[float]]] = None,
+        at: Optional[datetime] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Road distances (m) and durations (s) from every source to every destination
+        (sources x sources when destinations is None), departing at `at`.
+        """
+        sources = np.asarray(sources, dtype=float).reshape(-1, 2)
+        detours, speeds = self.factors(sources, at)
+        distances = haversine_matrix(sources, destinations) * detours[:, None]
+        durations = distances / (speeds[:, None] / 3.6)
+        return distances, durations
+
+
+@dataclass
+class TravelSamples:
+    """
+    Legs found in recorded responses: origin, great-circle distance, and the exact road
+    distance and duration (NaN when the response did not carry them).
+    """
+
+    origins: np.ndarray
+    straight: np.ndarray
+    distances: np.ndarray
+    durations: np.ndarray
+    hours: np.ndarray  # hour of day of the response, -1 when unknown
+
+    def __len__(self) -> int:
+        return len(self.straight)
+
+
+def travel_samples(entries: Iterable[Dict[str, Any]]) -> TravelSamples:
+    """
+    Extract the legs of recorded `compute_distance_matrix` and `get_directions` (format
+    "json") responses. Distances are expected in meters.
+    """
+    origins, straight, distances, durations, hours = [], [], [], [], []
+    for entry in entries:
+        response = entry.get("response") or {}
+        recorded_at = entry.get("recorded_at")
+        hour = datetime.fromisoformat(recorded_at).hour if recorded_at else -1
+        if entry.get("method") == "compute_distance_matrix":
+            coords = np.asarray(entry["request"]["coords"], dtype=float).reshape(-1, 2)
+            n = len(coords)
+            legs = ~np.eye(n, dtype=bool)
+            origin = np.repeat(coords, n, axis=0)[legs.ravel()]
+            leg_distances = _matrix_values(response.get("distances"), n)[legs]
+            leg_durations = _matrix_values(response.get("durations"), n)[legs]
+            leg_straight = haversine_matrix(coords)[legs]
+        elif entry.get("method") == "get_directions" and "routes" in response:
+            coords = np.asarray(
+                response["metadata"]["query"]["coordinates"], dtype=float
+            ).reshape(-1, 2)
+            segments = response["routes"][0]["segments"]
+            if len(segments) != len(coords) - 1:
+                continue
+            origin = coords[:-1]
+            leg_distances = np.array([s["distance"] for s in segments], dtype=float)
+            leg_durations = np.array([s["duration"] for s in segments], dtype=float)
+            leg_straight = np.diag(haversine_matrix(coords[:-1], coords[1:]))
+        else:
+            continue
+        origins.append(origin)
+        straight.append(leg_straight)
+        distances.append(leg_distances)
+        durations.append(leg_durations)
+        hours.append(np.full(len(leg_straight), hour))
+
+    if not straight:
+        empty = np.empty(0)
+        return TravelSamples(np.empty((0, 2)), empty, empty, empty, empty.astype(int))
+    samples = TravelSamples(
+        origins=np.concatenate(origins),
+        straight=np.concatenate(straight),
+        distances=np.concatenate(distances),
+        durations=np.concatenate(durations),
+        hours=np.concatenate(hours).astype(int),
+    )
+    keep = samples.straight >= MIN_SAMPLE_M
+    return TravelSamples(
+        origins=samples.origins[keep],
+        straight=samples.straight[keep],
+        distances=samples.distances[keep],
+        durations=samples.durations[keep],
+        hours=samples.hours[keep],
+    )
+
+
+def _matrix_values(matrix: Optional[List[List[float]]], n: int) -> np.ndarray:
+    if matrix is None:
+        return np.full((n, n), np.nan)
+    # Unreachable pairs come back as None, i.e. NaN
+    return np.asarray(matrix, dtype=float)
+
+
+def fit_travel_time_model(
+    entries: Iterable[Dict[str, Any]], **params
+) -> TravelTimeModel:
+    """
+    Fit a TravelTimeModel (`params` are its fields) on recorded responses.
+    Per group, the detour factor is the least-squares slope of road over great-circle
+    distances, and the speed follows from the slope of durations: responses with
+    durations only (the "duration" metric) still calibrate the estimated durations.
+    """
+    model = TravelTimeModel(**params)
+    samples = travel_samples(entries)
+    if not len(samples):
+        return model
+    model.reference_lat = float(np.mean(samples.origins[:, 1]))
+    rows, cols = model.zones(samples.origins)
+    bands = np.where(samples.hours >= 0, samples.hours // model.band_hours, -1)
+
+    zone_keys = np.array([f"{i},{j}" for i, j in zip(rows, cols)])
+    band_keys = np.array([ANY if b < 0 else str(b) for b in bands])
+    groups = {f"{ANY}|{ANY}": np.ones(len(samples), dtype=bool)}
+    for band_key in set(band_keys) - {ANY}:
+        groups[f"{ANY}|{band_key}"] = band_keys == band_key
+    for zone_key in set(zone_keys):
+        in_zone = zone_keys == zone_key
+        groups[f"{zone_key}|{ANY}"] = in_zone
+        for band_key in set(band_keys[in_zone]) - {ANY}:
+            groups[f"{zone_key}|{band_key}"] = in_zone & (band_keys == band_key)
+
+    for key, mask in groups.items():
+        detour = _slope(samples.straight[mask], samples.distances[mask], model.min_samples)
+        if detour is not None:
+            model.detours[key] = detour
+    for key, mask in groups.items():
+        # Seconds per great-circle meter
+        pace = _slope(samples.straight[mask], samples.durations[mask], model.min_samples)
+        if pace is not None:
+            zone_key, band_key = key.split("|")
+            zone = None if zone_key == ANY else tuple(int(v) for v in zone_key.split(","))
+            band = None if band_key == ANY else int(band_key)
+            detour = model.lookup(model.detours, zone, band) or model.detour_factor
+            model.speeds[key] = 3.6 * detour / pace
+    return model
+
+
+def _slope(x: np.ndarray, y: np.ndarray, min_samples: int) -> Optional[float]:
+    known = ~np.isnan(y)
+    if known.sum() < min_samples:
+        return None
+    x, y = x[known], y[known]
+    return float(np.dot(x, y) / np.dot(x, x))
+
+
+def error_stats(estimated: np.ndarray, exact: np.ndarray) -> Dict[str, float]:
+    """
+    Error of `estimated` against `exact` values, over the pairs where both are known:
+    mean absolute error, bias (mean signed relative error) and percentiles of the
+    absolute relative error.
+    """
+    estimated, exact = np.asarray(estimated, dtype=float), np.asarray(exact, dtype=float)
+    known = ~np.isnan(estimated) & ~np.isnan(exact) & (exact > 0)
+    if not known.any():
+        return {"n": 0}
+    error = estimated[known] - exact[known]
+    relative = error / exact[known]
+    return {
+        "n": int(known.sum()),
+        "mae": round(float(np.mean(np.abs(error))), 2),
+        "bias": round(float(np.mean(relative)), 4),
+        "mape": round(float(np.mean(np.abs(relative))), 4),
+        "p50_ape": round(float(np.percentile(np.abs(relative), 50)), 4),
+        "p90_ape": round(float(np.percentile(np.abs(relative), 90)), 4),
+    }
+
+
+def evaluate_travel_time_model(
+    model: TravelTimeModel, entries: Iterable[Dict[str, Any]]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Error statistics of `model` against the recorded (exact) responses, per metric.
+    """
+    samples = travel_samples(entries)
+    detours, speeds = np.empty(len(samples)), np.empty(len(samples))
+    for hour in np.unique(samples.hours):
+        mask = samples.hours == hour
+        at = None if hour < 0 else datetime(2000, 1, 1, int(hour))
+        detours[mask], speeds[mask] = model.factors(samples.origins[mask], at)
+    distances = samples.straight * detours
+    durations = distances / (speeds / 3.6)
+    return {
+        "distances": error_stats(distances, samples.distances),
+        "durations": error_stats(durations, samples.durations),
+    }
+
+
+class HaversineRoutePlanner(RoutePlannerService):
+    """
+    Route planner without remote calls, on a TravelTimeModel: matrices of any size are
+    computed in one vectorized pass, and directions visit the stops in nearest-neighbour
+    order. Responses have the shape of the ORS ones. Estimates depart at `clock()`.
+    Geocoding is delegated to `geocoder`, when given.
+    """
+
+    def __init__(
+        self,
+        model: Optional[TravelTimeModel] = None,
+        metric: str = "duration",
+        profile: str = "haversine",
+        geocoder: Optional[RoutePlannerService] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.model = model or TravelTimeModel()
+        self.metric = metric
+        self.profile = profile
+        self.geocoder = geocoder
+        self.clock = clock
+        self.client = self.initialize_client()
+
+    @classmethod
+    def from_fixtures(
+        cls, fixture_path: str, model_params: Optional[Dict[str, Any]] = None, **kwargs
+    ) -> "HaversineRoutePlanner":
+        """
+        Planner calibrated on the responses recorded in a RecordingRoutePlanner fixture file.
+        """
+        from .recording import RecordingRoutePlanner
+
+        entries = RecordingRoutePlanner.load(fixture_path).values()
+        return cls(model=fit_travel_time_model(entries, **(model_params or {})), **kwargs)
+
+    def initialize_client(self) -> None:
+        return None
+
+    @staticmethod
+    def format_address(address, postal_code, city, country):
+        return f"{address}, {postal_code}, {city}, {country}"
+
+    def get_coordinates(
+        self, address: str, postal_code: str, city: str, country: str
+    ) -> List[float]:
+        if self.geocoder is None:
+            raise NotImplementedError("HaversineRoutePlanner has no geocoder")
+        return self.geocoder.get_coordinates(
+            address=address, postal_code=postal_code, city=city, country=country
+        )
+
+    def compute_distance_matrix(self, coords: List[List[float]]) -> dict:
+        distances, durations = self.model.estimate(coords, at=self.clock())
+        if self.metric == "duration":
+            return {"durations": durations.round(2).tolist()}
+        return {"distances": distances.round(2).tolist()}
+
+    def get_directions(
+        self,
+        coordinates: List[Tuple[float]],
+        optimize_waypoints: bool,
+        format: str = "json",
+    ) -> dict:
+        coordinates = [tuple(coord) for coord in coordinates]
+        at = self.clock()
+        visits = coordinates[1:-1]
+        if optimize_waypoints and len(visits) > 1:
+            _, durations = self.model.estimate([coordinates[0]] + visits, at=at)
+            visits = [visits[i - 1] for i in nearest_neighbour_order(durations)]
+        ordered = [coordinates[0]] + visits + [coordinates[-1]]
+        distances, durations = self.model.estimate(ordered, at=at)
+        return build_directions_response(
+            coordinates=ordered,
+            distances=distances,
+            durations=durations,
+            profile=self.profile,
+            format=format,
+        )
+
+    def get_optimize_route(self, order_locations: List[Tuple[float]]) -> None:
+        pass
+
+    def format_direction_response(
+        self, coordinates: List[Tuple[float]], direction_response: dict
+    ) -> dict:
+        return parse_directions_response(
+            coordinates=coordinates, direction_response=direction_response
+        )
@@ -0,0 +1,76 @@
+import time
+from typing import List, Tuple
+
+from app.metrics import ROUTE_PLANNER_REQUEST_DURATION, ROUTE_PLANNER_REQUESTS
+from .base import RoutePlannerService
+
+
+class MeteredRoutePlanner(RoutePlannerService):
+    """
+    Wraps a route planner to record the latency and outcome of its remote calls.
+    Other attributes (metric, profile, client, ...) are read from the wrapped planner.
+    """
+
+    def __init__(self, route_planner: RoutePlannerService):
+        self.route_planner = route_planner
+
+    def __getattr__(self, name):
+        if name == "route_planner":
+            raise AttributeError(name)
+        return getattr(self.route_planner, name)
+
+    def _call(self, method: str, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = getattr(self.route_planner, method)(*args, **kwargs)
+            outcome = "success"
+            return result
+        finally:
+            ROUTE_PLANNER_REQUEST_DURATION.labels(method).observe(time.perf_counter() - start)
+            ROUTE_PLANNER_REQUESTS.labels(method, outcome).inc()
+
+    def initialize_client(self):
+        return self.route_planner.initialize_client()
+
+    def format_address(self, address, postal_code, city, country):
+        return self.route_planner.format_address(
+            address=address, postal_code=postal_code, city=city, country=country
+        )
+
+    def get_coordinates(
+        self, address: str, postal_code: str, city: str, country: str
+    ) -> List[float]:
+        return self._call(
+            "get_coordinates",
+            address=address,
+            postal_code=postal_code,
+            city=city,
+            country=country,
+        )
+
+    def compute_distance_matrix(self, coords: List[List[float]]):
+        return self._call("compute_distance_matrix", coords=coords)
+
+    def get_directions(
+        self,
+        coordinates: List[Tuple[float]],
+        optimize_waypoints: bool,
+        format: str = "geojson",
+    ):
+        return self._call(
+            "get_directions",
+            coordinates=coordinates,
+            optimize_waypoints=optimize_waypoints,
+            format=format,
+        )
+
+    def get_optimize_route(self, order_locations: List[Tuple[float]]):
+        return self.route_planner.get_optimize_route(order_locations)
+
+    def format_direction_response(
+        self, coordinates: List[Tuple[float]], direction_response: dict
+    ) -> dict:
+        return self.route_planner.format_direction_response(
+            coordinates=coordinates, direction_response=direction_response
+        )
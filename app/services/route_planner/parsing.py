@@ -0,0 +1,104 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from .geometry import encode_polyline
+
+
+def parse_directions_response(
+    coordinates: List[Tuple[float]], direction_response: dict
+) -> dict:
+    """
+    Parse an ORS-shaped directions response (format="json") into the route, its
+    distance and duration, and the mapping from visit position to order index.
+    """
+    route = direction_response["routes"][0]
+    opt_route_coords = direction_response["metadata"]["query"]["coordinates"]
+    # Dict mapping the sorted visitated addresses to corresponding coords.
+    # Ex: {0: 3, 1: 2} means the first visited place is that located in coordinates with index 3 (i.e coordinates[3])
+    # NOTE: We exclude the first and last visited coords because driver stars and ends at pizza restaurant
+    # NOTE: Several orders can share the same coordinates, hence each coordinate index is used once
+    candidates = [tuple(coord) for coord in coordinates[1:-1]]
+    used = set()
+    visited_to_coord = {}
+    for i, visited in enumerate(opt_route_coords[1:-1]):
+        idx = next(
+            j
+            for j, coord in enumerate(candidates)
+            if coord == tuple(visited) and j not in used
+        )
+        used.add(idx)
+        visited_to_coord[i] = idx
+    # NOTE: If coords are equal, then summary dict = {} and in each step distance and duration = 0.0
+    distance = route["summary"].get("distance", 0.0)
+    duration = route["summary"].get("duration", 0.0)
+    return dict(
+        route=route,
+        visited_to_coord=visited_to_coord,
+        distance=distance,
+        duration=duration,
+    )
+
+
+def build_directions_response(
+    coordinates: List[Tuple[float]],
+    distances: np.ndarray,
+    durations: np.ndarray,
+    profile: str,
+    format: str = "json",
+) -> dict:
+    """
+    ORS-shaped directions response (format="json") for a route through `coordinates`
+    in the given order, from the matrices between them: one segment per leg, with a
+    "head to" and an "arrive" step.
+    """
+    segments = []
+    for i in range(len(coordinates) - 1):
+        distance, duration = float(distances[i, i + 1]), float(durations[i, i + 1])
+        segments.append(
+            {
+                "distance": round(distance, 1),
+                "duration": round(duration, 1),
+                "steps": [
+                    {
+                        "name": "-",
+                        "distance": round(distance, 1),
+                        "duration": round(duration, 1),
+                        "instruction": f"Head to waypoint {i + 1}",
+                        "type": 11,
+                        "way_points": [i, i + 1],
+                    },
+                    {
+                        "name": "-",
+                        "distance": 0.0,
+                        "duration": 0.0,
+                        "instruction": f"Arrive at waypoint {i + 1}",
+                        "type": 10,
+                        "way_points": [i + 1, i + 1],
+                    },
+                ],
+            }
+        )
+    summary = {}
+    if segments:
+        summary = {
+            "distance": round(sum(s["distance"] for s in segments), 1),
+            "duration": round(sum(s["duration"] for s in segments), 1),
+        }
+    return {
+        "routes": [
+            {
+                "summary": summary,
+                "segments": segments,
+                "geometry": encode_polyline(coordinates),
+                "way_points": list(range(len(coordinates))),
+            }
+        ],
+        "metadata": {
+            "query": {
+                "coordinates": [list(coord) for coord in coordinates],
+                "profile": profile,
+                "format": format,
+            }
+        },
+    }
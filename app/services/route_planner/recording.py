@@ -0,0 +1,262 @@
+import copy
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import RoutePlannerService
+
+FIXTURE_VERSION = 1
+# Coordinates are rounded before hashing, so that float noise does not change the key
+KEY_FLOAT_DIGITS = 6
+
+
+class FixtureMode(str, Enum):
+    OFF = "off"
+    # Call the wrapped planner and store every response
+    RECORD = "record"
+    # Serve stored responses only; unknown requests raise FixtureMissError
+    REPLAY = "replay"
+    # Serve stored responses, record the unknown ones
+    REPLAY_OR_RECORD = "replay_or_record"
+
+
+class FixtureMissError(LookupError):
+    pass
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Latency injected when replaying. Each call sleeps for the median of its method
+    (or `default_s`), spread log-normally by `sigma`; with `use_recorded`, for the latency
+    measured when the response was recorded, times `recorded_scale`.
+    """
+
+    median_s: Dict[str, float] = field(default_factory=dict)
+    default_s: float = 0.0
+    sigma: float = 0.0
+    use_recorded: bool = False
+    recorded_scale: float = 1.0
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def delay(self, method: str, recorded_s: Optional[float]) -> float:
+        if self.use_recorded and recorded_s is not None:
+            return recorded_s * self.recorded_scale
+        median = self.median_s.get(method, self.default_s)
+        if median <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return median
+        return self._rng.lognormvariate(0.0, self.sigma) * median
+
+
+LATENCY_PROFILES: Dict[str, LatencyProfile] = {
+    "zero": LatencyProfile(),
+    "recorded": LatencyProfile(use_recorded=True),
+    # Rough public ORS API latencies
+    "ors": LatencyProfile(
+        median_s={
+            "get_coordinates": 0.25,
+            "compute_distance_matrix": 0.4,
+            "get_directions": 0.6,
+        },
+        sigma=0.35,
+        seed=0,
+    ),
+}
+
+
+def get_latency_profile(name: str) -> LatencyProfile:
+    try:
+        profile = LATENCY_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown latency profile: {name} (expected one of {', '.join(LATENCY_PROFILES)})"
+        )
+    return copy.deepcopy(profile)
+
+
+def request_key(method: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"method": method, "params": _normalize(params)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _normalize(value):
+    if isinstance(value, float):
+        return round(value, KEY_FLOAT_DIGITS)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if hasattr(value, "item"):
+        # numpy scalars
+        return _normalize(value.item())
+    return value
+
+
+class RecordingRoutePlanner(RoutePlannerService):
+    """
+    Records the responses of the wrapped planner (`get_coordinates`, `compute_distance_matrix`,
+    `get_directions`) to a gzip JSON fixture file keyed by a hash of the request,
+    and replays them from memory, with zero or injected latency.
+    With `autosave`, the file is rewritten after a recorded call, at most once per
+    `autosave_interval_s`; `save` writes the rest.
+    Other attributes (metric, profile, client, ...) are read from the wrapped planner.
+    """
+
+    def __init__(
+        self,
+        route_planner: RoutePlannerService,
+        fixture_path: str,
+        mode: FixtureMode = FixtureMode.REPLAY,
+        latency: Optional[LatencyProfile] = None,
+        autosave: bool = True,
+        autosave_interval_s: float = 0.0,
+    ):
+        self.route_planner = route_planner
+        self.fixture_path = fixture_path
+        self.mode = FixtureMode(mode)
+        self.latency = latency or LatencyProfile()
+        self.autosave = autosave
+        self.autosave_interval_s = autosave_interval_s
+        # Entries recorded since the last save
+        self.unsaved = 0
+        self._saved_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self.load(fixture_path)
+
+    def __getattr__(self, name):
+        if name == "route_planner":
+            raise AttributeError(name)
+        return getattr(self.route_planner, name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def load(fixture_path: str) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(fixture_path):
+            return {}
+        with gzip.open(fixture_path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FIXTURE_VERSION:
+            raise ValueError(
+                f"Unsupported fixture version {data.get('version')} in {fixture_path}"
+            )
+        return data["entries"]
+
+    def save(self) -> None:
+        # Recording goes on while the file is written
+        with self._lock:
+            data = {"version": FIXTURE_VERSION, "entries": dict(self._entries)}
+            self.unsaved = 0
+            self._saved_at = time.monotonic()
+        with self._save_lock:
+            directory = os.path.dirname(self.fixture_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.fixture_path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.fixture_path)
+
+    def _call(self, method: str, **params):
+        key = request_key(method, params)
+        if self.mode != FixtureMode.RECORD:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                delay = self.latency.delay(method, entry.get("elapsed_s"))
+                if delay > 0:
+                    time.sleep(delay)
+                return copy.deepcopy(entry["response"])
+            self.misses += 1
+            if self.mode == FixtureMode.REPLAY:
+                raise FixtureMissError(
+                    f"No recorded {method} response for {_normalize(params)} in {self.fixture_path}"
+                )
+
+        start = time.perf_counter()
+        response = getattr(self.route_planner, method)(**params)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._entries[key] = {
+                "method": method,
+                "request": _normalize(params),
+                # Round-trip through JSON so that the stored response is what replay returns
+                "response": json.loads(json.dumps(response, default=str)),
+                "elapsed_s": round(elapsed, 6),
+                # Time of day of the response, for calibrating travel times (UTC)
+                "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+            }
+            self.unsaved += 1
+            due = (
+                self._saved_at is None
+                or time.monotonic() - self._saved_at >= self.autosave_interval_s
+            )
+        if self.autosave and due:
+            self.save()
+        return response
+
+    def initialize_client(self):
+        return self.route_planner.initialize_client()
+
+    def format_address(self, address, postal_code, city, country):
+        return self.route_planner.format_address(
+            address=address, postal_code=postal_code, city=city, country=country
+        )
+
+    def get_coordinates(
+        self, address: str, postal_code: str, city: str, country: str
+    ) -> List[float]:
+        return self._call(
+            "get_coordinates",
+            address=address,
+            postal_code=postal_code,
+            city=city,
+            country=country,
+        )
+
+    def compute_distance_matrix(self, coords: List[List[float]]):
+        return self._call("compute_distance_matrix", coords=coords)
+
+    def get_directions(
+        self,
+        coordinates: List[Tuple[float]],
+        optimize_waypoints: bool,
+        format: str = "geojson",
+    ):
+        return self._call(
+            "get_directions",
+            coordinates=coordinates,
+            optimize_waypoints=optimize_waypoints,
+            format=format,
+        )
+
+    def get_optimize_route(self, order_locations: List[Tuple[float]]):
+        return self.route_planner.get_optimize_route(order_locations)
+
+    def format_direction_response(
+        self, coordinates: List[Tuple[float]], direction_response: dict
+    ) -> dict:
+        return self.route_planner.format_direction_response(
+            coordinates=coordinates, direction_response=direction_response
+        )
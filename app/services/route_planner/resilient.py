@@ -0,0 +1,314 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.metrics import ROUTE_PLANNER_CIRCUIT_OPEN, ROUTE_PLANNER_FALLBACKS
+from .base import RoutePlannerService
+from .recording import request_key
+
+# Key set on the responses of the fallback planner
+APPROXIMATE_KEY = "approximate"
+# Response keys kept as arrays by ResponseCache
+MATRIX_KEYS = ("durations", "distances")
+# Monotonic time after which the calls of the current run stop waiting for the exact planner
+_deadline: ContextVar[Optional[float]] = ContextVar("route_planner_deadline", default=None)
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class RoutePlannerUnavailableError(RuntimeError):
+    pass
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures: calls are then refused for
+    `reset_timeout_s`. After that, a single trial call goes through (half-open); its success
+    closes the breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+        if self.clock() - self._opened_at < self.reset_timeout_s:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == CircuitState.CLOSED:
+                return True
+            if state == CircuitState.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+        ROUTE_PLANNER_CIRCUIT_OPEN.set(0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+            opened = self._opened_at is not None
+        ROUTE_PLANNER_CIRCUIT_OPEN.set(1 if opened else 0)
+
+
+class ResponseCache:
+    """
+    LRU cache of the last exact responses, by request key, bounded by their size in bytes;
+    0 disables it. Matrices are kept as read-only float arrays and the rest of a response as
+    JSON, so that entries are compact and never shared with the callers. A response larger
+    than the whole cache is not kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Dict[str, np.ndarray], str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        matrices, rest, _ = entry
+        response = json.loads(rest)
+        for name, matrix in matrices.items():
+            missing = np.isnan(matrix)
+            # Missing routes were stored as NaN
+            response[name] = (
+                np.where(missing, None, matrix) if missing.any() else matrix
+            ).tolist()
+        return response
+
+    def set(self, key: str, response: Any) -> None:
+        if self.max_bytes <= 0:
+            return
+        names = [
+            name
+            for name in MATRIX_KEYS
+            if isinstance(response, dict) and isinstance(response.get(name), list)
+        ]
+        # Matrix sizes are known before converting them
+        matrix_bytes = sum(
+            8 * len(response[name]) * len(response[name][0]) for name in names if response[name]
+        )
+        if matrix_bytes > self.max_bytes:
+            return
+        matrices = {}
+        for name in names:
+            matrix = np.array(response[name], dtype=float)
+            matrix.flags.writeable = False
+            matrices[name] = matrix
+        rest = json.dumps(
+            {k: v for k, v in response.items() if k not in matrices}
+            if isinstance(response, dict)
+            else response,
+            default=str,
+        )
+        size = matrix_bytes + len(rest)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[2]
+            self._entries[key] = (matrices, rest, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Calls run in worker threads so that a hanging provider can be given up on
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="route-planner")
+        return _executor
+
+
+class ResilientRoutePlanner(RoutePlannerService):
+    """
+    Guards the calls to the wrapped (exact) planner with a circuit breaker, a timeout per call
+    and a budget per optimizer run (see `budget`). When a distance matrix or directions call
+    fails, times out, runs out of budget or is refused by the open breaker, the last exact
+    response to the same request is served from `cache`, or else the `fallback` planner's
+    (approximate) one, marked with `"approximate": True`. Geocoding has no fallback: it
+    raises RoutePlannerUnavailableError instead.
+    Other attributes (metric, profile, client, ...) are read from the wrapped planner.
+    """
+
+    def __init__(
+        self,
+        route_planner: RoutePlannerService,
+        fallback: RoutePlannerService,
+        breaker: Optional[CircuitBreaker] = None,
+        cache: Optional[ResponseCache] = None,
+        timeout_s: float = 5.0,
+        run_budget_s: float = 30.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.route_planner = route_planner
+        self.fallback = fallback
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache or ResponseCache(max_bytes=64 * 2**20)
+        self.timeout_s = timeout_s
+        self.run_budget_s = run_budget_s
+        self.logger = logger or logging.getLogger(__name__)
+
+    def __getattr__(self, name):
+        if name == "route_planner":
+            raise AttributeError(name)
+        return getattr(self.route_planner, name)
+
+    @contextmanager
+    def budget(self) -> Iterator[None]:
+        """
+        The calls made within the block wait at most `run_budget_s` in total for the
+        exact planner; past it, they are served by the fallbacks at once.
+        """
+        token = _deadline.set(time.monotonic() + self.run_budget_s)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    def _call_exact(self, method: str, **params) -> Tuple[Optional[Any], str]:
+        """
+        The exact response, or None and the reason it is not available.
+        """
+        timeout = self.timeout_s
+        deadline = _deadline.get()
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                return None, "budget"
+        if not self.breaker.allow():
+            return None, "open"
+        future = _get_executor().submit(getattr(self.route_planner, method), **params)
+        try:
+            response = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self.breaker.record_failure()
+            return None, "timeout"
+        except Exception as e:
+            self.breaker.record_failure()
+            self.logger.warning("Route planner %s failed: %s", method, e)
+            return None, "error"
+        self.breaker.record_success()
+        return response, "ok"
+
+    def _call(self, method: str, **params):
+        response, reason = self._call_exact(method, **params)
+        key = request_key(method, params)
+        if response is not None:
+            self.cache.set(key, response)
+            return response
+
+        cached = self.cache.get(key)
+        ROUTE_PLANNER_FALLBACKS.labels(
+            method, reason, "cache" if cached is not None else "approximate"
+        ).inc()
+        if cached is not None:
+            return cached
+        self.logger.warning(
+            "Route planner %s unavailable (%s): serving an approximate response", method, reason
+        )
+        response = getattr(self.fallback, method)(**params)
+        response[APPROXIMATE_KEY] = True
+        return response
+
+    def initialize_client(self):
+        return self.route_planner.initialize_client()
+
+    def format_address(self, address, postal_code, city, country):
+        return self.route_planner.format_address(
+            address=address, postal_code=postal_code, city=city, country=country
+        )
+
+    def get_coordinates(
+        self, address: str, postal_code: str, city: str, country: str
+    ) -> List[float]:
+        coordinates, reason = self._call_exact(
+            "get_coordinates",
+            address=address,
+            postal_code=postal_code,
+            city=city,
+            country=country,
+        )
+        if coordinates is None:
+            raise RoutePlannerUnavailableError(f"Geocoding unavailable ({reason})")
+        return coordinates
+
+    def compute_distance_matrix(self, coords: List[List[float]]):
+        return self._call("compute_distance_matrix", coords=coords)
+
+    def get_directions(
+        self,
+        coordinates: List[Tuple[float]],
+        optimize_waypoints: bool,
+        format: str = "geojson",
+    ):
+        return self._call(
+            "get_directions",
+            coordinates=coordinates,
+            optimize_waypoints=optimize_waypoints,
+            format=format,
+        )
+
+    def get_optimize_route(self, order_locations: List[Tuple[float]]):
+        return self.route_planner.get_optimize_route(order_locations)
+
+    def format_direction_response(
+        self, coordinates: List[Tuple[float]], direction_response: dict
+    ) -> dict:
+        return self.route_planner.format_direction_response(
+            coordinates=coordinates, direction_response=direction_response
+        )
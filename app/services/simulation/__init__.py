@@ -0,0 +1,10 @@
+from .engine import (
+    RELAXATION_STRATEGIES,
+    OrderOutcome,
+    SimulatedClock,
+    SimulationConfig,
+    SimulationResult,
+    Simulator,
+    simulate,
+)
+from .sweep import parameter_grid, sweep, with_overrides
@@ -0,0 +1,449 @@
+import heapq
+import logging
+import statistics
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import PizzaPreparationSettings
+from app.database import Base
+from app.models import cluster, driver, order, restaurant, user  # noqa: F401 (register mappers)
+from app.models.driver import Driver, DriverStatus
+from app.models.order import Order
+from app.services.orders import OrdersOptimizer
+from app.services.synthetic import ScenarioConfig, SyntheticScenario, generate_scenario, persist_scenario
+
+# An evening: the optimizer only sees the simulated clock, so any fixed date works
+DEFAULT_START = datetime(2025, 1, 3, 18, 0)
+
+RELAXATION_STRATEGIES = {
+    "hotness": OrdersOptimizer.relax_hotness,
+    "lateness": OrdersOptimizer.relax_lateness,
+}
+
+logger = logging.getLogger("simulation")
+
+
+class EventType(IntEnum):
+    # Simultaneous events are handled in this order: returning drivers and new orders
+    # are visible to a dispatch happening at the same time
+    DRIVER_RETURN = 0
+    ORDER_ARRIVAL = 1
+    DISPATCH = 2
+    # Trip planned by an earlier dispatch for a returning driver: its pizzas go in the kitchen
+    CHAINED_TRIP = 3
+
+
+class SimulatedClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class Kitchen:
+    """
+    Prep station and ovens shared by all clusters, with the capacities of
+    OrdersOptimizer.estimate_latest_pizza_ready_time (which assumes an idle kitchen):
+    the chefs prepare `prep_capacity` pizzas per cycle, ovens bake `oven_capacity` pizzas
+    per batch. A cluster's pizzas are prepared once the chefs are done with earlier ones,
+    and baked as soon as both they and an oven batch are available.
+    """
+
+    def __init__(self, settings: PizzaPreparationSettings, opens_at: datetime):
+        self.prep_capacity = OrdersOptimizer.prep_capacity(
+            settings.CHEFS, settings.CHEF_EXPERIENCE, settings.CHEF_CAPACITY
+        )
+        self.prep_cycle = timedelta(seconds=OrdersOptimizer.PREP_CYCLE_SECONDS)
+        self.oven_capacity = settings.NUM_OVENS * settings.SINGLE_OVEN_CAPACITY
+        self.bake_time = timedelta(seconds=settings.BAKE_TIMES[settings.PIZZA_TYPE])
+        self.prep_free_at = self.oven_free_at = opens_at
+
+    def cook(self, pizzas: int, now: datetime) -> datetime:
+        """
+        Queue the pizzas of a cluster; returns when the last one leaves the oven.
+        """
+        if pizzas == 0:
+            return now
+        prepared = []
+        t = max(now, self.prep_free_at)
+        while len(prepared) < pizzas:
+            t += self.prep_cycle
+            prepared.extend([t] * min(self.prep_capacity, pizzas - len(prepared)))
+        self.prep_free_at = t
+        ready_at = now
+        for i in range(0, pizzas, self.oven_capacity):
+            start = max(prepared[min(i + self.oven_capacity, pizzas) - 1], self.oven_free_at)
+            ready_at = self.oven_free_at = start + self.bake_time
+        return ready_at
+
+
+@dataclass
+class SimulationConfig:
+    """
+    An evening of synthetic demand. Order i is placed `order_lead_minutes` (uniform range)
+    before its desired delivery time, never before the start; the optimizer runs every
+    `dispatch_interval_minutes`.
+    """
+
+    scenario: ScenarioConfig = field(
+        default_factory=lambda: ScenarioConfig(start=DEFAULT_START)
+    )
+    order_lead_minutes: Tuple[float, float] = (30.0, 60.0)
+    dispatch_interval_minutes: float = 5.0
+    # Time spent at each door (the optimizer assumes 120 s)
+    payment_seconds: float = 120.0
+    # ClusteringSettings fields overriding the scenario defaults
+    clustering: Dict[str, Any] = field(default_factory=dict)
+    # Names in RELAXATION_STRATEGIES, applied in order at each relaxation round
+    relaxation: Tuple[str, ...] = ("hotness", "lateness")
+    # Hard stop, after the start
+    max_minutes: float = 12 * 60
+    # Deliveries later than this after the pizzas are ready count as cold
+    max_hotness_minutes: float = 20.0
+    # SLO of the report: delivered at most this late (undelivered orders miss it)
+    slo_lateness_minutes: float = 10.0
+
+
+@dataclass
+class OrderOutcome:
+    order_id: int
+    placed_at: datetime
+    desired_delivery_time: datetime
+    dispatched_at: Optional[datetime] = None
+    ready_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    driver_id: Optional[int] = None
+    priority: bool = False
+
+    @property
+    def lateness_s(self) -> Optional[float]:
+        if self.delivered_at is None:
+            return None
+        return max(0.0, (self.delivered_at - self.desired_delivery_time).total_seconds())
+
+    @property
+    def latency_s(self) -> Optional[float]:
+        """
+        Time between the order being placed and delivered.
+        """
+        if self.delivered_at is None:
+            return None
+        return (self.delivered_at - self.placed_at).total_seconds()
+
+    @property
+    def hotness_s(self) -> Optional[float]:
+        """
+        Time between the pizzas leaving the oven and the delivery.
+        """
+        if self.delivered_at is None:
+            return None
+        return (self.delivered_at - self.ready_at).total_seconds()
+
+
+@dataclass
+class SimulationResult:
+    config: SimulationConfig
+    start: datetime
+    end: datetime
+    orders: Dict[int, OrderOutcome]
+    # Seconds each driver spent on the road (to the restaurant, deliveries, return)
+    driver_busy_s: Dict[int, float]
+    optimizer_runs: int
+    optimizer_wall_s: float
+    wall_s: float
+
+    def summary(self) -> Dict[str, Any]:
+        delivered = [o for o in self.orders.values() if o.delivered_at is not None]
+        lateness = [o.lateness_s / 60 for o in delivered]
+        hotness = [o.hotness_s / 60 for o in delivered]
+        span_s = max((self.end - self.start).total_seconds(), 1.0)
+        utilization = [busy / span_s for busy in self.driver_busy_s.values()]
+        return {
+            "orders": len(self.orders),
+            "delivered": len(delivered),
+            "undelivered": len(self.orders) - len(delivered),
+            "on_time_rate": _ratio(sum(1 for x in lateness if x == 0), len(delivered)),
+            "lateness_min": _distribution(lateness),
+            "hotness_min": _distribution(hotness),
+            "cold_rate": _ratio(
+                sum(1 for x in hotness if x > self.config.max_hotness_minutes), len(delivered)
+            ),
+            "driver_utilization": _distribution(utilization),
+            "simulated_minutes": round(span_s / 60, 1),
+            "optimizer_runs": self.optimizer_runs,
+            "optimizer_wall_s": round(self.optimizer_wall_s, 3),
+            "wall_s": round(self.wall_s, 3),
+            "slo": self.slo_report(),
+        }
+
+    def slo_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Lateness and latency of priority and normal orders, against the SLO of the
+        config (`slo_lateness_minutes`).
+        """
+        report = {}
+        for name, priority in (("priority", True), ("normal", False)):
+            outcomes = [o for o in self.orders.values() if o.priority == priority]
+            delivered = [o for o in outcomes if o.delivered_at is not None]
+            report[name] = {
+                "orders": len(outcomes),
+                "delivered": len(delivered),
+                "within_slo_rate": _ratio(
+                    sum(
+                        1
+                        for o in delivered
+                        if o.lateness_s <= self.config.slo_lateness_minutes * 60
+                    ),
+                    len(outcomes),
+                ),
+                "lateness_min": _distribution([o.lateness_s / 60 for o in delivered]),
+                "latency_min": _distribution([o.latency_s / 60 for o in delivered]),
+                "hotness_min": _distribution([o.hotness_s / 60 for o in delivered]),
+            }
+        return report
+
+
+def _ratio(count: int, total: int) -> Optional[float]:
+    return round(count / total, 4) if total else None
+
+
+def _distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    return {
+        "mean": round(statistics.fmean(values), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(max(values), 3),
+    }
+
+
+class Simulator:
+    """
+    Discrete-event replay of an evening against OrdersOptimizer, on a simulated clock.
+
+    Orders are inserted in an in-memory database when placed, and the optimizer runs
+    periodically on the pending ones. For every assignment:
+    - the cluster's pizzas are queued in the kitchen (see Kitchen); trips chained to a
+      returning driver are queued later, in time for their planned departure
+    - the driver, once back from its previous trip, drives to the restaurant (duration from
+      the route planner matrix), leaves when the pizzas are ready, follows the cluster
+      route and drives back; it is then available at the restaurant
+    The run stops when every order is assigned, or when nothing can change any more (no
+    order to come, every driver back and no assignment in the last dispatch), or at
+    `max_minutes`. Orders still pending are then undelivered.
+    """
+
+    def __init__(self, config: SimulationConfig, scenario: Optional[SyntheticScenario] = None):
+        self.config = config
+        self.scenario = scenario or generate_scenario(config.scenario)
+        self.start = self.scenario.config.start
+        self.clock = SimulatedClock(self.start)
+        self.route_planner = self.scenario.route_planner()
+        self.restaurant = self.scenario.restaurant
+        self.db = self._create_db()
+        self.optimizer = OrdersOptimizer(
+            db=self.db,
+            route_planner=self.route_planner,
+            clustering_settings=self.scenario.clustering_settings(**config.clustering),
+            pizza_prep_settings=self.scenario.pizza_prep_settings,
+            logger=logger,
+            clock=self.clock,
+            relaxation_strategies=[RELAXATION_STRATEGIES[name] for name in config.relaxation],
+        )
+        self._events: List[Tuple[datetime, int, int, Any]] = []
+        self._seq = 0
+        self.outcomes: Dict[int, OrderOutcome] = {}
+        self.pending: set = set()
+        self.arrivals_left = 0
+        self.kitchen = Kitchen(self.scenario.pizza_prep_settings, opens_at=self.start)
+        # Driver -> (when it is free, where it is then)
+        self.driver_free: Dict[int, Tuple[datetime, Tuple[float, float]]] = {}
+        self.driver_busy_s: Dict[int, float] = {}
+        # Driver -> planned return from its last chained trip
+        self.chain_end: Dict[int, datetime] = {}
+        self.optimizer_runs = 0
+        self.optimizer_wall_s = 0.0
+
+    def _create_db(self) -> Session:
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        return sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+
+    def schedule(self, at: datetime, event: EventType, payload: Any = None) -> None:
+        heapq.heappush(self._events, (at, int(event), self._seq, payload))
+        self._seq += 1
+
+    def placement_times(self) -> List[datetime]:
+        low, high = self.config.order_lead_minutes
+        rng = np.random.default_rng(self.scenario.config.seed)
+        leads = rng.uniform(low, high, size=len(self.scenario.orders))
+        return [
+            max(self.start, o.desired_delivery_time - timedelta(minutes=float(lead)))
+            for o, lead in zip(self.scenario.orders, leads)
+        ]
+
+    def setup(self) -> None:
+        persist_scenario(self.db, replace(self.scenario, orders=[]))
+        for order_, placed_at in zip(self.scenario.orders, self.placement_times()):
+            order_.created_at = placed_at
+            self.outcomes[order_.id] = OrderOutcome(
+                order_id=order_.id,
+                placed_at=placed_at,
+                desired_delivery_time=order_.desired_delivery_time,
+                priority=order_.priority,
+            )
+            self.schedule(placed_at, EventType.ORDER_ARRIVAL, order_)
+        self.arrivals_left = len(self.scenario.orders)
+        for driver_ in self.scenario.drivers:
+            self.driver_busy_s[driver_.id] = 0.0
+            free_at = driver_.estimated_finish_time or self.start
+            self.driver_free[driver_.id] = (free_at, (driver_.lon, driver_.lat))
+            if driver_.status == DriverStatus.DELIVERING:
+                self.schedule(free_at, EventType.DRIVER_RETURN, (driver_.id, free_at))
+        self.schedule(self.start, EventType.DISPATCH)
+
+    async def run(self) -> SimulationResult:
+        wall_start = time.perf_counter()
+        self.setup()
+        end = self.start + timedelta(minutes=self.config.max_minutes)
+        last = self.start
+        while self._events:
+            at, event, _, payload = heapq.heappop(self._events)
+            if at > end:
+                break
+            self.clock.now = last = at
+            if event == EventType.ORDER_ARRIVAL:
+                self.on_order_arrival(payload)
+            elif event == EventType.DRIVER_RETURN:
+                self.on_driver_return(*payload)
+            elif event == EventType.CHAINED_TRIP:
+                self.dispatch(*payload)
+                self.db.commit()
+            else:
+                await self.on_dispatch()
+        # Deliveries already scheduled happen, even after the last event
+        delivered = [o.delivered_at for o in self.outcomes.values() if o.delivered_at]
+        return SimulationResult(
+            config=self.config,
+            start=self.start,
+            end=max([last] + delivered),
+            orders=self.outcomes,
+            driver_busy_s=self.driver_busy_s,
+            optimizer_runs=self.optimizer_runs,
+            optimizer_wall_s=self.optimizer_wall_s,
+            wall_s=time.perf_counter() - wall_start,
+        )
+
+    def on_order_arrival(self, order_: Order) -> None:
+        persist_scenario(self.db, replace(self.scenario, users=[], drivers=[], orders=[order_]))
+        self.pending.add(order_.id)
+        self.arrivals_left -= 1
+
+    def on_driver_return(self, driver_id: int, free_at: datetime) -> None:
+        if self.driver_free[driver_id][0] != free_at:
+            # Assigned again meanwhile: the newer trip decides
+            return
+        lon, lat = self.driver_free[driver_id][1]
+        self.db.query(Driver).filter(Driver.id == driver_id).update(
+            {
+                Driver.status: DriverStatus.AVAILABLE,
+                Driver.estimated_finish_time: None,
+                Driver.lat: lat,
+                Driver.lon: lon,
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+    async def on_dispatch(self) -> None:
+        assigned = {}
+        if self.pending:
+            run_start = time.perf_counter()
+            out = await self.optimizer.run()
+            self.optimizer_wall_s += time.perf_counter() - run_start
+            self.optimizer_runs += 1
+            assigned = out["driver_to_cluster"]
+            for driver_id, trips in out["chained_trips"].items():
+                self.chain_end[driver_id] = trips[-1]["return_time"]
+            # Into the kitchen in the optimizer's sequence: priority clusters first
+            for driver_id, assignment in sorted(
+                assigned.items(), key=lambda item: self.optimizer.kitchen_order(item[1]["cluster"])
+            ):
+                self.dispatch(driver_id, assignment["cluster"])
+            for driver_id, trips in out["chained_trips"].items():
+                for trip in trips:
+                    # The kitchen starts in time for the planned departure
+                    cluster_ = trip["cluster"]
+                    lead = self.optimizer.cluster_ready_time(cluster_, self.clock.now) - self.clock.now
+                    self.schedule(
+                        max(self.clock.now, trip["departure_time"] - lead),
+                        EventType.CHAINED_TRIP,
+                        (driver_id, cluster_),
+                    )
+            self.db.commit()
+        drivers_out = any(free_at > self.clock.now for free_at, _ in self.driver_free.values())
+        # Pending orders only get later: with the same drivers, they stay unassigned
+        stalled = not assigned and not drivers_out
+        if self.arrivals_left or (self.pending and not stalled):
+            self.schedule(
+                self.clock.now + timedelta(minutes=self.config.dispatch_interval_minutes),
+                EventType.DISPATCH,
+            )
+
+    def travel_seconds(self, origin: Tuple[float, float], destination: Tuple[float, float]) -> float:
+        if origin == destination:
+            return 0.0
+        matrix = self.route_planner.compute_distance_matrix(coords=[origin, destination])
+        return float(matrix["durations"][0][1])
+
+    def dispatch(self, driver_id: int, order_cluster) -> None:
+        now = self.clock.now
+        ready_at = self.kitchen.cook(order_cluster.total_items, now)
+
+        free_at, position = self.driver_free[driver_id]
+        leg_s = self.travel_seconds(position, self.restaurant)
+        at_restaurant = max(now, free_at) + timedelta(seconds=leg_s)
+        departure = max(ready_at, at_restaurant)
+
+        route = order_cluster.cluster_route
+        t = departure
+        # The last segment is the way back to the restaurant
+        for order_id, segment in zip(route.order_ids, route.segments[:-1]):
+            t += timedelta(seconds=segment.duration)
+            outcome = self.outcomes[order_id]
+            outcome.dispatched_at = now
+            outcome.ready_at = ready_at
+            outcome.delivered_at = t
+            outcome.driver_id = driver_id
+            self.pending.discard(order_id)
+            t += timedelta(seconds=self.config.payment_seconds)
+        back_at = t + timedelta(seconds=route.segments[-1].duration)
+
+        self.driver_busy_s[driver_id] += leg_s + (back_at - departure).total_seconds()
+        self.driver_free[driver_id] = (back_at, self.restaurant)
+        # The optimizer marked the driver as delivering: expose when it will be back,
+        # after the trips still chained to it
+        self.db.query(Driver).filter(Driver.id == driver_id).update(
+            {Driver.estimated_finish_time: max(back_at, self.chain_end.get(driver_id, back_at))},
+            synchronize_session=False,
+        )
+        self.schedule(back_at, EventType.DRIVER_RETURN, (driver_id, back_at))
+
+
+async def simulate(
+    config: SimulationConfig, scenario: Optional[SyntheticScenario] = None
+) -> SimulationResult:
+    return await Simulator(config, scenario=scenario).run()
@@ -0,0 +1,70 @@
+import asyncio
+import copy
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import is_dataclass, replace
+from typing import Any, Dict, List, Sequence
+
+from .engine import SimulationConfig, simulate
+
+
+def with_overrides(config: SimulationConfig, overrides: Dict[str, Any]) -> SimulationConfig:
+    """
+    Copy of `config` with dotted fields replaced, e.g.
+    {"clustering.CLUSTER_DISTANCE_THRESHOLD": 90, "scenario.kitchen.chefs": 3}.
+    Dict fields (clustering) accept new keys.
+    """
+    config = copy.deepcopy(config)
+    for path, value in overrides.items():
+        config = _set_path(config, path.split("."), value, path)
+    return config
+
+
+def _set_path(obj, keys: List[str], value, path: str):
+    key, rest = keys[0], keys[1:]
+    if isinstance(obj, dict):
+        current = obj.get(key)
+        return {**obj, key: _set_path(current, rest, value, path) if rest else value}
+    if not is_dataclass(obj) or not hasattr(obj, key):
+        raise ValueError(f"Unknown simulation parameter: {path}")
+    current = getattr(obj, key)
+    return replace(obj, **{key: _set_path(current, rest, value, path) if rest else value})
+
+
+def parameter_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of the grid values, in a stable order.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def run_point(config: SimulationConfig, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One sweep point, run in a worker process.
+    """
+    result = asyncio.run(simulate(with_overrides(config, params)))
+    return {"params": params, "summary": result.summary()}
+
+
+def sweep(
+    config: SimulationConfig,
+    grid: Dict[str, Sequence[Any]],
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Simulate every point of `grid` over the same evening (same seed), in `workers`
+    processes. Results are in grid order.
+    """
+    points = parameter_grid(grid)
+    # Fail before starting processes
+    for params in points:
+        with_overrides(config, params)
+    if workers <= 1:
+        return [run_point(config, params) for params in points]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        return list(executor.map(run_point, itertools.repeat(config), points))
@@ -0,0 +1,11 @@
+from .city import Hotspot, SyntheticCity
+from .route_planner import SyntheticRoutePlanner
+from .scenario import (
+    DemandConfig,
+    FleetConfig,
+    KitchenConfig,
+    ScenarioConfig,
+    SyntheticScenario,
+    generate_scenario,
+    persist_scenario,
+)
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+from app.services.route_planner.geometry import offset_coordinates
+
+
+@dataclass
+class Hotspot:
+    """
+    Dense area (e.g. nightlife district, university): gaussian around (lon, lat).
+    """
+
+    lon: float
+    lat: float
+    spread_km: float = 0.8
+    weight: float = 1.0
+
+
+def default_hotspots() -> List[Hotspot]:
+    # Milan: Navigli, Brera, Porta Venezia, Città Studi
+    return [
+        Hotspot(lon=9.1760, lat=45.4520, spread_km=0.7, weight=3.0),
+        Hotspot(lon=9.1870, lat=45.4720, spread_km=0.6, weight=2.0),
+        Hotspot(lon=9.2050, lat=45.4750, spread_km=0.7, weight=2.0),
+        Hotspot(lon=9.2280, lat=45.4780, spread_km=0.9, weight=1.0),
+    ]
+
+
+@dataclass
+class SyntheticCity:
+    """
+    Spatial distribution of the delivery addresses, as a mixture of:
+    - hotspots (`hotspot_share` of the points)
+    - suburbs: uniform over the ring between `suburb_inner_km` and `radius_km` (`suburb_share`)
+    - uniform over the whole disc of `radius_km` (the rest)
+    """
+
+    center_lon: float = 9.1900
+    center_lat: float = 45.4642
+    radius_km: float = 8.0
+    hotspots: List[Hotspot] = field(default_factory=default_hotspots)
+    hotspot_share: float = 0.6
+    suburb_share: float = 0.2
+    suburb_inner_km: float = 5.0
+
+    def sample_locations(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """
+        Returns a (n, 2) array of (lon, lat).
+        """
+        components = rng.choice(
+            3,
+            size=n,
+            p=[self.hotspot_share, self.suburb_share, 1 - self.hotspot_share - self.suburb_share],
+        )
+        lon = np.empty(n)
+        lat = np.empty(n)
+
+        in_hotspot = np.flatnonzero(components == 0)
+        if in_hotspot.size and self.hotspots:
+            weights = np.array([h.weight for h in self.hotspots], dtype=float)
+            picked = rng.choice(len(self.hotspots), size=in_hotspot.size, p=weights / weights.sum())
+            for k, hotspot in enumerate(self.hotspots):
+                idx = in_hotspot[picked == k]
+                dx, dy = rng.normal(0.0, hotspot.spread_km, size=(2, idx.size))
+                lon[idx], lat[idx] = offset_coordinates(hotspot.lon, hotspot.lat, dx, dy)
+        else:
+            components[in_hotspot] = 2
+
+        for component, inner_km in ((1, self.suburb_inner_km), (2, 0.0)):
+            idx = np.flatnonzero(components == component)
+            # Uniform over the ring: sample the squared radius uniformly
+            r = np.sqrt(rng.uniform(inner_km**2, self.radius_km**2, size=idx.size))
+            theta = rng.uniform(0.0, 2 * np.pi, size=idx.size)
+            lon[idx], lat[idx] = offset_coordinates(
+                self.center_lon, self.center_lat, r * np.cos(theta), r * np.sin(theta)
+            )
+        return np.column_stack([lon, lat])
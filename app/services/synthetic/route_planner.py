@@ -0,0 +1,106 @@
+import hashlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.route_planner.base import RoutePlannerService
+from app.services.route_planner.geometry import haversine_matrix, nearest_neighbour_order
+from app.services.route_planner.parsing import (
+    build_directions_response,
+    parse_directions_response,
+)
+from .city import SyntheticCity
+
+
+class SyntheticRoutePlanner(RoutePlannerService):
+    """
+    Offline route planner over a synthetic road metric: road distance is the great-circle
+    distance times `detour_factor`, travelled at `speed_kmh`.
+    Responses have the shape of the ORS ones, so the optimizer runs unchanged.
+    """
+
+    def __init__(
+        self,
+        city: Optional[SyntheticCity] = None,
+        metric: str = "duration",
+        detour_factor: float = 1.35,
+        speed_kmh: float = 25.0,
+        profile: str = "synthetic",
+    ):
+        self.city = city or SyntheticCity()
+        self.metric = metric
+        self.detour_factor = detour_factor
+        self.speed_kmh = speed_kmh
+        self.profile = profile
+        self.client = self.initialize_client()
+
+    def initialize_client(self) -> None:
+        return None
+
+    @staticmethod
+    def format_address(address, postal_code, city, country):
+        return f"{address}, {postal_code}, {city}, {country}"
+
+    def get_coordinates(
+        self, address: str, postal_code: str, city: str, country: str
+    ) -> List[float]:
+        """
+        Deterministic geocoding: the address seeds a draw from the city distribution.
+        """
+        formatted_address = self.format_address(address, postal_code, city, country)
+        seed = int.from_bytes(
+            hashlib.sha256(formatted_address.lower().encode()).digest()[:8], "big"
+        )
+        lon, lat = self.city.sample_locations(np.random.default_rng(seed), 1)[0]
+        return [float(lon), float(lat)]
+
+    def road_distances(
+        self, sources: List[Tuple[float]], destinations: Optional[List[Tuple[float]]] = None
+    ) -> np.ndarray:
+        return haversine_matrix(sources, destinations) * self.detour_factor
+
+    def road_durations(self, distances: np.ndarray) -> np.ndarray:
+        return distances / (self.speed_kmh / 3.6)
+
+    def compute_distance_matrix(self, coords: List[List[float]]) -> dict:
+        distances = self.road_distances(coords)
+        if self.metric == "duration":
+            return {"durations": self.road_durations(distances).round(2).tolist()}
+        return {"distances": distances.round(2).tolist()}
+
+    def get_directions(
+        self,
+        coordinates: List[Tuple[float]],
+        optimize_waypoints: bool,
+        format: str = "json",
+    ) -> dict:
+        coordinates = [tuple(coord) for coord in coordinates]
+        visits = coordinates[1:-1]
+        if optimize_waypoints and len(visits) > 1:
+            visits = self._nearest_neighbour_order(coordinates[0], visits)
+        ordered = [coordinates[0]] + visits + [coordinates[-1]]
+
+        distances = self.road_distances(ordered)
+        return build_directions_response(
+            coordinates=ordered,
+            distances=distances,
+            durations=self.road_durations(distances),
+            profile=self.profile,
+            format=format,
+        )
+
+    def _nearest_neighbour_order(
+        self, start: Tuple[float], visits: List[Tuple[float]]
+    ) -> List[Tuple[float]]:
+        order = nearest_neighbour_order(self.road_distances([start] + visits))
+        return [visits[i - 1] for i in order]
+
+    def get_optimize_route(self, order_locations: List[Tuple[float]]) -> None:
+        pass
+
+    def format_direction_response(
+        self, coordinates: List[Tuple[float]], direction_response: dict
+    ) -> dict:
+        return parse_directions_response(
+            coordinates=coordinates, direction_response=direction_response
+        )
@@ -0,0 +1,251 @@
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import ClusteringSettings, PizzaPreparationSettings
+from app.models.driver import Driver, DriverStatus
+from app.models.order import Order, OrderStatus
+from app.models.user import RoleEnum, User
+from app.services.route_planner.geometry import offset_coordinates
+from .city import SyntheticCity
+from .route_planner import SyntheticRoutePlanner
+
+PIZZAS = ["Margherita", "Marinara", "Diavola", "Capricciosa", "Quattro Formaggi", "Bufalina"]
+DRINKS = ["Water", "Coke", "Beer"]
+CHEF_CAPACITY = {"junior": 3, "middle": 4, "senior": 5}
+BAKE_TIMES = {
+    "ruota_di_carro_napoletana": 70,
+    "napoletana": 90,
+    "contemporanea": 120,
+    "classica": 180,
+}
+# Synthetic users never log in
+UNUSABLE_PASSWORD_HASH = "!"
+
+
+@dataclass
+class DemandConfig:
+    n_orders: int = 500
+    # Desired delivery times are drawn in [min_lead_minutes, horizon_minutes] after `start`:
+    # normal around `peak_minutes` (std `peak_std_minutes`), or uniform when peak_minutes is None
+    horizon_minutes: int = 120
+    min_lead_minutes: int = 15
+    peak_minutes: Optional[float] = 60.0
+    peak_std_minutes: float = 20.0
+    # Orders were placed up to `ordering_window_minutes` before `start`
+    ordering_window_minutes: int = 30
+    # Number of pizzas per order -> probability
+    pizzas_per_order: Dict[int, float] = field(
+        default_factory=lambda: {1: 0.35, 2: 0.35, 3: 0.15, 4: 0.1, 6: 0.05}
+    )
+    n_creators: int = 10
+    # Share of priority orders (VIP, compensation)
+    priority_share: float = 0.0
+
+
+@dataclass
+class FleetConfig:
+    n_drivers: int = 20
+    # Share of drivers still delivering, finishing within `max_finish_minutes`
+    delivering_share: float = 0.3
+    max_finish_minutes: int = 30
+    # Drivers are scattered within this radius of the restaurant
+    spread_km: float = 2.0
+
+
+@dataclass
+class KitchenConfig:
+    chefs: int = 2
+    chef_experience: str = "senior"
+    num_ovens: int = 2
+    single_oven_capacity: int = 5
+    pizza_type: str = "napoletana"
+
+    def to_settings(self) -> PizzaPreparationSettings:
+        return PizzaPreparationSettings(
+            CHEFS=self.chefs,
+            CHEF_EXPERIENCE=self.chef_experience,
+            CHEF_CAPACITY=CHEF_CAPACITY,
+            BAKE_TIMES=BAKE_TIMES,
+            NUM_OVENS=self.num_ovens,
+            SINGLE_OVEN_CAPACITY=self.single_oven_capacity,
+            PIZZA_TYPE=self.pizza_type,
+        )
+
+
+@dataclass
+class ScenarioConfig:
+    seed: int = 42
+    # Reference time of the scenario ("now"). When None, the current UTC minute is used:
+    # the optimizer compares against the wall clock, and all generated times are relative to it
+    start: Optional[datetime] = None
+    city: SyntheticCity = field(default_factory=SyntheticCity)
+    demand: DemandConfig = field(default_factory=DemandConfig)
+    fleet: FleetConfig = field(default_factory=FleetConfig)
+    kitchen: KitchenConfig = field(default_factory=KitchenConfig)
+    # Restaurant location (lon, lat); city center when None
+    restaurant: Optional[Tuple[float, float]] = None
+
+
+@dataclass
+class SyntheticScenario:
+    config: ScenarioConfig
+    restaurant: Tuple[float, float]
+    users: List[User]
+    orders: List[Order]
+    drivers: List[Driver]
+    pizza_prep_settings: PizzaPreparationSettings
+
+    def clustering_settings(self, **overrides) -> ClusteringSettings:
+        values = dict(
+            START_LOCATION_LON=self.restaurant[0],
+            START_LOCATION_LAT=self.restaurant[1],
+            ADDRESS="Via Sintetica 1",
+            POSTAL_CODE="20100",
+            CITY="Milan",
+            COUNTRY="Italy",
+        )
+        values.update(overrides)
+        return ClusteringSettings(**values)
+
+    def route_planner(self, **kwargs) -> SyntheticRoutePlanner:
+        return SyntheticRoutePlanner(city=self.config.city, **kwargs)
+
+
+def generate_scenario(config: Optional[ScenarioConfig] = None) -> SyntheticScenario:
+    """
+    Build users, pending orders and drivers (transient ORM objects, ids from 1) from `config`.
+    The same config (and start time) always yields the same scenario.
+    """
+    config = config or ScenarioConfig()
+    if config.start is None:
+        config = replace(config, start=datetime.utcnow().replace(second=0, microsecond=0))
+    rng = np.random.default_rng(config.seed)
+    city, demand, fleet = config.city, config.demand, config.fleet
+    restaurant = config.restaurant or (city.center_lon, city.center_lat)
+
+    creators = [
+        User(
+            id=i + 1,
+            email=f"synthetic-{config.seed}-creator-{i + 1}@example.com",
+            full_name=f"Synthetic Creator {i + 1}",
+            hashed_password=UNUSABLE_PASSWORD_HASH,
+            role=RoleEnum.staff,
+        )
+        for i in range(demand.n_creators)
+    ]
+
+    n = demand.n_orders
+    locations = city.sample_locations(rng, n)
+    if demand.peak_minutes is None:
+        offsets = rng.uniform(demand.min_lead_minutes, demand.horizon_minutes, size=n)
+    else:
+        offsets = rng.normal(demand.peak_minutes, demand.peak_std_minutes, size=n)
+    offsets = np.clip(offsets, demand.min_lead_minutes, demand.horizon_minutes)
+    placed_ago = rng.uniform(0, demand.ordering_window_minutes, size=n)
+    sizes, probabilities = zip(*demand.pizzas_per_order.items())
+    probabilities = np.asarray(probabilities, dtype=float)
+    pizza_counts = rng.choice(sizes, size=n, p=probabilities / probabilities.sum())
+    creator_idx = rng.integers(0, len(creators), size=n)
+
+    # Own stream: the other draws stay the same whatever the share
+    priority = np.random.default_rng([config.seed, 1]).uniform(0, 1, size=n) < demand.priority_share
+
+    orders = []
+    for i in range(n):
+        creator = creators[creator_idx[i]]
+        pizzas = int(pizza_counts[i])
+        orders.append(
+            Order(
+                id=i + 1,
+                creator_id=creator.id,
+                customer_name=f"Customer {i + 1}",
+                customer_phone=f"+39 02 {1000000 + i}",
+                lat=float(locations[i, 1]),
+                lon=float(locations[i, 0]),
+                delivery_address={
+                    "address": f"Via Sintetica {i + 1}",
+                    "postal_code": "20100",
+                    "city": "Milan",
+                    "country": "Italy",
+                },
+                items={
+                    "food": [PIZZAS[k] for k in rng.integers(0, len(PIZZAS), size=pizzas)],
+                    "drink": [DRINKS[k] for k in rng.integers(0, len(DRINKS), size=rng.integers(0, 3))],
+                },
+                estimated_prep_time=float(8 + 2 * pizzas),
+                desired_delivery_time=config.start + timedelta(minutes=float(offsets[i])),
+                status=OrderStatus.pending,
+                created_at=config.start - timedelta(minutes=float(placed_ago[i])),
+                priority=bool(priority[i]),
+            )
+        )
+
+    m = fleet.n_drivers
+    r = fleet.spread_km * np.sqrt(rng.uniform(0, 1, size=m))
+    theta = rng.uniform(0, 2 * np.pi, size=m)
+    driver_lon, driver_lat = offset_coordinates(
+        restaurant[0], restaurant[1], r * np.cos(theta), r * np.sin(theta)
+    )
+    delivering = rng.uniform(0, 1, size=m) < fleet.delivering_share
+    finish_minutes = rng.uniform(0, fleet.max_finish_minutes, size=m)
+    driver_users, drivers = [], []
+    for i in range(m):
+        user = User(
+            id=len(creators) + i + 1,
+            email=f"synthetic-{config.seed}-driver-{i + 1}@example.com",
+            full_name=f"Synthetic Driver {i + 1}",
+            hashed_password=UNUSABLE_PASSWORD_HASH,
+            role=RoleEnum.driver,
+        )
+        driver_users.append(user)
+        drivers.append(
+            Driver(
+                id=i + 1,
+                user_id=user.id,
+                full_name=user.full_name,
+                is_active=True,
+                status=DriverStatus.DELIVERING if delivering[i] else DriverStatus.AVAILABLE,
+                lat=float(driver_lat[i]),
+                lon=float(driver_lon[i]),
+                estimated_finish_time=(
+                    config.start + timedelta(minutes=float(finish_minutes[i]))
+                    if delivering[i]
+                    else None
+                ),
+                created_at=config.start,
+                updated_at=config.start,
+            )
+        )
+
+    return SyntheticScenario(
+        config=config,
+        restaurant=restaurant,
+        users=creators + driver_users,
+        orders=orders,
+        drivers=drivers,
+        pizza_prep_settings=config.kitchen.to_settings(),
+    )
+
+
+def persist_scenario(db: Session, scenario: SyntheticScenario) -> None:
+    """
+    Bulk insert the scenario rows, keeping their ids (meant for empty benchmark/test databases).
+    The scenario objects stay transient, so the same scenario can be loaded in several databases.
+    """
+    for model, objects in (
+        (User, scenario.users),
+        (Order, scenario.orders),
+        (Driver, scenario.drivers),
+    ):
+        if objects:
+            db.execute(insert(model), [_column_values(model, obj) for obj in objects])
+    db.commit()
+
+
+def _column_values(model, obj) -> Dict:
+    return {column.key: getattr(obj, column.key) for column in model.__table__.columns}
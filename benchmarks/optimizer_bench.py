@@ -0,0 +1,397 @@
+"""
+Offline benchmarks of OrdersOptimizer on synthetic scenarios (in-memory SQLite, SyntheticRoutePlanner).
+
+    python -m benchmarks.optimizer_bench --scales xs,s,m --output benchmarks/results/latest.json
+    python -m benchmarks.optimizer_bench --baseline benchmarks/baseline.json --fail-on-regression
+    python -m benchmarks.optimizer_bench --scales xs,s --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import cluster, driver, order, user  # noqa: F401 (register mappers)
+from app.services.orders import OrdersOptimizer
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    SyntheticScenario,
+    generate_scenario,
+    persist_scenario,
+)
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "xs": {"orders": 10, "drivers": 5},
+    "s": {"orders": 100, "drivers": 20},
+    "m": {"orders": 500, "drivers": 50},
+    "l": {"orders": 1000, "drivers": 100},
+    "xl": {"orders": 5000, "drivers": 500},
+}
+DEFAULT_SCALES = ["xs", "s", "m"]
+
+logger = logging.getLogger("benchmarks")
+
+
+class BenchContext:
+    """
+    One scale: the synthetic scenario, plus fresh in-memory databases holding it on demand.
+    """
+
+    def __init__(self, scale: str, seed: int):
+        self.scale = scale
+        self.scenario: SyntheticScenario = generate_scenario(
+            ScenarioConfig(
+                seed=seed,
+                demand=DemandConfig(n_orders=SCALES[scale]["orders"]),
+                fleet=FleetConfig(n_drivers=SCALES[scale]["drivers"]),
+            )
+        )
+        self._shared: Optional[OrdersOptimizer] = None
+
+    @property
+    def start(self) -> datetime:
+        return self.scenario.config.start
+
+    def fresh_optimizer(self) -> OrdersOptimizer:
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        db: Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+        persist_scenario(db, self.scenario)
+        return OrdersOptimizer(
+            db=db,
+            route_planner=self.scenario.route_planner(),
+            clustering_settings=self.scenario.clustering_settings(),
+            pizza_prep_settings=self.scenario.pizza_prep_settings,
+            logger=logger,
+        )
+
+    @property
+    def optimizer(self) -> OrdersOptimizer:
+        """
+        Optimizer shared by the benchmarks that do not write to the database.
+        """
+        if self._shared is None:
+            self._shared = self.fresh_optimizer()
+        return self._shared
+
+    def filtered_orders(self):
+        optimizer = self.optimizer
+        return optimizer.filter_out_unavailable_orders(optimizer.fetch_unassigned_orders())
+
+    def clusters(self):
+        if not hasattr(self, "_clusters"):
+            clusters = asyncio.run(
+                self.optimizer.compute_clustered_orders(filtered_orders=self.filtered_orders())
+            )
+            self._clusters = sorted(clusters, key=lambda c: c.earliest_delivery_time)
+        return self._clusters
+
+    def drivers(self):
+        return self.optimizer.fetch_available_drivers_with_location(
+            eta_threshold_minutes=self.optimizer.clustering_settings.ETA_THRESHOLD_MINUTES
+        )
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # setup(ctx) -> state is not timed; run(ctx, state) -> result is timed
+    run: Callable[[BenchContext, Any], Any]
+    setup: Callable[[BenchContext], Any] = lambda ctx: None
+    quality: Optional[Callable[[BenchContext, Any], Dict[str, Any]]] = None
+    # Largest scale the benchmark is meaningful at (e.g. bounded by a dense matrix)
+    max_orders: Optional[int] = None
+
+
+def solution_quality(
+    optimizer: OrdersOptimizer, driver_to_cluster, unassigned, now: datetime
+) -> Dict[str, Any]:
+    """
+    Assigned/unassigned clusters and orders, total cost, and total lateness of the assigned
+    orders when each cluster leaves as soon as its pizzas are ready, from `now` (the scenario
+    start, so that the same seed gives the same figures).
+    """
+    prep = optimizer.pizza_prep_settings
+    total_lateness = timedelta(0)
+    assigned_orders = 0
+    for assignment in driver_to_cluster.values():
+        order_cluster = assignment["cluster"]
+        assigned_orders += len(order_cluster.orders)
+        ready_time = optimizer.estimate_latest_pizza_ready_time(
+            total_pizzas=order_cluster.total_items,
+            chefs=prep.CHEFS,
+            chef_experience=prep.CHEF_EXPERIENCE,
+            chef_capacity=prep.CHEF_CAPACITY,
+            bake_times=prep.BAKE_TIMES,
+            num_ovens=prep.NUM_OVENS,
+            single_oven_capacity=prep.SINGLE_OVEN_CAPACITY,
+            pizza_type=prep.PIZZA_TYPE,
+            now=now,
+        )
+        estimates = optimizer.simulate_delivery_times(
+            cluster=order_cluster,
+            dispatch_ready_time=max(now, ready_time),
+            time_for_payment=timedelta(seconds=120),
+        )
+        for estimate in estimates.values():
+            total_lateness += max(
+                timedelta(0), estimate["delivery_time"] - estimate["desired_delivery_time"]
+            )
+    return {
+        "assigned_clusters": len(driver_to_cluster),
+        "unassigned_clusters": len(unassigned),
+        "assigned_orders": assigned_orders,
+        "total_cost": round(sum(a["cost"] for a in driver_to_cluster.values()), 2),
+        "total_lateness_min": round(total_lateness.total_seconds() / 60, 2),
+    }
+
+
+def _largest_time_bucket(ctx: BenchContext):
+    buckets = ctx.optimizer.cluster_orders_by_time_window(orders=ctx.filtered_orders())
+    return max(buckets.values(), key=len) if buckets else []
+
+
+def _first_pass(ctx: BenchContext):
+    clusters, drivers = ctx.clusters(), ctx.drivers()
+    first_pass = ctx.optimizer.try_assign_cluster(clusters=clusters, drivers=drivers)
+    remaining = [d for d in drivers if d.id not in first_pass["driver_to_cluster"]]
+    return first_pass["unassigned_clusters"], remaining
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark(
+        name="estimate_latest_pizza_ready_time",
+        setup=lambda ctx: sum(len(o.items["food"]) for o in ctx.scenario.orders),
+        run=lambda ctx, total_pizzas: ctx.optimizer.estimate_latest_pizza_ready_time(
+            total_pizzas=total_pizzas,
+            chefs=ctx.scenario.pizza_prep_settings.CHEFS,
+            chef_experience=ctx.scenario.pizza_prep_settings.CHEF_EXPERIENCE,
+            chef_capacity=ctx.scenario.pizza_prep_settings.CHEF_CAPACITY,
+            bake_times=ctx.scenario.pizza_prep_settings.BAKE_TIMES,
+            num_ovens=ctx.scenario.pizza_prep_settings.NUM_OVENS,
+            single_oven_capacity=ctx.scenario.pizza_prep_settings.SINGLE_OVEN_CAPACITY,
+            pizza_type=ctx.scenario.pizza_prep_settings.PIZZA_TYPE,
+            now=ctx.start,
+        ),
+    ),
+    Benchmark(
+        name="cluster_orders_by_geographic_proximity",
+        setup=_largest_time_bucket,
+        run=lambda ctx, orders: asyncio.run(
+            ctx.optimizer.cluster_orders_by_geographic_proximity(orders=orders)
+        ),
+        quality=lambda ctx, clusters: {"clusters": len(clusters)},
+    ),
+    Benchmark(
+        name="compute_clustered_orders",
+        setup=lambda ctx: ctx.filtered_orders(),
+        run=lambda ctx, orders: asyncio.run(
+            ctx.optimizer.compute_clustered_orders(filtered_orders=orders)
+        ),
+        quality=lambda ctx, clusters: {"clusters": len(clusters)},
+    ),
+    Benchmark(
+        name="try_assign_cluster",
+        setup=lambda ctx: (ctx.clusters(), ctx.drivers()),
+        run=lambda ctx, state: ctx.optimizer.try_assign_cluster(
+            clusters=state[0], drivers=state[1]
+        ),
+        quality=lambda ctx, out: solution_quality(
+            ctx.optimizer, out["driver_to_cluster"], out["unassigned_clusters"], ctx.start
+        ),
+    ),
+    Benchmark(
+        name="relax_unassigned_batch",
+        setup=_first_pass,
+        run=lambda ctx, state: ctx.optimizer.relax_unassigned_batch(
+            unassigned_clusters=state[0],
+            drivers=state[1],
+            strategies=[OrdersOptimizer.relax_hotness, OrdersOptimizer.relax_lateness],
+            max_rounds=100,
+        ),
+        quality=lambda ctx, out: solution_quality(ctx.optimizer, out[0], out[1], ctx.start),
+    ),
+    Benchmark(
+        name="run",
+        # Every repetition starts from a fresh database: the run persists clusters and statuses
+        setup=lambda ctx: ctx.fresh_optimizer(),
+        run=lambda ctx, optimizer: (optimizer, asyncio.run(optimizer.run())),
+        quality=lambda ctx, result: solution_quality(
+            result[0],
+            result[1]["driver_to_cluster"],
+            result[1]["unassigned_clusters"],
+            ctx.start,
+        ),
+    ),
+]
+
+
+def measure(benchmark: Benchmark, ctx: BenchContext, repeat: int) -> Dict[str, Any]:
+    times, result = [], None
+    for _ in range(repeat):
+        state = benchmark.setup(ctx)
+        start = time.perf_counter()
+        result = benchmark.run(ctx, state)
+        times.append(time.perf_counter() - start)
+
+    # Separate execution for memory: tracemalloc slows down the timed code
+    state = benchmark.setup(ctx)
+    tracemalloc.start()
+    try:
+        benchmark.run(ctx, state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "benchmark": benchmark.name,
+        "scale": ctx.scale,
+        "orders": SCALES[ctx.scale]["orders"],
+        "drivers": SCALES[ctx.scale]["drivers"],
+        "time_s": round(statistics.median(times), 6),
+        "times_s": [round(t, 6) for t in times],
+        "peak_memory_mb": round(peak / 2**20, 3),
+        "quality": benchmark.quality(ctx, result) if benchmark.quality else {},
+    }
+
+
+def run_benchmarks(
+    scales: List[str],
+    names: Optional[List[str]] = None,
+    repeat: int = 3,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    results = []
+    for scale in scales:
+        ctx = BenchContext(scale, seed=seed)
+        for benchmark in BENCHMARKS:
+            if names and benchmark.name not in names:
+                continue
+            if benchmark.max_orders and SCALES[scale]["orders"] > benchmark.max_orders:
+                continue
+            result = measure(benchmark, ctx, repeat=repeat)
+            results.append(result)
+            print(
+                f"{scale:>3} {benchmark.name:<40} {result['time_s'] * 1000:>10.2f} ms "
+                f"{result['peak_memory_mb']:>9.2f} MB  {result['quality']}",
+                file=sys.stderr,
+            )
+    return {"meta": environment_info(seed=seed, repeat=repeat), "results": results}
+
+
+def environment_info(**extra) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+@dataclass
+class Comparison:
+    regressions: List[str] = field(default_factory=list)
+    improvements: List[str] = field(default_factory=list)
+    quality_changes: List[str] = field(default_factory=list)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Comparison:
+    """
+    Flag time and peak memory changes above `tolerance` (relative), and any quality change,
+    for the (benchmark, scale) pairs present in both reports.
+    """
+    comparison = Comparison()
+    previous = {(r["benchmark"], r["scale"]): r for r in baseline["results"]}
+    for result in current["results"]:
+        key = (result["benchmark"], result["scale"])
+        if key not in previous:
+            continue
+        label = f"{result['benchmark']}[{result['scale']}]"
+        for metric in ("time_s", "peak_memory_mb"):
+            before, after = previous[key][metric], result[metric]
+            if before <= 0:
+                continue
+            ratio = after / before
+            line = f"{label} {metric}: {before} -> {after} ({ratio:.2f}x)"
+            if ratio > 1 + tolerance:
+                comparison.regressions.append(line)
+            elif ratio < 1 - tolerance:
+                comparison.improvements.append(line)
+        if result["quality"] != previous[key]["quality"]:
+            comparison.quality_changes.append(
+                f"{label} quality: {previous[key]['quality']} -> {result['quality']}"
+            )
+    return comparison
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scales",
+        default=",".join(DEFAULT_SCALES),
+        help=f"Comma separated scales among {', '.join(SCALES)}, or 'all'",
+    )
+    parser.add_argument("--benchmarks", default="", help="Comma separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Also write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    scales = list(SCALES) if args.scales == "all" else args.scales.split(",")
+    report = run_benchmarks(
+        scales=scales,
+        names=[name for name in args.benchmarks.split(",") if name] or None,
+        repeat=args.repeat,
+        seed=args.seed,
+    )
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(report, json.load(f), tolerance=args.tolerance)
+        for title, lines in (
+            ("Regressions", comparison.regressions),
+            ("Improvements", comparison.improvements),
+            ("Quality changes", comparison.quality_changes),
+        ):
+            print(f"{title}: {len(lines)}")
+            for line in lines:
+                print(f"  {line}")
+        if args.fail_on_regression and comparison.regressions:
+            sys.exit(1)
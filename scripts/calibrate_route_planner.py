@@ -0,0 +1,63 @@
+"""
+Fit the haversine travel-time model on recorded route planner responses and report its error
+against them, on a held-out share of the requests.
+
+    python -m scripts.calibrate_route_planner --fixtures tests/fixtures/route_planner/responses.json.gz
+    python -m scripts.calibrate_route_planner --zone-km 1 --band-hours 2 --output model.json
+"""
+
+import argparse
+import json
+from dataclasses import asdict
+
+from app.config import settings
+from app.services.route_planner import (
+    RecordingRoutePlanner,
+    evaluate_travel_time_model,
+    fit_travel_time_model,
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 1)[1],
+    )
+    parser.add_argument("--fixtures", default=settings.ROUTE_PLANNER_FIXTURES_PATH)
+    parser.add_argument("--zone-km", type=float, default=2.0)
+    parser.add_argument("--band-hours", type=int, default=3)
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument(
+        "--holdout-every",
+        type=int,
+        default=5,
+        help="Every n-th request (by key) is held out of the fit (0: evaluate in sample)",
+    )
+    parser.add_argument("--output", help="Write the fitted model to this JSON file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    entries = sorted(RecordingRoutePlanner.load(args.fixtures).items())
+    if args.holdout_every:
+        fit_entries = [e for i, (_, e) in enumerate(entries) if i % args.holdout_every]
+        test_entries = [e for i, (_, e) in enumerate(entries) if not i % args.holdout_every]
+    else:
+        fit_entries = test_entries = [e for _, e in entries]
+    model = fit_travel_time_model(
+        fit_entries,
+        zone_km=args.zone_km,
+        band_hours=args.band_hours,
+        min_samples=args.min_samples,
+    )
+    report = {
+        "requests": {"fit": len(fit_entries), "test": len(test_entries)},
+        "groups": {"detours": len(model.detours), "speeds": len(model.speeds)},
+        "errors": evaluate_travel_time_model(model, test_entries),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(asdict(model), f, indent=2)
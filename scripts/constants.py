@@ -6,6 +6,7 @@ BASE_URL = "http://localhost:8000"
 SIGNUP_ENDPOINT = f"{BASE_URL}/api/v1/auth/signup"
 LOGIN_ENDPOINT = f"{BASE_URL}/api/v1/auth/login"
 ORDERS_ENDPOINT = f"{BASE_URL}/api/v1/orders/order/"
+ORDERS_BATCH_ENDPOINT = f"{BASE_URL}/api/v1/orders/batch"
 ORDERS_OPTIMIZER_ENDPOINT = f"{BASE_URL}/api/v1/orders/optimize/"
 GET_AVAILABLE_ORDERS_ENDPOINT = f"{BASE_URL}/api/v1/orders/available_orders/"
 CLUSTER_BY_TIME_ENDPOINT = f"{BASE_URL}/api/v1/orders/clusters_by_time"
@@ -13,6 +14,8 @@ CLUSTER_ENDPOINT = f"{BASE_URL}/api/v1/orders/clusters"
 DRIVERS_ENDPOINT = f"{BASE_URL}/api/v1/drivers/"
 DRIVER_UPDATE_ENDPOINT = f"{BASE_URL}/api/v1/drivers/{{driver_id}}"
 DRIVER_GET_AVAILABLE_ENDPOINT = f"{BASE_URL}/api/v1/drivers/available"
+DRIVER_LOCATIONS_ENDPOINT = f"{BASE_URL}/api/v1/drivers/locations"
+RESTAURANTS_ENDPOINT = f"{BASE_URL}/api/v1/restaurants/"
 
 # Test Order
 TEST_USERS = [
@@ -1,4 +1,5 @@
-from app.database import engine, Base
-from app.models import user, order, driver
+from app.database import engine, Base, apply_migrations
+from app.models import cluster, user, order, driver, restaurant
 
 Base.metadata.create_all(bind=engine)
+apply_migrations()
@@ -7,7 +7,7 @@ load_dotenv()
 from app.config import settings
 from app.models.user import User
 from app.models.driver import Driver, DriverStatus
-from app.auth.utils import hash_password
+from app.auth.utils import hash_passwords_bulk
 from app.database import DatabaseManager
 from app.crud import create_user, create_driver
 
@@ -33,16 +33,27 @@ def init_db() -> None:
             print("Creating Users ...")
             created_users = {}
             created_users_full_name = {}
-            for test_user in TEST_USERS_FOR_CLUSTERING + TEST_USER_DRIVERS:
-                existing = (
-                    db_session.query(User)
-                    .filter(User.email == test_user["email"])
-                    .first()
+            test_users = TEST_USERS_FOR_CLUSTERING + TEST_USER_DRIVERS
+            existing_users = {
+                test_user["email"]: db_session.query(User)
+                .filter(User.email == test_user["email"])
+                .first()
+                for test_user in test_users
+            }
+            # Hash all new passwords at once, in parallel
+            new_users = [u for u in test_users if not existing_users[u["email"]]]
+            hashed_passwords = dict(
+                zip(
+                    [u["email"] for u in new_users],
+                    hash_passwords_bulk([u["password"] for u in new_users]),
                 )
+            )
+            for test_user in test_users:
+                existing = existing_users[test_user["email"]]
                 if not existing:
                     user_in = User(
                         email=test_user["email"],
-                        hashed_password=hash_password(test_user["password"]),
+                        hashed_password=hashed_passwords[test_user["email"]],
                         full_name=test_user["full_name"],
                         role=test_user["role"],
                     )
@@ -12,7 +12,7 @@ from scripts.create_order import (
     optimize_order,
 )
 
-from app.auth.utils import hash_password
+from app.auth.utils import hash_passwords_bulk
 from app.database import DatabaseManager
 from app.crud import create_user
 from app.models.user import User
@@ -39,31 +39,38 @@ Hence, OpenRouteService can handle only 59*59 orders
 N_ORDERS = 10
 # Assuming pizza reservations can be taken within a 45-minute windown
 PIZZA_RESERVATIONS_WINDOW = (15, 45)
-with DatabaseManager() as db_session:
-    print(f"Creating {N_ORDERS} Users ...")
+
+
+def create_fake_users(n_users: int) -> dict:
+    print(f"Creating {n_users} Users ...")
     users_dict = dict()
-    for _ in tqdm(range(N_ORDERS), total=N_ORDERS):
-        # Create Users in DB
+    for _ in range(n_users):
         user_email = fake.email()
-        user_full_name = fake.name()
-        user_password = fake.password()
-        user_phone = fake.phone_number()
         users_dict[user_email] = {
             "email": user_email,
-            "password": user_password,
-            "full_name": user_full_name,
-            "customer_phone": str(user_phone),
+            "password": fake.password(),
+            "full_name": fake.name(),
+            "customer_phone": str(fake.phone_number()),
             "role": "user",
         }
-        user_in = User(
-            email=user_email,
-            hashed_password=hash_password(user_password),
-            full_name=user_full_name,
-            role="user",
-        )
-        new_user = create_user(db=db_session, new_user=user_in)
-# Create Orders
-print("Create Orders ...")
+    # bcrypt is slow: hash all passwords in parallel before inserting users
+    hashed_passwords = hash_passwords_bulk(
+        [user_info["password"] for user_info in users_dict.values()]
+    )
+    with DatabaseManager() as db_session:
+        for user_info, hashed_password in tqdm(
+            zip(users_dict.values(), hashed_passwords), total=n_users
+        ):
+            user_in = User(
+                email=user_info["email"],
+                hashed_password=hashed_password,
+                full_name=user_info["full_name"],
+                role="user",
+            )
+            create_user(db=db_session, new_user=user_in)
+    return users_dict
+
+
 now = datetime.utcnow()
 GROUP_A = (now + timedelta(hours=1)).isoformat()
 GROUP_B = (now + timedelta(hours=1, minutes=15)).isoformat()
@@ -82,43 +89,49 @@ PIZZAS = [
     "Quattro Stagioni",
 ]
 DRINKS = ["Coca-Cola", "Pepsi", "Fanta", "Sprite", "Water", "Beer", "Lemonade"]
-# Create order payload
-ORDER_PAYLOAD_FOR_OPT = dict()
-for idx, user_info in enumerate(users_dict.values()):
-    postal_code, address = sample_address(GENERATED_ADDRESSES)
-    food = random.choices(PIZZAS, k=random.randint(1, 10))
-    drink = random.choices(DRINKS, k=random.randint(1, 10))
-    prep_time = random.randint(15, 25)
-    desired_time = (
-        now
-        + timedelta(
-            minutes=random.randint(
-                PIZZA_RESERVATIONS_WINDOW[0], PIZZA_RESERVATIONS_WINDOW[1]
+
+
+def create_fake_orders(users_dict: dict) -> None:
+    print("Create Orders ...")
+    for idx, user_info in enumerate(users_dict.values()):
+        postal_code, address = sample_address(GENERATED_ADDRESSES)
+        food = random.choices(PIZZAS, k=random.randint(1, 10))
+        drink = random.choices(DRINKS, k=random.randint(1, 10))
+        prep_time = random.randint(15, 25)
+        desired_time = (
+            now
+            + timedelta(
+                minutes=random.randint(
+                    PIZZA_RESERVATIONS_WINDOW[0], PIZZA_RESERVATIONS_WINDOW[1]
+                )
             )
-        )
-    ).isoformat()
-
-    order_payload = {
-        "id": idx + 1,
-        "creator_id": idx + 100,
-        "status": "pending",
-        "created_at": str(now),
-        "priority": False,
-        "customer_name": user_info["full_name"],
-        "customer_phone": user_info["customer_phone"],
-        "delivery_address": {
-            "address": address,
-            "city": "Milan",
-            "postal_code": postal_code,
-        },
-        "items": {"food": food, "drink": drink},
-        "estimated_prep_time": prep_time,
-        "desired_delivery_time": desired_time,
-    }
-
-    token = login(username=user_info["email"], password=user_info["password"])
-    create_order(token=token, order_payload=order_payload)
-
-available_orders = get_available_orders()
-print(f"Total number of orders: {len(available_orders)}")
-_ = optimize_order()
+        ).isoformat()
+
+        order_payload = {
+            "id": idx + 1,
+            "creator_id": idx + 100,
+            "status": "pending",
+            "created_at": str(now),
+            "priority": False,
+            "customer_name": user_info["full_name"],
+            "customer_phone": user_info["customer_phone"],
+            "delivery_address": {
+                "address": address,
+                "city": "Milan",
+                "postal_code": postal_code,
+            },
+            "items": {"food": food, "drink": drink},
+            "estimated_prep_time": prep_time,
+            "desired_delivery_time": desired_time,
+        }
+
+        token = login(username=user_info["email"], password=user_info["password"])
+        create_order(token=token, order_payload=order_payload)
+
+
+if __name__ == "__main__":
+    users_dict = create_fake_users(N_ORDERS)
+    create_fake_orders(users_dict)
+    available_orders = get_available_orders()
+    print(f"Total number of orders: {len(available_orders)}")
+    _ = optimize_order()
@@ -0,0 +1,72 @@
+"""
+Generate a seeded synthetic scenario (orders, drivers, kitchen) without the API or geocoding.
+
+    python -m scripts.generate_synthetic_load --orders 2000 --drivers 80 --seed 1
+    python -m scripts.generate_synthetic_load --orders 2000 --drivers 80 --persist
+"""
+
+import argparse
+import json
+from collections import Counter
+
+from app.database import DatabaseManager
+from app.models import cluster, driver, order, user  # noqa: F401 (register mappers)
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    KitchenConfig,
+    ScenarioConfig,
+    generate_scenario,
+    persist_scenario,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--drivers", type=int, default=20)
+    parser.add_argument("--horizon-minutes", type=int, default=120)
+    parser.add_argument(
+        "--peak-minutes",
+        type=float,
+        default=60.0,
+        help="Peak of desired delivery times; negative for uniform times",
+    )
+    parser.add_argument("--chefs", type=int, default=2)
+    parser.add_argument("--ovens", type=int, default=2)
+    parser.add_argument(
+        "--persist",
+        action="store_true",
+        help="Insert the scenario into the configured (empty) database",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = ScenarioConfig(
+        seed=args.seed,
+        demand=DemandConfig(
+            n_orders=args.orders,
+            horizon_minutes=args.horizon_minutes,
+            peak_minutes=args.peak_minutes if args.peak_minutes >= 0 else None,
+        ),
+        fleet=FleetConfig(n_drivers=args.drivers),
+        kitchen=KitchenConfig(chefs=args.chefs, num_ovens=args.ovens),
+    )
+    scenario = generate_scenario(config)
+    summary = {
+        "seed": args.seed,
+        "start": scenario.config.start.isoformat(),
+        "restaurant": scenario.restaurant,
+        "orders": len(scenario.orders),
+        "pizzas": sum(len(o.items["food"]) for o in scenario.orders),
+        "drivers": dict(Counter(d.status.value for d in scenario.drivers)),
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.persist:
+        with DatabaseManager() as db_session:
+            persist_scenario(db_session, scenario)
+        print("Scenario stored in the database.")
@@ -0,0 +1,360 @@
+"""
+HTTP load test of the order intake and dispatch API.
+
+Orders and driver updates arrive as independent Poisson processes (open loop: a slow server
+does not slow down arrivals), the optimizer runs periodically, and latency percentiles and
+error rates are reported per endpoint.
+
+Run the app against a local Postgres with the offline route planner, so that geocoding and
+routing do not hit ORS:
+
+    APP_SETTINGS__ROUTE_SERVICE_PROVIDER=synthetic uvicorn app.main:app --workers 4
+    python -m scripts.load_test --duration 120 --order-rate 20 --driver-rate 10 --optimize-interval 30
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+from scripts.constants import BASE_URL
+
+API_PREFIX = "/api/v1"
+SIGNUP_PATH = f"{API_PREFIX}/auth/signup"
+LOGIN_PATH = f"{API_PREFIX}/auth/login"
+ORDER_PATH = f"{API_PREFIX}/orders/order/"
+OPTIMIZE_PATH = f"{API_PREFIX}/orders/optimize"
+DRIVERS_PATH = f"{API_PREFIX}/drivers/"
+DRIVER_UPDATE_PATH = f"{API_PREFIX}/drivers/{{driver_id}}"
+
+STREETS = [
+    "Via Torino", "Corso Buenos Aires", "Via Solari", "Viale Tunisia", "Via Tortona",
+    "Via Vigevano", "Via Foppa", "Via Washington", "Via Marghera", "Corso Como",
+]
+PIZZAS = ["Margherita", "Marinara", "Diavola", "Capricciosa", "Quattro Formaggi"]
+# Milan, around the default restaurant
+CENTER_LON, CENTER_LAT = 9.188569, 45.463765
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: int = 0
+
+    def record(self, latency: float, status: str, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, duration: float) -> Dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        summary = {
+            "requests": count,
+            "throughput_rps": round(count / duration, 2) if duration else 0.0,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "statuses": dict(self.statuses),
+        }
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 1) if count else None
+        summary["max_ms"] = round(latencies[-1] * 1000, 1) if count else None
+        return summary
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        # email -> bearer token, reused across requests and refreshed on 401
+        self.tokens: Dict[str, str] = {}
+        self.users: List[Dict[str, str]] = []
+        self.driver_ids: List[int] = []
+        self.in_flight = asyncio.Semaphore(args.max_in_flight)
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self.tasks: set = set()
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats[name].record(time.perf_counter() - start, type(e).__name__, ok=False)
+            return None
+        self.stats[name].record(
+            time.perf_counter() - start,
+            str(response.status_code),
+            ok=response.status_code < 400,
+        )
+        return response
+
+    # Setup: users and tokens, drivers
+
+    async def signup(self, email: str, full_name: str, role: str) -> None:
+        response = await self.request(
+            "signup",
+            "POST",
+            SIGNUP_PATH,
+            json={
+                "email": email,
+                "password": self.args.password,
+                "full_name": full_name,
+                "role": role,
+            },
+        )
+        # 400: already registered by a previous run
+        if response is None or response.status_code not in (201, 400):
+            raise RuntimeError(f"Signup of {email} failed: {response and response.text}")
+
+    async def login(self, email: str) -> str:
+        response = await self.request(
+            "login",
+            "POST",
+            LOGIN_PATH,
+            data={"username": email, "password": self.args.password},
+        )
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"Login of {email} failed: {response and response.text}")
+        self.tokens[email] = response.json()["access_token"]
+        return self.tokens[email]
+
+    async def setup(self) -> None:
+        self.users = [
+            {"email": f"loadtest-user-{i}@example.com", "full_name": f"Load Test User {i}"}
+            for i in range(self.args.users)
+        ]
+        await asyncio.gather(
+            *(self.limited(self.signup(u["email"], u["full_name"], "user")) for u in self.users)
+        )
+        await asyncio.gather(*(self.limited(self.login(u["email"])) for u in self.users))
+
+        response = await self.request("list_drivers", "GET", DRIVERS_PATH)
+        existing = [
+            d["id"] for d in (response.json() if response is not None and response.is_success else [])
+        ]
+        self.driver_ids = existing[: self.args.drivers]
+        missing = self.args.drivers - len(self.driver_ids)
+        if missing > 0:
+            new_ids = await asyncio.gather(
+                *(self.limited(self.create_driver(len(existing) + i)) for i in range(missing))
+            )
+            self.driver_ids.extend(new_ids)
+
+    async def limited(self, coroutine):
+        # Setup requests also respect --max-in-flight
+        async with self.in_flight:
+            return await coroutine
+
+    async def create_driver(self, i: int) -> int:
+        email = f"loadtest-driver-{i}@example.com"
+        await self.signup(email, f"Load Test Driver {i}", "driver")
+        token = await self.login(email)
+        response = await self.request(
+            "create_driver",
+            "POST",
+            DRIVERS_PATH,
+            json={
+                "user_id": token_user_id(token),
+                "full_name": f"Load Test Driver {i}",
+                **self.random_location(),
+            },
+        )
+        if response is None or response.status_code != 201:
+            raise RuntimeError(f"Driver creation failed: {response and response.text}")
+        return response.json()["id"]
+
+    # Workload
+
+    def random_location(self) -> Dict[str, float]:
+        return {
+            "lat": CENTER_LAT + self.rng.uniform(-0.03, 0.03),
+            "lon": CENTER_LON + self.rng.uniform(-0.04, 0.04),
+        }
+
+    def order_payload(self) -> Dict:
+        now = datetime.utcnow()
+        pizzas = self.rng.choice([1, 1, 2, 2, 3, 4])
+        return {
+            "customer_name": f"Customer {self.rng.randrange(10**6)}",
+            "customer_phone": f"+39 02 {self.rng.randrange(10**6, 10**7)}",
+            "delivery_address": {
+                "address": f"{self.rng.choice(STREETS)} {self.rng.randint(1, 120)}",
+                "postal_code": "20121",
+                "city": "Milan",
+            },
+            "items": {"food": self.rng.choices(PIZZAS, k=pizzas), "drink": []},
+            "estimated_prep_time": 8 + 2 * pizzas,
+            "desired_delivery_time": (
+                now + timedelta(minutes=self.rng.uniform(20, self.args.horizon_minutes))
+            ).isoformat(),
+        }
+
+    async def create_order(self) -> None:
+        user = self.rng.choice(self.users)
+        payload = self.order_payload()
+        for attempt in range(2):
+            response = await self.request(
+                "create_order",
+                "POST",
+                ORDER_PATH,
+                json=payload,
+                headers={"Authorization": f"Bearer {self.tokens[user['email']]}"},
+            )
+            if response is None or response.status_code != 401 or attempt:
+                return
+            # Expired token: log in again and retry once
+            await self.login(user["email"])
+
+    async def update_driver(self) -> None:
+        driver_id = self.rng.choice(self.driver_ids)
+        update = self.random_location()
+        if self.rng.random() < 0.2:
+            update["status"] = self.rng.choice(["available", "delivering"])
+        await self.request(
+            "update_driver",
+            "PATCH",
+            DRIVER_UPDATE_PATH.format(driver_id=driver_id),
+            json=update,
+        )
+
+    async def optimize(self) -> None:
+        await self.request("optimize", "POST", OPTIMIZE_PATH, timeout=self.args.optimize_timeout)
+
+    def spawn(self, name: str, factory) -> None:
+        if self.in_flight.locked():
+            # Client-side saturation: count it instead of queueing, to keep arrivals Poisson
+            self.dropped[name] += 1
+            return
+
+        async def run():
+            async with self.in_flight:
+                await factory()
+
+        task = asyncio.create_task(run())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def poisson(self, name: str, rate: float, factory, deadline: float) -> None:
+        if rate <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.rng.expovariate(rate))
+            if time.perf_counter() >= deadline:
+                return
+            self.spawn(name, factory)
+
+    async def periodic(self, interval: float, factory, deadline: float) -> None:
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            if time.perf_counter() >= deadline:
+                return
+            # Optimizer runs are not dropped: they are rare and the point of the test
+            task = asyncio.create_task(factory())
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run(self) -> Dict:
+        await self.setup()
+        setup_stats, self.stats = self.stats, defaultdict(EndpointStats)
+
+        start = time.perf_counter()
+        deadline = start + self.args.duration
+        await asyncio.gather(
+            self.poisson("create_order", self.args.order_rate, self.create_order, deadline),
+            self.poisson("update_driver", self.args.driver_rate, self.update_driver, deadline),
+            self.periodic(self.args.optimize_interval, self.optimize, deadline),
+        )
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks))
+        elapsed = time.perf_counter() - start
+
+        return {
+            "config": {k: v for k, v in vars(self.args).items() if k != "password"},
+            "duration_s": round(elapsed, 2),
+            "endpoints": {name: s.summary(elapsed) for name, s in sorted(self.stats.items())},
+            "dropped": dict(self.dropped),
+            "setup": {name: s.summary(elapsed) for name, s in sorted(setup_stats.items())},
+        }
+
+
+def token_user_id(token: str) -> int:
+    """
+    Read the user_id claim of a JWT (no signature check: the token comes from our own login).
+    """
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))["user_id"]
+
+
+def print_report(report: Dict) -> None:
+    header = f"{'endpoint':<16}{'reqs':>7}{'rps':>8}{'err%':>7}" + "".join(
+        f"{f'p{p}':>9}" for p in PERCENTILES
+    ) + f"{'max':>9}"
+    print(header)
+    for name, summary in report["endpoints"].items():
+        print(
+            f"{name:<16}{summary['requests']:>7}{summary['throughput_rps']:>8}"
+            f"{summary['error_rate'] * 100:>7.1f}"
+            + "".join(f"{summary[f'p{p}_ms'] or 0:>9.1f}" for p in PERCENTILES)
+            + f"{summary['max_ms'] or 0:>9.1f}"
+        )
+    if report["dropped"]:
+        print(f"Dropped (max in flight reached): {report['dropped']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds")
+    parser.add_argument("--order-rate", type=float, default=5.0, help="Orders per second")
+    parser.add_argument("--driver-rate", type=float, default=2.0, help="Driver updates per second")
+    parser.add_argument(
+        "--optimize-interval", type=float, default=30.0, help="Seconds between optimizer runs (0: never)"
+    )
+    parser.add_argument("--optimize-timeout", type=float, default=120.0)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--drivers", type=int, default=20)
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--horizon-minutes", type=float, default=120.0)
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+async def main(args) -> Dict:
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        return await LoadTest(client, args).run()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
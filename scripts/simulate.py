@@ -0,0 +1,114 @@
+"""
+Replay a synthetic evening against OrdersOptimizer on a simulated clock, or sweep a parameter grid.
+
+    python -m scripts.simulate --orders 300 --drivers 15 --hours 5
+    python -m scripts.simulate --set clustering.CLUSTER_DISTANCE_THRESHOLD=90 --set scenario.kitchen.chefs=3
+    python -m scripts.simulate --grid clustering.MAX_PIZZAS_PER_CLUSTER=6,10 \\
+        --grid 'relaxation=["hotness","lateness"],[]' --workers 4 --output sweep.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from app.services.simulation import SimulationConfig, simulate, sweep, with_overrides
+from app.services.simulation.engine import DEFAULT_START
+from app.services.synthetic import DemandConfig, FleetConfig, KitchenConfig, ScenarioConfig
+
+
+def parse_value(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return raw
+
+
+def parse_assignment(raw: str) -> Tuple[str, str]:
+    name, sep, value = raw.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected name=value, got {raw!r}")
+    return name.strip(), value
+
+
+def parse_grid(assignments: List[Tuple[str, str]]) -> Dict[str, List[Any]]:
+    # Values are a JSON array without the brackets: 60,120 or "a","b" or [1],[2]
+    return {name: json.loads(f"[{values}]") for name, values in assignments}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 1)[1],
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--drivers", type=int, default=15)
+    parser.add_argument("--hours", type=float, default=5.0, help="Span of desired delivery times")
+    parser.add_argument(
+        "--peak-minutes",
+        type=float,
+        default=None,
+        help="Peak of desired delivery times (default: middle of the evening); negative for uniform",
+    )
+    parser.add_argument("--priority-share", type=float, default=0.0, help="Share of priority orders")
+    parser.add_argument("--chefs", type=int, default=2)
+    parser.add_argument("--ovens", type=int, default=2)
+    parser.add_argument("--dispatch-interval", type=float, default=5.0, help="Minutes between optimizer runs")
+    parser.add_argument(
+        "--set",
+        dest="overrides",
+        type=parse_assignment,
+        action="append",
+        default=[],
+        help="Override a SimulationConfig field (dotted path, JSON value)",
+    )
+    parser.add_argument(
+        "--grid",
+        type=parse_assignment,
+        action="append",
+        default=[],
+        help="Sweep a field over comma separated JSON values; repeat for a cartesian grid",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes running the sweep")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def build_config(args) -> SimulationConfig:
+    horizon = int(args.hours * 60)
+    peak = horizon / 2 if args.peak_minutes is None else args.peak_minutes
+    config = SimulationConfig(
+        scenario=ScenarioConfig(
+            seed=args.seed,
+            start=DEFAULT_START,
+            demand=DemandConfig(
+                n_orders=args.orders,
+                horizon_minutes=horizon,
+                min_lead_minutes=0,
+                peak_minutes=peak if peak >= 0 else None,
+                peak_std_minutes=horizon / 4,
+                priority_share=args.priority_share,
+            ),
+            fleet=FleetConfig(n_drivers=args.drivers, delivering_share=0.0),
+            kitchen=KitchenConfig(chefs=args.chefs, num_ovens=args.ovens),
+        ),
+        dispatch_interval_minutes=args.dispatch_interval,
+    )
+    return with_overrides(config, {name: parse_value(value) for name, value in args.overrides})
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    config = build_config(args)
+    if args.grid:
+        results = sweep(config, parse_grid(args.grid), workers=args.workers)
+    else:
+        results = [{"params": {}, "summary": asyncio.run(simulate(config)).summary()}]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
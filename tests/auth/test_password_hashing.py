@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.auth.utils import (
+    hash_password_async,
+    hash_passwords_bulk,
+    pwd_context,
+    verify_and_update_password_async,
+    verify_password,
+)
+from app.config import settings
+from app.models.user import User
+from scripts.constants import LOGIN_ENDPOINT, SIGNUP_ENDPOINT
+
+CURRENT_PREFIX = f"$2b${settings.PASSWORD_HASH_ROUNDS:02d}$"
+
+
+def test_hash_passwords_bulk_preserves_order():
+    passwords = ["password123", "password456", "password789"]
+    hashes = hash_passwords_bulk(passwords)
+    assert all(verify_password(p, h) for p, h in zip(passwords, hashes))
+    assert not verify_password(passwords[0], hashes[1])
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify():
+    hashed = await hash_password_async("password123")
+    assert hashed.startswith(CURRENT_PREFIX)
+    assert await verify_and_update_password_async("password123", hashed) == (True, None)
+    assert await verify_and_update_password_async("wrong", hashed) == (False, None)
+
+
+def test_login_rehashes_outdated_work_factor(client, session):
+    cheap_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("password123")
+    session.add(
+        User(email="legacy@example.com", full_name="Legacy", hashed_password=cheap_hash)
+    )
+    session.commit()
+
+    response = client.post(
+        url=LOGIN_ENDPOINT,
+        data={"username": "legacy@example.com", "password": "password123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == 200
+    user = session.query(User).filter(User.email == "legacy@example.com").one()
+    session.refresh(user)
+    assert user.hashed_password.startswith(CURRENT_PREFIX)
+    assert verify_password("password123", user.hashed_password)
+
+
+def test_auth_queries_run_off_the_event_loop(client, session):
+    on_event_loop = []
+
+    def record(*args):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(args[2])
+        except RuntimeError:
+            pass
+
+    event.listen(session.get_bind(), "before_cursor_execute", record)
+    try:
+        credentials = {"email": "loop@example.com", "password": "password123"}
+        response = client.post(
+            SIGNUP_ENDPOINT, json={**credentials, "full_name": "Loop", "role": "user"}
+        )
+        assert response.status_code == 201
+        response = client.post(
+            url=LOGIN_ENDPOINT,
+            data={"username": credentials["email"], "password": credentials["password"]},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        assert response.status_code == 200
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", record)
+    assert on_event_loop == []
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.auth.dependencies import get_current_user, principal_cache
+from app.auth.utils import create_access_token
+from app.config import settings
+from app.models.user import User
+from app.schemas.user import UserPrincipal
+
+
+@pytest.fixture
+def user(session):
+    principal_cache.clear()
+    user = User(email="cached@example.com", full_name="Cached", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    yield user
+    principal_cache.clear()
+
+
+@pytest.fixture
+def statements(session):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_principal_is_cached_per_token(session, user, statements):
+    token = create_access_token(data={"user_id": user.id})
+    first = get_current_user(token=token, db=session)
+    assert first.email == "cached@example.com"
+    queries = len(statements)
+    assert queries > 0
+
+    second = get_current_user(token=token, db=session)
+    assert second == first
+    assert len(statements) == queries
+
+
+def test_user_update_invalidates_principal(session, user):
+    token = create_access_token(data={"user_id": user.id})
+    assert get_current_user(token=token, db=session).full_name == "Cached"
+
+    user.full_name = "Renamed"
+    session.commit()
+    assert get_current_user(token=token, db=session).full_name == "Renamed"
+
+
+def test_cache_entry_does_not_outlive_token(user):
+    principal_cache.set("token", UserPrincipal(id=user.id), token_exp=time.time() - 1)
+    assert principal_cache.get("token") is None
+
+
+def test_trusted_claims_skip_database(session, user, statements, monkeypatch):
+    monkeypatch.setattr(settings, "TRUST_TOKEN_CLAIMS", True)
+    token = create_access_token(data={"user_id": user.id, "role": "user"})
+    principal = get_current_user(token=token, db=session)
+    assert principal.id == user.id and principal.role == "user"
+    assert statements == []
@@ -0,0 +1,39 @@
+from benchmarks.optimizer_bench import BENCHMARKS, compare, run_benchmarks
+
+
+def test_run_benchmarks_smallest_scale():
+    report = run_benchmarks(scales=["xs"], repeat=1)
+
+    assert {r["benchmark"] for r in report["results"]} == {b.name for b in BENCHMARKS}
+    for result in report["results"]:
+        assert result["scale"] == "xs"
+        assert result["time_s"] >= 0
+        assert result["peak_memory_mb"] >= 0
+    run = next(r for r in report["results"] if r["benchmark"] == "run")
+    assert run["quality"]["assigned_clusters"] > 0
+    assert run["quality"]["assigned_orders"] >= run["quality"]["assigned_clusters"]
+    assert "commit" in report["meta"]
+
+
+def test_compare_flags_regressions_and_quality_changes():
+    def report(time_s, memory, assigned):
+        return {
+            "results": [
+                {
+                    "benchmark": "run",
+                    "scale": "s",
+                    "time_s": time_s,
+                    "peak_memory_mb": memory,
+                    "quality": {"assigned_clusters": assigned},
+                }
+            ]
+        }
+
+    comparison = compare(report(1.5, 1.0, 3), report(1.0, 2.0, 4), tolerance=0.25)
+
+    assert len(comparison.regressions) == 1 and "time_s" in comparison.regressions[0]
+    assert len(comparison.improvements) == 1 and "peak_memory_mb" in comparison.improvements[0]
+    assert len(comparison.quality_changes) == 1
+
+    unchanged = compare(report(1.1, 1.0, 3), report(1.0, 1.0, 3), tolerance=0.25)
+    assert not (unchanged.regressions or unchanged.improvements or unchanged.quality_changes)
@@ -0,0 +1,67 @@
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from app import config_logging
+from app.config import settings
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_logging, "get_default_log_dir", lambda: tmp_path)
+    level = config_logging.logger.level
+    yield tmp_path
+    config_logging.logger.setLevel(level)
+    config_logging.shutdown_logging()
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+
+
+def read_log(log_dir):
+    log_file = log_dir / f"{settings.PROJECT_NAME.replace('-', '_')}.log"
+    return log_file.read_text().splitlines()
+
+
+def test_setup_logging_writes_through_queue_listener(log_dir, monkeypatch):
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    config_logging.setup_logging()
+    handlers = logging.getLogger().handlers
+    assert [type(h) for h in handlers] == [logging.handlers.QueueHandler]
+
+    config_logging.logger.info("Assigned %d clusters", 3, extra={"run_id": "abc"})
+    config_logging.shutdown_logging()  # drains the queue
+
+    record = json.loads(read_log(log_dir)[-1])
+    assert record["message"] == "Assigned 3 clusters"
+    assert record["level"] == "INFO"
+    assert record["run_id"] == "abc"
+
+
+def test_debug_records_are_sampled(log_dir, monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "DEBUG")
+    monkeypatch.setenv("LOG_DEBUG_SAMPLE_RATE", "0")
+    config_logging.setup_logging()
+    config_logging.logger.debug("dropped")
+    config_logging.logger.info("kept")
+    config_logging.shutdown_logging()
+
+    lines = read_log(log_dir)
+    assert any(line.endswith("kept") for line in lines)
+    assert not any(line.endswith("dropped") for line in lines)
+
+
+def test_shutdown_detaches_the_queue_handler(log_dir):
+    config_logging.setup_logging()
+    config_logging.shutdown_logging()
+    # Nothing left to queue records that no listener would write
+    assert not any(
+        isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers
+    )
+    config_logging.logger.info("after shutdown")
+
+    # Set up again (e.g. a second app lifespan): a single queue handler
+    config_logging.setup_logging()
+    assert [type(h) for h in logging.getLogger().handlers] == [logging.handlers.QueueHandler]
@@ -0,0 +1,153 @@
+from datetime import datetime
+
+from app.api.routes.orders import get_clustering_settings, get_optimizer, get_pizza_prep_settings
+from app.auth.dependencies import get_current_user
+from app.crud import create_cluster, get_cluster_route
+from app.main import app
+from app.models.order import Order
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.schemas.cluster import (
+    ClusterRoute,
+    ClusterStatus,
+    DeliveryStep,
+    OrderCluster,
+    RouteSegment,
+)
+from app.schemas.order import DeliveryAddress, OrderResponse
+from app.schemas.user import UserPrincipal
+from app.services.orders import OrdersOptimizer
+from app.services.synthetic import SyntheticRoutePlanner
+
+RESTAURANT = DeliveryAddress(
+    address="Test address 123", postal_code="20100", city="Milan", country="Italy"
+)
+
+
+def build_cluster(orders) -> OrderCluster:
+    # Visit orders in reverse to check the visiting order is kept
+    visited = list(reversed(orders))
+    stops = [RESTAURANT] + [DeliveryAddress(**o.delivery_address) for o in visited] + [RESTAURANT]
+    segments = [
+        RouteSegment(
+            distance=100.0 * (idx + 1),
+            duration=60.0 * (idx + 1),
+            steps=[
+                DeliveryStep(
+                    name=f"Street {idx}",
+                    type=1,
+                    distance=100.0 * (idx + 1),
+                    duration=60.0 * (idx + 1),
+                    duration_from_start=60.0 * (idx + 1),
+                    instruction=f"Turn right onto Street {idx}",
+                    way_points=[idx, idx + 1],
+                )
+            ],
+            segment_start=start,
+            segment_end=end,
+            duration_from_start=60.0 * (idx + 1),
+            delivery_address=end,
+        )
+        for idx, (start, end) in enumerate(zip(stops[:-1], stops[1:]))
+    ]
+    cluster_route = ClusterRoute(
+        distance=sum(s.distance for s in segments),
+        duration=sum(s.duration for s in segments),
+        segments=segments,
+        order_ids=[o.id for o in visited],
+        geometry="u{~vFvyys@fS]",
+    )
+    return OrderCluster(
+        time_window=datetime.utcnow(),
+        orders=[OrderResponse.model_validate(o) for o in orders],
+        total_items=len(orders),
+        earliest_delivery_time=min(o.desired_delivery_time for o in orders),
+        cluster_route=cluster_route,
+        cluster_status=ClusterStatus.to_be_assigned,
+        relaxed_constraints=None,
+    )
+
+
+def test_create_cluster_stores_compact_route(client, session, orders):
+    session.add(
+        User(id=0, email="creator@example.com", full_name="Creator", hashed_password="x")
+    )
+    for order in orders[:3]:
+        order.creator_id = 0
+        session.add(order)
+    session.commit()
+
+    order_cluster = build_cluster(orders[:3])
+    create_cluster(db=session, order_cluster=order_cluster)
+    assert client.get(f"/api/v1/orders/clusters/{order_cluster.id}/route").status_code == 401
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(id=0, role="driver")
+
+    stored = get_cluster_route(db=session, cluster_id=order_cluster.id)
+    assert stored.order_ids == order_cluster.cluster_route.order_ids
+    assert stored.segment_durations == [60.0, 120.0, 180.0, 240.0]
+    assert stored.geometry == order_cluster.cluster_route.geometry
+
+    response = client.get(f"/api/v1/orders/clusters/{order_cluster.id}/route")
+    assert response.status_code == 200
+    assert response.json()["segment_distances"] == [100.0, 200.0, 300.0, 400.0]
+    assert "steps" not in response.text
+
+    response = client.get("/api/v1/orders/clusters/missing/route")
+    assert response.status_code == 404
+
+
+def test_cluster_directions(client, session, orders, logger):
+    session.add(
+        User(id=0, email="creator@example.com", full_name="Creator", hashed_password="x")
+    )
+    for order in orders[:3]:
+        order.creator_id = 0
+        session.add(order)
+    session.commit()
+    order_cluster = build_cluster(orders[:3])
+    create_cluster(db=session, order_cluster=order_cluster)
+    url = f"/api/v1/orders/clusters/{order_cluster.id}/directions"
+    assert client.get(url).status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(id=0, role="driver")
+    app.dependency_overrides[get_optimizer] = lambda: OrdersOptimizer(
+        db=session,
+        route_planner=SyntheticRoutePlanner(),
+        clustering_settings=get_clustering_settings(),
+        pizza_prep_settings=get_pizza_prep_settings(),
+        logger=logger,
+    )
+    response = client.get(url)
+    assert response.status_code == 200
+    directions = response.json()
+    # Expanded in the stored visiting order, with steps
+    assert directions["id"] == get_cluster_route(db=session, cluster_id=order_cluster.id).id
+    assert directions["order_ids"] == order_cluster.cluster_route.order_ids
+    assert all(segment["steps"] for segment in directions["segments"])
+    assert directions["segments"][0]["segment_start"]["address"] == get_clustering_settings().ADDRESS
+
+    # Orders of another restaurant: the route starts and ends there
+    restaurant = Restaurant(
+        name="Bella Calda Navigli",
+        lat=45.452,
+        lon=9.175,
+        address="Via Vigevano 18",
+        postal_code="20144",
+        city="Milan",
+    )
+    session.add(restaurant)
+    session.flush()
+    for order in orders[:3]:
+        order.restaurant_id = restaurant.id
+    session.commit()
+    segments = client.get(url).json()["segments"]
+    assert segments[0]["segment_start"]["address"] == "Via Vigevano 18"
+    assert segments[-1]["segment_end"]["address"] == "Via Vigevano 18"
+
+    assert client.get("/api/v1/orders/clusters/missing/directions").status_code == 404
+    # An order of the cluster was deleted since
+    session.query(Order).filter(Order.id == orders[0].id).delete()
+    session.commit()
+    response = client.get(url)
+    assert response.status_code == 409
+    assert str(orders[0].id) in response.json()["detail"]
@@ -0,0 +1,115 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.migrations import (
+    applied_versions,
+    discover_migrations,
+    downgrade_migrations,
+    run_migrations,
+)
+from app.migrations.versions.v0001_dispatch_indexes import INDEXES as DISPATCH_INDEXES
+
+INDEXES = list(DISPATCH_INDEXES) + ["ix_drivers_created_at_id"]
+
+
+def explain_query_plan(session, query) -> str:
+    """
+    Run the query prefixed with EXPLAIN QUERY PLAN, keeping SQLAlchemy's bind processing.
+    """
+    connection = session.connection()
+
+    def prefix_explain(conn, cursor, statement, parameters, context, executemany):
+        return f"EXPLAIN QUERY PLAN {statement}", parameters
+
+    event.listen(connection, "before_cursor_execute", prefix_explain, retval=True)
+    try:
+        cursor = connection.execute(query.statement).cursor
+        rows = cursor.fetchall()
+    finally:
+        event.remove(connection, "before_cursor_execute", prefix_explain)
+    return " | ".join(row[-1] for row in rows)
+
+
+def index_names(engine):
+    inspector = inspect(engine)
+    return {
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+
+def test_migrations_add_dispatch_indexes():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    # Simulate a database created before the indexes were declared
+    with engine.begin() as connection:
+        for name in INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+    assert not set(INDEXES) & index_names(engine)
+
+    applied = run_migrations(engine)
+    assert [m.version for m in applied] == [m.version for m in discover_migrations()]
+    assert set(INDEXES) <= index_names(engine)
+    # Idempotent
+    assert run_migrations(engine) == []
+
+    downgrade_migrations(engine, target=0)
+    assert not set(INDEXES) & index_names(engine)
+    with engine.connect() as connection:
+        assert applied_versions(connection) == set()
+
+
+def test_migration_compacts_legacy_cluster_routes():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    # Simulate the legacy schema storing the full route as JSON
+    legacy_route = (
+        '{"id": "ab12", "distance": 300.0, "duration": 90.0, "segments": ['
+        '{"distance": 100.0, "duration": 30.0, "steps": [{"instruction": "Head north"}]},'
+        '{"distance": 200.0, "duration": 60.0, "steps": [{"instruction": "Arrive"}]}]}'
+    )
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE cluster_routes"))
+        connection.execute(text("ALTER TABLE order_clusters ADD COLUMN cluster_route JSON"))
+        connection.execute(
+            text(
+                "INSERT INTO order_clusters (id, time_window, total_items, "
+                "earliest_delivery_time, cluster_status, relaxed_constraints, cluster_route) "
+                "VALUES ('c1', '2025-01-01 20:00:00', 1, '2025-01-01 20:15:00', "
+                "'to_be_assigned', 'null', :route)"
+            ),
+            {"route": legacy_route},
+        )
+        connection.execute(
+            text("INSERT INTO order_cluster_association VALUES ('c1', 7)")
+        )
+
+    run_migrations(engine)
+
+    columns = {c["name"] for c in inspect(engine).get_columns("order_clusters")}
+    assert "cluster_route" not in columns
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT * FROM cluster_routes")).mappings().one()
+    assert row["cluster_id"] == "c1"
+    assert row["segment_durations"] == "[30.0, 60.0]"
+    assert row["order_ids"] == "[7]"
+
+
+def test_dispatch_queries_use_indexes(orders_optimizer):
+    orders_plan = explain_query_plan(
+        orders_optimizer.db, orders_optimizer.unassigned_orders_query()
+    )
+    assert "USING INDEX ix_orders_status" in orders_plan
+
+    drivers_plan = explain_query_plan(
+        orders_optimizer.db,
+        orders_optimizer.available_drivers_query(
+            eta_threshold_minutes=10, now=datetime.utcnow()
+        ),
+    )
+    assert "SCAN drivers" not in drivers_plan
+    assert "USING INDEX ix_drivers_status_estimated_finish_time" in drivers_plan
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.main import app
+from app.models.driver import Driver, DriverStatus
+from app.models.user import User
+from app.services.drivers import DriverLocationStore, get_driver_location_store
+from scripts.constants import DRIVER_LOCATIONS_ENDPOINT, DRIVER_UPDATE_ENDPOINT
+
+NOW = datetime(2025, 1, 4, 20, 0)
+
+
+@pytest.fixture
+def drivers(session):
+    for i in (1, 2, 3):
+        session.add(User(id=i, email=f"d{i}@example.com", full_name=f"D{i}", hashed_password="x"))
+        session.add(
+            Driver(
+                id=i,
+                user_id=i,
+                full_name=f"D{i}",
+                status=DriverStatus.AVAILABLE,
+                lat=45.0,
+                lon=9.0,
+            )
+        )
+    session.commit()
+
+
+@pytest.fixture
+def store():
+    store = DriverLocationStore(max_age_seconds=60, clock=lambda: NOW)
+    app.dependency_overrides[get_driver_location_store] = lambda: store
+    yield store
+    app.dependency_overrides.pop(get_driver_location_store, None)
+
+
+def count_statements(session):
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def test_store_coalesces_and_ignores_stale_pings(store):
+    assert store.record(1, lat=45.1, lon=9.1, recorded_at=NOW - timedelta(seconds=10))
+    assert store.record(1, lat=45.2, lon=9.2, recorded_at=NOW - timedelta(seconds=5))
+    assert not store.record(1, lat=45.3, lon=9.3, recorded_at=NOW - timedelta(seconds=8))
+    assert store.get(1).lat == 45.2
+    assert store.pending == 1
+
+    store.record(2, lat=45.0, lon=9.0, recorded_at=NOW - timedelta(seconds=61))
+    assert store.get(2) is None
+    assert set(store.fresh_locations([1, 2, 3])) == {1}
+
+
+def test_future_pings_count_as_received_now(store):
+    assert store.record(1, lat=45.1, lon=9.1, recorded_at=NOW + timedelta(hours=1))
+    assert store.get(1).recorded_at == NOW
+    # Not locked out by the fast clock
+    assert store.record(1, lat=45.2, lon=9.2, recorded_at=NOW)
+    assert store.get(1).lat == 45.2
+
+
+def test_flush_writes_latest_positions_in_one_statement(session, drivers, store):
+    for i in range(20):
+        store.record(1 + i % 3, lat=45.0 + i / 100, lon=9.0 + i / 100, recorded_at=NOW)
+    store.record(99, lat=45.0, lon=9.0)  # unknown driver: no row to update
+
+    statements = count_statements(session)
+    assert store.flush(session) == 3
+    assert len([s for s in statements if s.startswith("UPDATE")]) == 1
+    assert store.pending == 0
+    # The unknown driver is forgotten
+    assert len(store) == 3 and store.get(99) is None
+    assert store.flush(session) == 0
+
+    session.expire_all()
+    positions = {d.id: (d.lat, d.lon) for d in session.query(Driver)}
+    assert positions[1] == pytest.approx((45.18, 9.18))
+    assert positions[3] == pytest.approx((45.17, 9.17))
+
+
+def test_flush_evicts_expired_positions(session, drivers):
+    clock = {"now": NOW}
+    store = DriverLocationStore(max_age_seconds=60, clock=lambda: clock["now"])
+    store.record(1, lat=45.1, lon=9.1)
+    store.record(2, lat=45.2, lon=9.2)
+    assert store.flush(session) == 2 and len(store) == 2
+
+    clock["now"] = NOW + timedelta(seconds=90)
+    store.record(2, lat=45.3, lon=9.3)
+    # Too old to be served or to overwrite a newer position
+    assert not store.record(3, lat=45.4, lon=9.4, recorded_at=NOW)
+    assert store.flush(session) == 1
+    assert len(store) == 1 and store.get(2).lat == 45.3
+
+
+def test_failed_flush_keeps_positions_pending(session, drivers, store):
+    store.record(1, lat=45.5, lon=9.5)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database down")
+
+    event.listen(session.get_bind(), "before_cursor_execute", fail)
+    try:
+        with pytest.raises(RuntimeError, match="database down"):
+            store.flush(session)
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", fail)
+
+    assert store.pending == 1
+    assert store.flush(session) == 1
+
+
+def test_ingest_endpoint_buffers_pings(client, session, drivers, store):
+    response = client.post(
+        DRIVER_LOCATIONS_ENDPOINT,
+        json={
+            "pings": [
+                {"driver_id": 1, "lat": 45.47, "lon": 9.19, "recorded_at": NOW.isoformat()},
+                {"driver_id": 1, "lat": 45.4, "lon": 9.1,
+                 "recorded_at": (NOW - timedelta(seconds=30)).isoformat()},
+                {"driver_id": 2, "lat": 45.48, "lon": 9.2},
+            ]
+        },
+    )
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2, "stale": 1}
+    # Nothing written yet
+    assert session.get(Driver, 1).lat == 45.0
+
+    assert client.post(DRIVER_LOCATIONS_ENDPOINT, json={"pings": []}).status_code == 422
+    # Offset-aware times are stored as naive UTC
+    utc_ping = {"driver_id": 3, "lat": 45.5, "lon": 9.3, "recorded_at": "2025-01-04T21:00:00+01:00"}
+    assert client.post(DRIVER_LOCATIONS_ENDPOINT, json={"pings": [utc_ping]}).status_code == 202
+    zulu_ping = {**utc_ping, "lat": 45.6, "recorded_at": "2025-01-04T19:59:50Z"}
+    assert client.post(DRIVER_LOCATIONS_ENDPOINT, json={"pings": [zulu_ping]}).json() == {
+        "accepted": 0,
+        "stale": 1,
+    }
+    assert store.get(3).recorded_at == NOW and store.get(3).lat == 45.5
+    assert set(store.fresh_locations([1, 2, 3])) == {1, 2, 3}
+
+    bad_ping = {"pings": [{"driver_id": 1, "lat": 145.0, "lon": 9.0}]}
+    assert client.post(DRIVER_LOCATIONS_ENDPOINT, json=bad_ping).status_code == 422
+
+
+def test_patch_location_supersedes_buffered_ping(client, drivers, store):
+    store.record(1, lat=45.47, lon=9.19)
+    response = client.patch(DRIVER_UPDATE_ENDPOINT.format(driver_id=1), json={"lat": 45.1, "lon": 9.1})
+    assert response.status_code == 200
+    assert store.get(1) is None and store.pending == 0
+
+    store.record(2, lat=45.47, lon=9.19)
+    client.patch(DRIVER_UPDATE_ENDPOINT.format(driver_id=2), json={"status": "delivering"})
+    assert store.get(2) is not None
+
+
+def test_optimizer_reads_fresh_locations(session, drivers, orders_optimizer):
+    store = DriverLocationStore(max_age_seconds=60)
+    store.record(2, lat=45.49, lon=9.21)
+    store.record(3, lat=45.3, lon=9.3, recorded_at=datetime.utcnow() - timedelta(minutes=5))
+    orders_optimizer.location_store = store
+
+    drivers = {d.id: d for d in orders_optimizer.fetch_available_drivers_with_location()}
+    assert (drivers[2].lat, drivers[2].lon) == (45.49, 9.21)
+    assert (drivers[1].lat, drivers[1].lon) == (45.0, 9.0)
+    assert (drivers[3].lat, drivers[3].lon) == (45.0, 9.0)
+    # Overlaid positions are not written back by the optimizer's session
+    assert not session.dirty
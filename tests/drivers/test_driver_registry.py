@@ -0,0 +1,184 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.driver import update_driver_status
+from app.models.driver import Driver, DriverStatus
+from app.models.user import User
+from app.schemas.driver import DriverOut
+from app.services.drivers import DriverRegistry, get_driver_registry, rank_by_distance
+from scripts.constants import DRIVER_GET_AVAILABLE_ENDPOINT
+
+NOW = datetime(2025, 1, 4, 20, 0)
+CENTER = (45.4642, 9.19)
+
+
+def snapshot(driver_id, lat, lon, status=DriverStatus.AVAILABLE, finish=None):
+    return DriverOut(
+        id=driver_id,
+        user_id=driver_id,
+        full_name=f"Driver {driver_id}",
+        status=status,
+        lat=lat,
+        lon=lon,
+        estimated_finish_time=finish,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+@pytest.fixture
+def registry():
+    registry = get_driver_registry()
+    registry.load([])
+    yield registry
+    registry.clear()
+
+
+def random_drivers(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        snapshot(
+            i + 1,
+            CENTER[0] + rng.uniform(-0.1, 0.1),
+            CENTER[1] + rng.uniform(-0.15, 0.15),
+            status=rng.choice([DriverStatus.AVAILABLE, DriverStatus.DELIVERING, DriverStatus.OFFLINE]),
+            finish=NOW + timedelta(minutes=rng.uniform(0, 30)),
+        )
+        for i in range(n)
+    ]
+
+
+def test_nearest_and_radius_match_brute_force():
+    drivers = random_drivers(500)
+    registry = DriverRegistry(cell_km=0.5)
+    registry.load(drivers)
+    dispatchable = registry.available(now=NOW, eta_threshold_minutes=10)
+    assert 0 < len(dispatchable) < len(drivers)
+
+    for lat, lon in [CENTER, (45.5, 9.3), (46.0, 10.0)]:
+        expected = rank_by_distance(dispatchable, lat, lon)
+        for k in (1, 5, 40):
+            nearest = registry.nearest(lat, lon, k=k, now=NOW, eta_threshold_minutes=10)
+            assert [d.id for d, _ in nearest] == [d.id for d, _ in expected[:k]]
+        within = registry.within_radius(lat, lon, radius_km=3.0, now=NOW, eta_threshold_minutes=10)
+        assert [d.id for d, _ in within] == [d.id for d, dist in expected if dist <= 3.0]
+
+    capped = registry.nearest(*CENTER, k=40, now=NOW, eta_threshold_minutes=10, max_radius_km=3.0)
+    expected = [d.id for d, dist in rank_by_distance(dispatchable, *CENTER) if dist <= 3.0]
+    assert expected and [d.id for d, _ in capped] == expected
+
+
+def test_nearest_with_an_outlier_and_few_drivers():
+    drivers = random_drivers(50, seed=1)
+    # A stale driver far away from the others, and one dispatchable at the other end
+    outliers = [
+        snapshot(51, 0.0, 0.0, status=DriverStatus.OFFLINE),
+        snapshot(52, -40.0, 120.0),
+    ]
+    registry = DriverRegistry(cell_km=1.0)
+    registry.load(drivers + outliers)
+    expected = rank_by_distance(registry.available(now=NOW, eta_threshold_minutes=10), *CENTER)
+
+    start = time.perf_counter()
+    nearest = registry.nearest(*CENTER, k=100, now=NOW, eta_threshold_minutes=10)
+    assert time.perf_counter() - start < 1.0
+    assert [d.id for d, _ in nearest] == [d.id for d, _ in expected]
+    assert nearest[-1][0].id == 52
+
+
+def test_eligibility_and_updates():
+    registry = DriverRegistry(cell_km=1.0)
+    registry.load(
+        [
+            snapshot(1, *CENTER),
+            snapshot(2, *CENTER, status=DriverStatus.DELIVERING, finish=NOW + timedelta(minutes=5)),
+            snapshot(3, *CENTER, status=DriverStatus.DELIVERING, finish=NOW + timedelta(minutes=30)),
+            snapshot(4, *CENTER, status=DriverStatus.OFFLINE),
+            snapshot(5, None, None),
+        ]
+    )
+    ids = lambda pairs: sorted(d.id for d, _ in pairs)  # noqa: E731
+    assert ids(registry.within_radius(*CENTER, 1.0, now=NOW, eta_threshold_minutes=10)) == [1, 2]
+
+    registry.update_location(1, lat=45.6, lon=9.4)
+    registry.update_location(5, lat=CENTER[0], lon=CENTER[1])
+    assert ids(registry.within_radius(*CENTER, 1.0, now=NOW, eta_threshold_minutes=10)) == [2, 5]
+
+    registry.set_status([2], DriverStatus.DELIVERING, estimated_finish_time=NOW + timedelta(hours=1))
+    registry.remove(5)
+    assert registry.within_radius(*CENTER, 1.0, now=NOW, eta_threshold_minutes=10) == []
+    assert [d.id for d, _ in registry.nearest(*CENTER, k=3, now=NOW, eta_threshold_minutes=10)] == [1]
+    assert len(registry) == 4
+
+
+def add_driver(session, driver_id, lat=CENTER[0], lon=CENTER[1]):
+    session.add(User(id=driver_id, email=f"r{driver_id}@example.com", full_name="R", hashed_password="x"))
+    session.add(Driver(id=driver_id, user_id=driver_id, full_name=f"R{driver_id}", lat=lat, lon=lon))
+
+
+def test_registry_follows_committed_writes(session, registry):
+    add_driver(session, 1)
+    session.commit()
+    assert registry.get(1).lat == CENTER[0]
+
+    add_driver(session, 2)
+    session.flush()
+    session.rollback()
+    assert registry.get(2) is None
+
+    driver = session.get(Driver, 1)
+    driver.lat = 45.5
+    session.commit()
+    assert registry.get(1).lat == 45.5
+
+    update_driver_status(db=session, driver_ids=[1])
+    assert registry.get(1).status == DriverStatus.DELIVERING
+
+    session.delete(session.get(Driver, 1))
+    session.commit()
+    assert registry.get(1) is None
+
+
+def test_available_endpoint_geo_queries(client, session, registry):
+    add_driver(session, 1, lat=45.465, lon=9.19)
+    add_driver(session, 2, lat=45.47, lon=9.2)
+    add_driver(session, 3, lat=45.55, lon=9.4)
+    session.commit()
+
+    def query(**params):
+        response = client.get(DRIVER_GET_AVAILABLE_ENDPOINT, params=params)
+        assert response.status_code == 200
+        return [d["id"] for d in response.json()]
+
+    assert query(lat=CENTER[0], lon=CENTER[1], k=2) == [1, 2]
+    assert query(lat=CENTER[0], lon=CENTER[1], radius_km=5) == [1, 2]
+    assert query(lat=CENTER[0], lon=CENTER[1]) == [1, 2, 3]
+
+    # Same answers from the database
+    registry.clear()
+    assert query(lat=CENTER[0], lon=CENTER[1], k=2) == [1, 2]
+    assert query(lat=CENTER[0], lon=CENTER[1], radius_km=5) == [1, 2]
+    assert client.get(DRIVER_GET_AVAILABLE_ENDPOINT, params={"lat": 45.0}).status_code == 400
+
+
+def test_optimizer_candidates_from_registry(session, registry, orders_optimizer):
+    add_driver(session, 1, lat=45.465, lon=9.19)
+    add_driver(session, 2, lat=45.55, lon=9.4)
+    add_driver(session, 3, lat=45.47, lon=9.2)
+    session.commit()
+    orders_optimizer.driver_registry = registry
+    orders_optimizer.clustering_settings = orders_optimizer.clustering_settings.model_copy(
+        update={"MAX_CANDIDATE_DRIVERS": 2}
+    )
+
+    drivers = orders_optimizer.fetch_available_drivers_with_location()
+    assert [d.id for d in drivers] == [1, 3]
+    assert all(isinstance(d, DriverOut) for d in drivers)
+
+    registry.clear()
+    drivers = orders_optimizer.fetch_available_drivers_with_location()
+    assert [d.id for d in drivers] == [1, 3]
+    assert all(isinstance(d, Driver) for d in drivers)
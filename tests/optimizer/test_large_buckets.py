@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from app.services.orders import OrdersOptimizer
+from app.services.orders.sparse_clustering import windows
+from app.services.synthetic import DemandConfig, ScenarioConfig, generate_scenario
+
+
+@pytest.fixture
+def scenario():
+    return generate_scenario(ScenarioConfig(seed=8, demand=DemandConfig(n_orders=400)))
+
+
+def make_optimizer(scenario, logger, **settings):
+    route_planner = scenario.route_planner()
+    sizes = []
+    compute_distance_matrix = route_planner.compute_distance_matrix
+
+    def counted(coords):
+        sizes.append(len(coords))
+        return compute_distance_matrix(coords=coords)
+
+    route_planner.compute_distance_matrix = counted
+    optimizer = OrdersOptimizer(
+        db=None,
+        route_planner=route_planner,
+        clustering_settings=scenario.clustering_settings(**settings),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+    )
+    return optimizer, sizes
+
+
+def as_sets(clusters):
+    return {frozenset(o.id for o in cluster) for cluster in clusters}
+
+
+@pytest.mark.asyncio
+async def test_large_bucket_avoids_the_full_matrix(scenario, logger):
+    orders = scenario.orders
+    optimizer, sizes = make_optimizer(scenario, logger, LARGE_BUCKET_SIZE=100)
+    clusters = await optimizer.cluster_orders_by_geographic_proximity(orders=orders)
+
+    # Every order once, within capacity
+    assert sorted(o.id for cluster in clusters for o in cluster) == sorted(o.id for o in orders)
+    for cluster in clusters:
+        assert optimizer.compute_total_items(cluster) <= 10
+    # Many small matrices instead of a 400 x 400 one
+    assert len(sizes) > 1
+    assert max(sizes) < len(orders) / 2
+    assert sum(n * n for n in sizes) < len(orders) ** 2
+
+    # Too small to be a large bucket: a single full matrix
+    optimizer, sizes = make_optimizer(scenario, logger, LARGE_BUCKET_SIZE=0)
+    dense = await optimizer.cluster_orders_by_geographic_proximity(orders=orders)
+    assert sizes == [len(orders)]
+    assert len(clusters) == pytest.approx(len(dense), rel=0.2)
+
+
+@pytest.mark.asyncio
+async def test_single_cell_matches_the_full_matrix(scenario, logger):
+    orders = scenario.orders[:150]
+    dense_optimizer, _ = make_optimizer(scenario, logger, LARGE_BUCKET_SIZE=0)
+    # No capacity split: it depends on the order of the orders within a cluster
+    dense = await dense_optimizer.cluster_orders_by_geographic_proximity(
+        orders=orders, max_pizzas_per_cluster=len(orders) * 10
+    )
+
+    # One cell covers the city: every pair is compared, and splitting by connected
+    # components does not change the average linkage clusters
+    optimizer, sizes = make_optimizer(
+        scenario, logger, LARGE_BUCKET_SIZE=100, LARGE_BUCKET_CELL_KM=100.0
+    )
+    groups, approximate = optimizer.cluster_large_bucket(
+        orders=orders, cluster_distance_threshold=120, max_component_size=len(orders)
+    )
+    assert sizes == [len(orders)] and not approximate
+    assert as_sets(groups) == as_sets(dense)
+
+
+def test_large_components_stay_within_the_threshold(scenario, logger):
+    optimizer, _ = make_optimizer(scenario, logger, LARGE_BUCKET_SIZE=100)
+    orders = scenario.orders
+    # At 120 s, most orders chain into a single component; every component goes through
+    # the sparse complete linkage
+    groups, _ = optimizer.cluster_large_bucket(
+        orders=orders, cluster_distance_threshold=120, max_component_size=1
+    )
+    assert sorted(o.id for group in groups for o in group) == sorted(o.id for o in orders)
+    assert len(groups) < len(orders) / 2
+    route_planner = scenario.route_planner()
+    for group in groups:
+        matrix = route_planner.compute_distance_matrix([(o.lon, o.lat) for o in group])
+        assert max(max(row) for row in matrix["durations"]) <= 120
+
+
+def test_windows_cover_touching_cells_once():
+    rng = random.Random(2)
+    cells = {}
+    for index in range(600):
+        cells.setdefault((rng.randrange(40), rng.randrange(40)), []).append(index)
+    groups = [set(group) for group in windows(cells)]
+    # No window is part of another one
+    assert not any(a < b for a in groups for b in groups)
+    # Any two orders of touching cells share a window
+    for (i, j), members in cells.items():
+        for neighbour in [(i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)]:
+            if neighbour in cells:
+                pair = {members[0], cells[neighbour][0]}
+                assert any(pair <= group for group in groups)
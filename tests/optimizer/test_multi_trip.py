@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.driver import Driver
+from app.models.order import Order, OrderStatus
+from app.services.orders import OrdersOptimizer
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    generate_scenario,
+    persist_scenario,
+)
+
+START = datetime(2025, 1, 3, 18, 0)
+
+
+@pytest.fixture
+def understaffed(session, logger):
+    # 30 orders over two hours, 2 drivers
+    scenario = generate_scenario(
+        ScenarioConfig(
+            seed=1,
+            start=START,
+            demand=DemandConfig(n_orders=30, horizon_minutes=120, min_lead_minutes=20),
+            fleet=FleetConfig(n_drivers=2, delivering_share=0.0),
+        )
+    )
+    persist_scenario(session, scenario)
+
+    def make_optimizer(**settings):
+        return OrdersOptimizer(
+            db=session,
+            route_planner=scenario.route_planner(),
+            clustering_settings=scenario.clustering_settings(**settings),
+            pizza_prep_settings=scenario.pizza_prep_settings,
+            logger=logger,
+            clock=lambda: START,
+        )
+
+    return make_optimizer
+
+
+@pytest.mark.asyncio
+async def test_one_cluster_per_driver_by_default(understaffed):
+    out = await understaffed().run()
+    assert len(out["driver_to_cluster"]) == 2
+    assert out["chained_trips"] == {}
+    assert len(out["unassigned_clusters"]) > 2
+
+
+@pytest.mark.asyncio
+async def test_chained_trips_hold_constraints(session, understaffed):
+    horizon = 60
+    optimizer = understaffed(MULTI_TRIP_HORIZON_MINUTES=horizon)
+    out = await optimizer.run()
+    chained = out["chained_trips"]
+    assert set(chained) == set(out["driver_to_cluster"])
+
+    max_hotness = timedelta(minutes=optimizer.DEFAULT_CONSTRAINTS["max_hotness"])
+    lateness_tol = timedelta(minutes=optimizer.DEFAULT_CONSTRAINTS["lateness_tol"])
+    for driver_id, trips in chained.items():
+        first = out["driver_to_cluster"][driver_id]["cluster"]
+        departure = optimizer.cluster_ready_time(first, START)
+        back_at = optimizer.trip_return_time(
+            first,
+            optimizer.simulate_delivery_times(first, departure, timedelta(seconds=120)),
+        )
+        for trip in trips:
+            cluster = trip["cluster"]
+            # Leaves once back, with the driver back within the horizon
+            assert back_at <= START + timedelta(minutes=horizon)
+            assert trip["departure_time"] >= back_at
+            deliveries = optimizer.simulate_delivery_times(
+                cluster, trip["departure_time"], timedelta(seconds=120)
+            )
+            for est in deliveries.values():
+                assert est["delivery_time"] - trip["departure_time"] <= max_hotness
+                assert est["delivery_time"] - cluster.earliest_delivery_time <= lateness_tol
+            back_at = trip["return_time"]
+            assert back_at == optimizer.trip_return_time(cluster, deliveries)
+            assert cluster.id not in out["unassigned_clusters"]
+            orders = session.query(Order).filter(Order.id.in_(cluster.get_order_ids))
+            assert {o.status for o in orders} == {OrderStatus.assigned}
+
+        # Busy until the end of its last trip
+        assert session.get(Driver, driver_id).estimated_finish_time == back_at
+
+    # Drivers are not candidates again before their last trip ends
+    assert optimizer.fetch_available_drivers_with_location(eta_threshold_minutes=10) == []
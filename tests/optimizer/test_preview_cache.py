@@ -0,0 +1,49 @@
+from app.api.routes.orders import get_cluster_preview_cache
+from app.models.user import User
+from app.services.orders import ClusterPreviewCache
+from scripts.constants import CLUSTER_BY_TIME_ENDPOINT
+
+
+def test_cluster_preview_cache_ttl_and_invalidation():
+    now = [0.0]
+    cache = ClusterPreviewCache(ttl_seconds=5, clock=lambda: now[0])
+
+    cache.set("key", b"[]")
+    assert cache.get("key") == b"[]"
+    now[0] = 5.0
+    assert cache.get("key") is None  # expired
+
+    cache.set("key", b"[]")
+    cache.invalidate()
+    assert cache.get("key") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    disabled = ClusterPreviewCache(ttl_seconds=0)
+    disabled.set("key", b"[]")
+    assert disabled.get("key") is None
+
+
+def test_routes_clusters_by_time_cached_by_pending_fingerprint(client, session, orders):
+    preview_cache = get_cluster_preview_cache()
+    preview_cache.invalidate()
+    session.add(
+        User(id=0, email="creator@example.com", full_name="Creator", hashed_password="x")
+    )
+    for order in orders[:-1]:
+        session.add(order)
+    session.commit()
+
+    first = client.get(url=CLUSTER_BY_TIME_ENDPOINT)
+    hits = preview_cache.hits
+    second = client.get(url=CLUSTER_BY_TIME_ENDPOINT)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert preview_cache.hits == hits + 1
+
+    # A new pending order changes the fingerprint
+    session.add(orders[-1])
+    session.commit()
+    third = client.get(url=CLUSTER_BY_TIME_ENDPOINT)
+    assert preview_cache.hits == hits + 1
+    total = sum(len(bucket) for bucket in third.json().values())
+    assert total == len(orders)
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.orders import OrdersOptimizer
+from app.services.simulation import SimulatedClock
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    generate_scenario,
+    persist_scenario,
+)
+
+START = datetime(2025, 1, 3, 18, 0)
+
+
+@pytest.fixture
+def scenario(session):
+    scenario = generate_scenario(
+        ScenarioConfig(
+            seed=4,
+            start=START,
+            demand=DemandConfig(n_orders=40, priority_share=0.3),
+            fleet=FleetConfig(n_drivers=1, delivering_share=0.0),
+        )
+    )
+    persist_scenario(session, scenario)
+    return scenario
+
+
+@pytest.fixture
+def optimizer(session, logger, scenario):
+    return OrdersOptimizer(
+        db=session,
+        route_planner=scenario.route_planner(),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+        clock=SimulatedClock(START),
+    )
+
+
+def as_priority(cluster):
+    return cluster.model_copy(
+        update={
+            "id": f"{cluster.id}-priority",
+            "orders": [o.model_copy(update={"priority": True}) for o in cluster.orders],
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_priority_orders_are_clustered_apart(optimizer, scenario):
+    assert any(o.priority for o in scenario.orders)
+    clusters = await optimizer.compute_clustered_orders(filtered_orders=scenario.orders)
+    for cluster in clusters:
+        assert len({o.priority for o in cluster.orders}) == 1
+    ordered = sorted(clusters, key=optimizer.kitchen_order)
+    priority = [c.priority for c in ordered]
+    assert priority == sorted(priority, reverse=True)
+
+    profile = optimizer._default_profile(priority=True)
+    assert profile["constraints"] == optimizer.PRIORITY_CONSTRAINTS
+    # Relaxation starts from the priority tolerances
+    assert optimizer.relax_hotness(profile, 1)["constraints"]["max_hotness"] == 20
+    assert optimizer.relax_lateness(profile, 1)["constraints"]["lateness_tol"] == 10
+
+
+@pytest.mark.asyncio
+async def test_priority_cluster_gets_the_driver(optimizer, scenario):
+    clusters = await optimizer.compute_clustered_orders(
+        filtered_orders=[o for o in scenario.orders if not o.priority]
+    )
+    normal = min(clusters, key=lambda c: c.cluster_route.duration)
+    priority = as_priority(normal)
+    optimizer.clock.now = normal.earliest_delivery_time - timedelta(minutes=40)
+    drivers = optimizer.fetch_available_drivers_with_location()
+    assert len(drivers) == 1
+
+    # Same route and cost: a plain assignment would pick the first (normal) one
+    out = optimizer.try_assign_cluster(clusters=[normal, priority], drivers=drivers)
+    assert out["driver_to_cluster"][drivers[0].id]["cluster"].id == priority.id
+    assert list(out["unassigned_clusters"]) == [normal.id]
+
+
+@pytest.mark.asyncio
+async def test_relaxation_does_not_defer_priority_clusters(optimizer, scenario):
+    clusters = await optimizer.compute_clustered_orders(
+        filtered_orders=[o for o in scenario.orders if not o.priority]
+    )
+    normal = min(clusters, key=lambda c: c.cluster_route.duration)
+    priority = as_priority(normal)
+    # Already late: the first relaxation rounds cannot assign either cluster
+    optimizer.clock.now = normal.earliest_delivery_time + timedelta(minutes=20)
+    drivers = optimizer.fetch_available_drivers_with_location()
+    unassigned = {c.id: {"cluster": c, "motivations": ""} for c in (normal, priority)}
+    assert optimizer.try_assign_cluster(clusters=[normal, priority], drivers=drivers)[
+        "driver_to_cluster"
+    ] == {}
+
+    relaxed, still_unassigned = optimizer.relax_unassigned_batch(
+        unassigned_clusters=unassigned,
+        drivers=drivers,
+        strategies=optimizer.relaxation_strategies,
+        max_rounds=100,
+    )
+    assert [v["cluster"].id for v in relaxed.values()] == [priority.id]
+    assert list(still_unassigned) == [normal.id]
+    assert len(relaxed[drivers[0].id]["relaxation_log"]) > 2
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from app.config import ProfilingSettings
+from app.models.user import User
+from app.services.orders.run_profiler import (
+    MATRIX_CELL_BYTES,
+    RunProfiler,
+    current_profiler,
+    profile_stage,
+    record_matrix,
+    record_route_planner_call,
+)
+
+
+def test_run_profiler_stages_and_counters(session):
+    with RunProfiler(db=session) as profiler:
+        assert current_profiler() is profiler
+        with profile_stage("fetch"):
+            session.query(User).all()
+            with profile_stage("nested"):
+                session.query(User).count()
+        with profile_stage("fetch"):
+            pass
+        record_route_planner_call(
+            "distance_matrix", {"durations": [[0, 1], [1, 0]], "metadata": {"a": 1}}
+        )
+        record_route_planner_call("directions", {"routes": [{"geometry": "abc"}]})
+        record_matrix("distance_matrix", (2, 2))
+    assert current_profiler() is None
+
+    report = profiler.report()
+    assert report["stages"]["fetch"]["calls"] == 2
+    assert report["stages"]["fetch"]["db_statements"] == 1
+    assert report["stages"]["nested"]["db_statements"] == 1
+    assert report["db_statements"] == 2
+    # Matrices are sized from their shape, the rest of the response is serialized
+    assert report["route_planner"]["distance_matrix"] == {
+        "calls": 1,
+        "bytes": len('{"metadata":{"a":1}}') + 4 * MATRIX_CELL_BYTES,
+    }
+    assert report["route_planner"]["directions"]["bytes"] == len('{"routes":[{"geometry":"abc"}]}')
+    assert report["matrices"] == {"distance_matrix": [[2, 2]]}
+    assert report["wall_s"] >= report["stages"]["fetch"]["wall_s"]
+
+    # Statements issued after the run are not counted
+    session.query(User).all()
+    assert profiler.report()["db_statements"] == 2
+
+
+def test_profile_helpers_are_noop_outside_runs():
+    with profile_stage("anything"):
+        record_matrix("assignment_cost", (1, 1))
+    assert current_profiler() is None
+
+
+@pytest.mark.asyncio
+async def test_optimizer_run_returns_profile(orders_optimizer, tmp_path):
+    orders_optimizer.profiling_settings = ProfilingSettings(
+        CPROFILE_OUTPUT_DIR=str(tmp_path)
+    )
+    out = await orders_optimizer.run(capture_cprofile=True)
+    profile = out["profile"]
+    assert {"fetch_orders", "cluster_orders", "fetch_drivers", "assignment"} <= set(
+        profile["stages"]
+    )
+    assert profile["db_statements"] >= 2
+    assert os.path.exists(profile["cprofile_file"])
@@ -0,0 +1,147 @@
+from dataclasses import replace
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.models.cluster import OrderCluster
+from app.models.order import Order
+from app.services.orders import OrdersOptimizer, WarmStartState
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    generate_scenario,
+    persist_scenario,
+)
+
+
+@pytest.fixture
+def scenario():
+    # No drivers: every cluster is deferred to the next run
+    return generate_scenario(
+        ScenarioConfig(
+            seed=11,
+            demand=DemandConfig(n_orders=40, n_creators=2),
+            fleet=FleetConfig(n_drivers=0),
+        )
+    )
+
+
+def make_optimizer(session, scenario, logger, warm_start, **settings):
+    route_planner = scenario.route_planner()
+    calls = {"directions": 0, "distance_matrix": 0}
+
+    def counted(name, method):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    route_planner.get_directions = counted("directions", route_planner.get_directions)
+    route_planner.compute_distance_matrix = counted(
+        "distance_matrix", route_planner.compute_distance_matrix
+    )
+    optimizer = OrdersOptimizer(
+        db=session,
+        route_planner=route_planner,
+        clustering_settings=scenario.clustering_settings(WARM_START=True, **settings),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+        warm_start=warm_start,
+    )
+    return optimizer, calls
+
+
+def warm_start_clusters(out):
+    return [v["cluster"] for v in out["unassigned_clusters"].values()]
+
+
+@pytest.mark.asyncio
+async def test_deferred_clusters_are_reused(session, logger, scenario):
+    *first_orders, late_order = scenario.orders
+    persist_scenario(session, replace(scenario, orders=first_orders))
+    warm_start = WarmStartState()
+
+    optimizer, calls = make_optimizer(session, scenario, logger, warm_start)
+    first = await optimizer.run()
+    assert first["driver_to_cluster"] == {}
+    assert len(warm_start) == len(first["unassigned_clusters"]) > 0
+    assert calls["directions"] == len(first["unassigned_clusters"])
+    persisted = session.query(OrderCluster).count()
+
+    # Nothing changed: same clusters, no route planner calls, no new rows
+    optimizer, calls = make_optimizer(session, scenario, logger, warm_start)
+    second = await optimizer.run()
+    assert set(second["unassigned_clusters"]) == set(first["unassigned_clusters"])
+    assert calls == {"directions": 0, "distance_matrix": 0}
+    assert warm_start.reclustered_orders == 0
+    assert session.query(OrderCluster).count() == persisted
+
+    # A new order only re-clusters its time window
+    persist_scenario(session, replace(scenario, users=[], drivers=[], orders=[late_order]))
+    window = optimizer.cluster_orders_by_time_window([late_order])
+    [(time_window, _)] = window.items()
+    same_window = [c for c in warm_start_clusters(first) if c.time_window == time_window]
+    optimizer, calls = make_optimizer(session, scenario, logger, warm_start)
+    third = await optimizer.run()
+    assert warm_start.reclustered_orders == 1 + sum(len(c.orders) for c in same_window)
+    assert calls["distance_matrix"] <= 1
+    assert warm_start.reused == set(first["unassigned_clusters"]) - {c.id for c in same_window}
+    assert set(third["unassigned_clusters"]) >= warm_start.reused
+
+    # An order that is no longer pending invalidates its cluster only
+    cluster = max(warm_start_clusters(third), key=lambda c: len(c.orders))
+    session.get(Order, cluster.orders[0].id).status = "cancelled"
+    session.commit()
+    optimizer, calls = make_optimizer(session, scenario, logger, warm_start)
+    await optimizer.run()
+    assert cluster.id not in warm_start.reused
+    assert len(warm_start.reused) == len(third["unassigned_clusters"]) - 1
+    assert warm_start.reclustered_orders == len(cluster.orders) - 1
+
+
+@pytest.mark.asyncio
+async def test_settings_change_resets_warm_start(session, logger, scenario):
+    persist_scenario(session, scenario)
+    warm_start = WarmStartState()
+    optimizer, _ = make_optimizer(session, scenario, logger, warm_start)
+    await optimizer.run()
+    optimizer, calls = make_optimizer(
+        session, scenario, logger, warm_start, CLUSTER_DISTANCE_THRESHOLD=60
+    )
+    await optimizer.run()
+    assert not warm_start.reused
+    assert warm_start.reclustered_orders == len(scenario.orders)
+    assert calls["directions"] > 0
+
+
+def test_switching_penalty_keeps_previous_driver(session, logger, scenario):
+    warm_start = WarmStartState()
+    cluster = SimpleNamespace(id="c1", time_window=None)
+    drivers = [SimpleNamespace(id=driver_id) for driver_id in (1, 2, 3)]
+    optimizer, _ = make_optimizer(
+        session, scenario, logger, warm_start, SWITCHING_PENALTY=50.0
+    )
+
+    def run(costs, candidates=drivers):
+        warm_start.begin_run(optimizer.warm_start_key())
+        warm_start.track(cluster, [])
+        optimizer.apply_switching_penalty(costs, cluster, candidates)
+        warm_start.remember([cluster])
+
+    # First run: driver 2 is the best feasible one
+    run(np.array([120.0, 100.0, np.nan]))
+    assert warm_start.preferred_driver("c1") == 2
+
+    # Driver 1 is now slightly cheaper, but not by more than the penalty
+    costs = np.array([90.0, 100.0, 95.0])
+    run(costs)
+    assert costs.tolist() == [140.0, 100.0, 145.0]
+    assert warm_start.preferred_driver("c1") == 2
+
+    # Without driver 2 there is no penalty; infeasible pairs stay infeasible
+    costs = np.array([90.0, np.nan])
+    run(costs, [drivers[0], drivers[2]])
+    assert costs[0] == 90.0 and np.isnan(costs[1])
+    assert warm_start.preferred_driver("c1") == 1
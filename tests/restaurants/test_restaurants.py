@@ -0,0 +1,284 @@
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes.orders import get_optimizer
+from app.auth.dependencies import get_current_user
+from app.config import ChefExperience
+from app.database import Base
+from app.models.driver import Driver, DriverStatus
+from app.models.order import Order
+from app.models.restaurant import Restaurant
+from app.schemas.user import UserPrincipal
+from app.services.orders import (
+    ALL_RESTAURANTS,
+    OrdersOptimizer,
+    dispatch_partitions,
+    get_dispatch_executor,
+    run_partitions,
+)
+from app.services.drivers import DriverRegistry
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    generate_scenario,
+    persist_scenario,
+)
+from scripts.constants import (
+    DRIVERS_ENDPOINT,
+    ORDERS_ENDPOINT,
+    ORDERS_OPTIMIZER_ENDPOINT,
+    RESTAURANTS_ENDPOINT,
+)
+
+RESTAURANT = {
+    "name": "Bella Calda Navigli",
+    "lat": 45.452,
+    "lon": 9.175,
+    "address": "Via Vigevano 18",
+    "postal_code": "20144",
+    "city": "Milan",
+    "country": "Italy",
+    "pizza_prep_settings": {"CHEFS": 4, "CHEF_EXPERIENCE": "junior"},
+}
+
+
+@pytest.fixture
+def scenario(session):
+    return persist_two_restaurants(session)
+
+
+def persist_two_restaurants(session):
+    """
+    Synthetic orders and drivers, every other one moved to a second restaurant.
+    """
+    scenario = generate_scenario(
+        ScenarioConfig(
+            seed=3,
+            start=None,
+            demand=DemandConfig(n_orders=30, n_creators=3),
+            fleet=FleetConfig(n_drivers=8),
+        )
+    )
+    persist_scenario(session, scenario)
+    restaurant = Restaurant(**RESTAURANT)
+    session.add(restaurant)
+    session.commit()
+    for model in (Order, Driver):
+        session.execute(
+            update(model).where(model.id % 2 == 0).values(restaurant_id=restaurant.id)
+        )
+    session.commit()
+    return scenario, restaurant
+
+
+def make_optimizer(session, scenario, logger, **kwargs):
+    return OrdersOptimizer(
+        db=session,
+        route_planner=scenario.route_planner(),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+        **kwargs,
+    )
+
+
+def test_optimizer_only_sees_its_restaurant(session, logger, scenario):
+    scenario, restaurant = scenario
+    everything = make_optimizer(session, scenario, logger)
+    assert everything.restaurant_id is ALL_RESTAURANTS
+    assert len(everything.fetch_unassigned_orders()) == 30
+
+    for restaurant_id, parity in ((None, 1), (restaurant.id, 0)):
+        optimizer = make_optimizer(session, scenario, logger, restaurant_id=restaurant_id)
+        orders = optimizer.fetch_unassigned_orders()
+        assert orders and all(o.id % 2 == parity for o in orders)
+        drivers = optimizer.fetch_available_drivers_with_location(
+            eta_threshold_minutes=24 * 60
+        )
+        assert drivers and all(d.id % 2 == parity for d in drivers)
+
+
+def test_partitions_use_restaurant_settings(session, scenario):
+    scenario, restaurant = scenario
+    clustering_settings = scenario.clustering_settings()
+    partitions = dispatch_partitions(session, clustering_settings, scenario.pizza_prep_settings)
+    assert [p.restaurant_id for p in partitions] == [None, restaurant.id]
+
+    default, navigli = partitions
+    assert default.clustering_settings is clustering_settings
+    assert navigli.clustering_settings.START_LOCATION_LAT == RESTAURANT["lat"]
+    assert navigli.clustering_settings.ADDRESS == RESTAURANT["address"]
+    assert navigli.clustering_settings.MAX_PIZZAS_PER_CLUSTER == clustering_settings.MAX_PIZZAS_PER_CLUSTER
+    assert navigli.pizza_prep_settings.CHEFS == 4
+    assert navigli.pizza_prep_settings.CHEF_EXPERIENCE == ChefExperience.JUNIOR
+    assert navigli.pizza_prep_settings.NUM_OVENS == scenario.pizza_prep_settings.NUM_OVENS
+
+    restaurant.is_active = False
+    session.commit()
+    assert len(dispatch_partitions(session, clustering_settings, scenario.pizza_prep_settings)) == 1
+
+
+@pytest.mark.asyncio
+async def test_partitions_assign_within_restaurant(session, logger, scenario):
+    scenario, restaurant = scenario
+    partitions = dispatch_partitions(
+        session, scenario.clustering_settings(), scenario.pizza_prep_settings
+    )
+    results = await run_partitions(
+        partitions, db=session, route_planner=scenario.route_planner(), logger=logger
+    )
+    assert [r["restaurant_id"] for r in results] == [None, restaurant.id]
+    assert any(r["assigned"] for r in results)
+    for result in results:
+        assert result["wall_s"] > 0 and "stages" in result["profile"]
+        for driver_id, assignment in result["assigned"].items():
+            assert session.get(Driver, driver_id).restaurant_id == result["restaurant_id"]
+            orders = session.query(Order).join(Order.clusters).filter_by(id=assignment["cluster_id"])
+            assert {o.restaurant_id for o in orders} == {result["restaurant_id"]}
+
+
+@pytest.mark.asyncio
+async def test_partitions_keep_a_warm_start_per_restaurant(session, logger, scenario):
+    scenario, restaurant = scenario
+    # No dispatchable driver: every cluster is deferred to the next run
+    session.execute(update(Driver).values(status=DriverStatus.OFFLINE))
+    session.commit()
+    partitions = dispatch_partitions(
+        session, scenario.clustering_settings(WARM_START=True), scenario.pizza_prep_settings
+    )
+    warm_starts = {}
+    first = await run_partitions(
+        partitions,
+        db=session,
+        route_planner=scenario.route_planner(),
+        logger=logger,
+        warm_starts=warm_starts,
+    )
+    assert set(warm_starts) == {None, restaurant.id}
+    second = await run_partitions(
+        partitions,
+        db=session,
+        route_planner=scenario.route_planner(),
+        logger=logger,
+        warm_starts=warm_starts,
+    )
+    for before, after in zip(first, second):
+        assert before["unassigned"]
+        reused = warm_starts[after["restaurant_id"]].reused
+        assert reused == set(before["unassigned"]) == set(after["unassigned"])
+
+
+def use_worker_database(url):
+    # Dispatch pool initializer: workers open their sessions on the test database
+    from app import database
+    from app.config import settings
+
+    database.SessionLocal.configure(bind=create_engine(url))
+    settings.ROUTE_SERVICE_PROVIDER = "synthetic"
+
+
+@pytest.mark.asyncio
+async def test_worker_partitions_update_the_driver_registry(tmp_path, logger):
+    url = f"sqlite:///{tmp_path / 'dispatch.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    scenario, restaurant = persist_two_restaurants(session)
+    registry = DriverRegistry()
+    registry.load(session.query(Driver))
+    partitions = dispatch_partitions(
+        session, scenario.clustering_settings(), scenario.pizza_prep_settings
+    )
+
+    executor = ProcessPoolExecutor(
+        max_workers=2,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=use_worker_database,
+        initargs=(url,),
+    )
+    try:
+        results = await run_partitions(
+            partitions,
+            db=session,
+            route_planner=scenario.route_planner(),
+            logger=logger,
+            driver_registry=registry,
+            executor=executor,
+        )
+    finally:
+        executor.shutdown(wait=True)
+        session.close()
+
+    assert [r["restaurant_id"] for r in results] == [None, restaurant.id]
+    assigned = [driver_id for r in results for driver_id in r["assigned"]]
+    assert assigned
+    # Written to the database by the workers, and seen by the parent's registry
+    for driver_id in assigned:
+        assert registry.get(driver_id).status == DriverStatus.DELIVERING
+    assert {d.id for d in registry.available(datetime.utcnow(), 0)}.isdisjoint(assigned)
+
+
+def test_restaurant_routes_and_partitioned_optimize(client, session, logger, scenario):
+    scenario, _ = scenario
+    app = client.app
+    app.dependency_overrides[get_optimizer] = lambda: make_optimizer(session, scenario, logger)
+    app.dependency_overrides[get_dispatch_executor] = lambda: None
+
+    response = client.post(RESTAURANTS_ENDPOINT, json=RESTAURANT)
+    assert response.status_code == 409
+    response = client.post(RESTAURANTS_ENDPOINT, json={**RESTAURANT, "name": "Bella Calda Isola"})
+    assert response.status_code == 201
+    assert response.json()["pizza_prep_settings"] == RESTAURANT["pizza_prep_settings"]
+    assert [r["name"] for r in client.get(RESTAURANTS_ENDPOINT).json()] == [
+        RESTAURANT["name"],
+        "Bella Calda Isola",
+    ]
+
+    response = client.post(ORDERS_OPTIMIZER_ENDPOINT)
+    assert response.status_code == 200
+    body = response.json()
+    assert [p["name"] for p in body["partitions"]] == [
+        "default",
+        RESTAURANT["name"],
+        "Bella Calda Isola",
+    ]
+    assert body["profile"]["parallel"] is False
+    assert body["unassigned"] == {
+        k: v for p in body["partitions"] for k, v in p["unassigned"].items()
+    }
+    assert session.query(Order).filter(Order.status != "pending").count() > 0
+
+
+def test_unknown_restaurants_are_rejected(client, session, scenario):
+    _, restaurant = scenario
+    app = client.app
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(id=1)
+    driver = {"user_id": 1, "full_name": "Luigi", "lat": 45.46, "lon": 9.19}
+
+    response = client.post(DRIVERS_ENDPOINT, json={**driver, "restaurant_id": 999})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Unknown restaurant: 999"
+    # Checked before geocoding the address
+    order = {
+        "customer_name": "Mario",
+        "customer_phone": "123456",
+        "delivery_address": {"address": "Via Roma 1", "postal_code": "20100", "city": "Milan"},
+        "items": {"food": ["Margherita"], "drink": None},
+        "estimated_prep_time": 10,
+        "desired_delivery_time": "2030-01-01T20:00:00",
+        "restaurant_id": 999,
+    }
+    assert client.post(ORDERS_ENDPOINT, json=order).status_code == 422
+
+    restaurant.is_active = False
+    session.commit()
+    response = client.post(DRIVERS_ENDPOINT, json={**driver, "restaurant_id": restaurant.id})
+    assert response.status_code == 422
+    response = client.post(DRIVERS_ENDPOINT, json=driver)
+    assert response.status_code == 201
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services.orders import OrdersOptimizer
+from app.services.route_planner import (
+    FixtureMode,
+    HaversineRoutePlanner,
+    RecordingRoutePlanner,
+    evaluate_travel_time_model,
+    fit_travel_time_model,
+)
+from app.services.synthetic import (
+    ScenarioConfig,
+    SyntheticCity,
+    SyntheticRoutePlanner,
+    generate_scenario,
+)
+
+
+def record(tmp_path, route_planner, n_requests=20, seed=0, hour=None):
+    path = str(tmp_path / f"responses-{seed}.json.gz")
+    recorder = RecordingRoutePlanner(
+        route_planner, fixture_path=path, mode=FixtureMode.RECORD, autosave=False
+    )
+    rng = np.random.default_rng(seed)
+    for _ in range(n_requests):
+        coords = SyntheticCity().sample_locations(rng, 8).tolist()
+        recorder.compute_distance_matrix(coords=coords)
+        recorder.get_directions(coordinates=coords, optimize_waypoints=True, format="json")
+    recorder.save()
+    entries = list(RecordingRoutePlanner.load(path).values())
+    if hour is not None:
+        for entry in entries:
+            entry["recorded_at"] = datetime(2025, 1, 3, hour).isoformat()
+    return entries
+
+
+def test_fit_recovers_the_road_metric(tmp_path):
+    exact = SyntheticRoutePlanner(detour_factor=1.4, speed_kmh=20.0)
+    entries = record(tmp_path, exact)
+    model = fit_travel_time_model(entries)
+    assert model.detours["*|*"] == pytest.approx(1.4, rel=1e-3)
+    assert model.speeds["*|*"] == pytest.approx(20.0, rel=1e-3)
+
+    errors = evaluate_travel_time_model(model, record(tmp_path, exact, seed=1))
+    assert errors["durations"]["n"] > 0 and errors["distances"]["n"] > 0
+    assert errors["durations"]["p90_ape"] < 0.01
+    assert abs(errors["durations"]["bias"]) < 0.01
+
+    coords = SyntheticCity().sample_locations(np.random.default_rng(2), 50).tolist()
+    approximate = HaversineRoutePlanner(model=model).compute_distance_matrix(coords)
+    np.testing.assert_allclose(
+        approximate["durations"], exact.compute_distance_matrix(coords)["durations"], rtol=1e-2
+    )
+
+
+def test_speeds_follow_the_time_of_day(tmp_path):
+    entries = record(tmp_path, SyntheticRoutePlanner(speed_kmh=30.0), hour=11) + record(
+        tmp_path, SyntheticRoutePlanner(speed_kmh=15.0), seed=1, hour=20
+    )
+    model = fit_travel_time_model(entries, band_hours=3)
+    coords = SyntheticCity().sample_locations(np.random.default_rng(3), 10)
+
+    def speed(hour):
+        _, speeds = model.factors(coords, datetime(2025, 1, 3, hour))
+        return speeds
+
+    assert speed(11) == pytest.approx(30.0, rel=1e-3)
+    assert speed(20) == pytest.approx(15.0, rel=1e-3)
+    # No sample in that band: the average over the day
+    assert 15.0 < speed(3).min() and speed(3).max() < 30.0
+
+
+def test_optimizer_runs_on_the_approximate_planner(tmp_path, logger):
+    scenario = generate_scenario(ScenarioConfig(seed=3))
+    model = fit_travel_time_model(record(tmp_path, scenario.route_planner()))
+    optimizer = OrdersOptimizer(
+        db=None,
+        route_planner=HaversineRoutePlanner(model=model),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+    )
+    orders = scenario.orders[:6]
+    route = optimizer.compute_cluster_route(
+        orders=orders,
+        start_location=(scenario.restaurant[0], scenario.restaurant[1]),
+    )
+    assert sorted(route.order_ids) == sorted(o.id for o in orders)
+    assert route.duration == pytest.approx(sum(s.duration for s in route.segments), abs=1)
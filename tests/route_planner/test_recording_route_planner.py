@@ -0,0 +1,176 @@
+import asyncio
+import gzip
+import json
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.orders import OrdersOptimizer
+from app.services.route_planner import (
+    FixtureMissError,
+    FixtureMode,
+    LatencyProfile,
+    RecordingRoutePlanner,
+)
+from app.services.route_planner.factory import (
+    get_recorded_route_planner,
+    get_route_planner,
+    save_route_planner_fixtures,
+)
+from app.services.route_planner.recording import request_key
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    SyntheticRoutePlanner,
+    generate_scenario,
+    persist_scenario,
+)
+
+COORDS = [[9.19, 45.46], [9.2, 45.47], [9.17, 45.45]]
+
+
+class OfflinePlanner(SyntheticRoutePlanner):
+    """
+    Fails on any remote call: replay must be served from the fixtures only.
+    """
+
+    def compute_distance_matrix(self, coords):
+        raise AssertionError("unexpected remote call")
+
+    def get_directions(self, coordinates, optimize_waypoints, format="geojson"):
+        raise AssertionError("unexpected remote call")
+
+    def get_coordinates(self, address, postal_code, city, country):
+        raise AssertionError("unexpected remote call")
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "responses.json.gz")
+    recorder = RecordingRoutePlanner(
+        SyntheticRoutePlanner(), fixture_path=path, mode=FixtureMode.RECORD
+    )
+    matrix = recorder.compute_distance_matrix(coords=COORDS)
+    directions = recorder.get_directions(coordinates=COORDS, optimize_waypoints=True)
+    location = recorder.get_coordinates("Via Roma 1", "20121", "Milan", "Italy")
+    assert len(recorder) == 3
+
+    with gzip.open(path, "rt") as f:
+        assert len(json.load(f)["entries"]) == 3
+
+    replayer = RecordingRoutePlanner(OfflinePlanner(), fixture_path=path)
+    assert replayer.compute_distance_matrix(coords=COORDS) == json.loads(json.dumps(matrix))
+    assert replayer.get_directions(
+        coordinates=[tuple(c) for c in COORDS], optimize_waypoints=True
+    ) == json.loads(json.dumps(directions))
+    assert replayer.get_coordinates("Via Roma 1", "20121", "Milan", "Italy") == list(location)
+    assert replayer.hits == 3
+    # Attributes are read from the wrapped planner
+    assert replayer.metric == "duration"
+
+    with pytest.raises(FixtureMissError):
+        replayer.compute_distance_matrix(coords=COORDS[:2])
+
+
+def test_replayed_responses_are_copies(tmp_path):
+    path = str(tmp_path / "responses.json.gz")
+    recorder = RecordingRoutePlanner(
+        SyntheticRoutePlanner(), fixture_path=path, mode=FixtureMode.REPLAY_OR_RECORD
+    )
+    recorder.compute_distance_matrix(coords=COORDS)
+    assert recorder.misses == 1
+
+    first = recorder.compute_distance_matrix(coords=COORDS)
+    first["durations"][0][1] = -1
+    assert recorder.compute_distance_matrix(coords=COORDS)["durations"][0][1] != -1
+    assert recorder.hits == 2
+
+
+def test_request_key_ignores_float_noise_and_sequence_types():
+    noisy = [[lon + 1e-9, lat] for lon, lat in COORDS]
+    assert request_key("compute_distance_matrix", {"coords": COORDS}) == request_key(
+        "compute_distance_matrix", {"coords": [tuple(c) for c in noisy]}
+    )
+    assert request_key("compute_distance_matrix", {"coords": COORDS}) != request_key(
+        "get_directions", {"coords": COORDS}
+    )
+
+
+def test_latency_profiles():
+    assert LatencyProfile().delay("get_directions", recorded_s=0.3) == 0.0
+    assert LatencyProfile(use_recorded=True, recorded_scale=2).delay("x", 0.3) == 0.6
+    constant = LatencyProfile(median_s={"get_directions": 0.2}, default_s=0.1)
+    assert constant.delay("get_directions", None) == 0.2
+    assert constant.delay("get_coordinates", None) == 0.1
+    spread = [LatencyProfile(default_s=0.1, sigma=0.5, seed=1).delay("x", None) for _ in range(2)]
+    assert spread[0] == spread[1] and spread[0] != 0.1
+
+
+def test_replay_injects_latency(tmp_path):
+    path = str(tmp_path / "responses.json.gz")
+    RecordingRoutePlanner(
+        SyntheticRoutePlanner(), fixture_path=path, mode=FixtureMode.RECORD
+    ).compute_distance_matrix(coords=COORDS)
+
+    replayer = RecordingRoutePlanner(
+        OfflinePlanner(), fixture_path=path, latency=LatencyProfile(default_s=0.05)
+    )
+    start = time.perf_counter()
+    replayer.compute_distance_matrix(coords=COORDS)
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_optimizer_clustering_replays_offline(tmp_path, session, logger):
+    path = str(tmp_path / "responses.json.gz")
+    scenario = generate_scenario(
+        ScenarioConfig(
+            seed=3, demand=DemandConfig(n_orders=30, n_creators=2), fleet=FleetConfig(n_drivers=5)
+        )
+    )
+    recorder = RecordingRoutePlanner(
+        scenario.route_planner(), fixture_path=path, mode=FixtureMode.RECORD
+    )
+    persist_scenario(session, scenario)
+    optimizer = OrdersOptimizer(
+        db=session,
+        route_planner=recorder,
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+    )
+    orders = optimizer.filter_out_unavailable_orders(optimizer.fetch_unassigned_orders())
+    recorded = asyncio.run(optimizer.compute_clustered_orders(filtered_orders=orders))
+    assert len(recorder) > 0
+
+    replayer = RecordingRoutePlanner(OfflinePlanner(), fixture_path=path)
+    optimizer.route_planner = replayer
+    replayed = asyncio.run(optimizer.compute_clustered_orders(filtered_orders=orders))
+    assert [c.orders for c in replayed] == [c.orders for c in recorded]
+    assert [c.cluster_route.model_dump(exclude={"id"}) for c in replayed] == [
+        c.cluster_route.model_dump(exclude={"id"}) for c in recorded
+    ]
+    assert replayer.misses == 0 and replayer.hits > 0
+
+
+def test_app_records_to_one_shared_planner(tmp_path, monkeypatch):
+    path = str(tmp_path / "responses.json.gz")
+    monkeypatch.setattr(settings, "ROUTE_SERVICE_PROVIDER", "synthetic")
+    monkeypatch.setattr(settings, "ROUTE_PLANNER_FIXTURES_MODE", "record")
+    monkeypatch.setattr(settings, "ROUTE_PLANNER_FIXTURES_PATH", path)
+    monkeypatch.setattr(settings, "ROUTE_PLANNER_FIXTURES_SAVE_INTERVAL_SECONDS", 3600)
+    get_recorded_route_planner.cache_clear()
+    try:
+        # One planner per request, as with Depends(get_route_planner)
+        get_route_planner().compute_distance_matrix(coords=COORDS)
+        get_route_planner().compute_distance_matrix(coords=COORDS[:2])
+        get_route_planner().get_directions(coordinates=COORDS, optimize_waypoints=True)
+        recorder = get_recorded_route_planner()
+        assert len(recorder) == 3
+        # Saved on the first recording, then at most once per interval
+        assert len(RecordingRoutePlanner.load(path)) == 1 and recorder.unsaved == 2
+
+        save_route_planner_fixtures()
+        assert len(RecordingRoutePlanner.load(path)) == 3 and recorder.unsaved == 0
+    finally:
+        get_recorded_route_planner.cache_clear()
@@ -0,0 +1,229 @@
+import time
+
+import pytest
+
+from app.models.cluster import ClusterRouteRecord
+from app.services.orders import OrdersOptimizer
+from app.services.route_planner import (
+    CircuitBreaker,
+    CircuitState,
+    HaversineRoutePlanner,
+    ResilientRoutePlanner,
+    ResponseCache,
+    RoutePlannerUnavailableError,
+)
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    SyntheticRoutePlanner,
+    generate_scenario,
+    persist_scenario,
+)
+
+COORDS = [[9.19, 45.46], [9.2, 45.47], [9.17, 45.45]]
+
+
+class FlakyPlanner(SyntheticRoutePlanner):
+    """
+    Fails (or hangs for `delay_s`) while `healthy` is False, and counts its calls.
+    """
+
+    def __init__(self, delay_s: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.healthy = True
+        self.delay_s = delay_s
+        self.calls = 0
+
+    def _check(self):
+        self.calls += 1
+        if not self.healthy:
+            if self.delay_s:
+                time.sleep(self.delay_s)
+            raise ConnectionError("ORS unavailable")
+
+    def compute_distance_matrix(self, coords):
+        self._check()
+        return super().compute_distance_matrix(coords)
+
+    def get_directions(self, coordinates, optimize_waypoints, format="json"):
+        self._check()
+        return super().get_directions(coordinates, optimize_waypoints, format)
+
+    def get_coordinates(self, address, postal_code, city, country):
+        self._check()
+        return super().get_coordinates(address, postal_code, city, country)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_states():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN and not breaker.allow()
+
+    # A single trial call once the reset timeout is over; its failure opens the breaker again
+    clock.now = 10
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED and breaker.failures == 0
+
+
+def test_response_cache_is_bounded_by_size():
+    matrix = {"durations": [[0.0, 10.0], [12.0, None]], "sources": [{"location": [9.1, 45.4]}]}
+    cache = ResponseCache(max_bytes=150)
+    cache.set("a", matrix)
+    assert cache.size_bytes >= 32
+    cached = cache.get("a")
+    assert cached == matrix
+    # Copies: the cached entry does not change with the response
+    cached["durations"][0][1] = -1
+    assert cache.get("a") == matrix
+
+    directions = {"routes": [{"summary": {"duration": 30.0}}]}
+    cache.set("b", directions)
+    cache.set("c", directions)
+    # Over 150 bytes: the least recently used entry goes first
+    assert cache.get("a") is None and cache.get("c") == directions
+    assert cache.size_bytes <= 150
+    # Larger than the whole cache: not kept
+    cache.set("d", {"durations": [[0.0] * 5] * 5})
+    assert cache.get("d") is None and cache.get("c") == directions
+
+
+def test_falls_back_to_cached_then_approximate_responses():
+    exact = FlakyPlanner()
+    planner = ResilientRoutePlanner(
+        exact,
+        fallback=HaversineRoutePlanner(),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout_s=60),
+    )
+    known = planner.compute_distance_matrix(coords=COORDS)
+    assert "approximate" not in known
+
+    exact.healthy = False
+    # The last exact response to the same request
+    assert planner.compute_distance_matrix(coords=COORDS) == known
+    # Unknown request: approximate
+    approximate = planner.compute_distance_matrix(coords=COORDS[:2])
+    assert approximate["approximate"] is True
+    assert len(approximate["durations"]) == 2
+    directions = planner.get_directions(
+        coordinates=COORDS, optimize_waypoints=True, format="json"
+    )
+    assert directions["approximate"] is True and directions["routes"][0]["segments"]
+
+    # The breaker is open: the exact planner is not called anymore
+    assert planner.breaker.state == CircuitState.OPEN
+    calls = exact.calls
+    planner.compute_distance_matrix(coords=COORDS[1:])
+    assert exact.calls == calls
+    with pytest.raises(RoutePlannerUnavailableError):
+        planner.get_coordinates("Via Roma 1", "20121", "Milan", "Italy")
+    # Other attributes come from the wrapped planner
+    assert planner.metric == "duration"
+
+
+def test_calls_are_bounded_by_timeout_and_budget():
+    exact = FlakyPlanner(delay_s=0.5)
+    exact.healthy = False
+    planner = ResilientRoutePlanner(
+        exact,
+        fallback=HaversineRoutePlanner(),
+        breaker=CircuitBreaker(failure_threshold=100),
+        timeout_s=0.05,
+        run_budget_s=0.12,
+    )
+    start = time.perf_counter()
+    assert planner.compute_distance_matrix(coords=COORDS)["approximate"]
+    assert time.perf_counter() - start < 0.3
+
+    with planner.budget():
+        start = time.perf_counter()
+        for _ in range(10):
+            assert planner.compute_distance_matrix(coords=COORDS)["approximate"]
+        # Two or three timed out calls, then the budget is spent
+        assert time.perf_counter() - start < 0.3
+    assert exact.calls <= 4
+
+
+@pytest.mark.asyncio
+async def test_optimizer_run_survives_an_outage(session, logger):
+    scenario = generate_scenario(
+        ScenarioConfig(
+            seed=6,
+            start=None,
+            demand=DemandConfig(n_orders=30, n_creators=3),
+            fleet=FleetConfig(n_drivers=8),
+        )
+    )
+    persist_scenario(session, scenario)
+    exact = FlakyPlanner(city=scenario.config.city)
+    exact.healthy = False
+    optimizer = OrdersOptimizer(
+        db=session,
+        route_planner=ResilientRoutePlanner(exact, fallback=HaversineRoutePlanner()),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+    )
+    out = await optimizer.run()
+    assert out["driver_to_cluster"]
+    clusters = [v["cluster"] for v in out["driver_to_cluster"].values()]
+    clusters += [v["cluster"] for v in out["unassigned_clusters"].values()]
+    assert all(cluster.approximate for cluster in clusters)
+    assert set(out["approximate_clusters"]) == {cluster.id for cluster in clusters}
+    records = session.query(ClusterRouteRecord).all()
+    assert records and all(record.approximate for record in records)
+
+
+class MatrixOutagePlanner(SyntheticRoutePlanner):
+    """
+    Distance matrices fail, directions do not.
+    """
+
+    def compute_distance_matrix(self, coords):
+        raise ConnectionError("ORS matrix unavailable")
+
+
+@pytest.mark.asyncio
+async def test_clusters_grouped_on_approximate_matrices_are_approximate(session, logger):
+    scenario = generate_scenario(
+        ScenarioConfig(
+            seed=6,
+            start=None,
+            demand=DemandConfig(n_orders=30, n_creators=3),
+            fleet=FleetConfig(n_drivers=8),
+        )
+    )
+    persist_scenario(session, scenario)
+    optimizer = OrdersOptimizer(
+        db=session,
+        route_planner=ResilientRoutePlanner(
+            MatrixOutagePlanner(city=scenario.config.city),
+            fallback=HaversineRoutePlanner(),
+            breaker=CircuitBreaker(failure_threshold=1000),
+        ),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+    )
+    clusters = await optimizer.compute_clustered_orders(optimizer.fetch_unassigned_orders())
+    # Routed exactly, but grouped on haversine distances (a lone order needs no matrix)
+    grouped = [cluster for cluster in clusters if len(cluster.orders) > 1]
+    assert grouped and all(cluster.approximate for cluster in grouped)
@@ -0,0 +1,138 @@
+import asyncio
+
+from sqlalchemy import event
+
+from app.auth.dependencies import get_current_user
+from app.main import app
+from app.models.order import Order
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.schemas.user import UserPrincipal
+from app.services.route_planner.factory import get_route_planner
+from app.services.route_planner.geocoding import get_geocode_cache
+from app.services.route_planner.open_route_service import OpenRouteService
+from scripts.constants import ORDERS_BATCH_ENDPOINT
+
+KNOWN_ADDRESSES = {
+    "Via Roma 1": [9.19, 45.46],
+    "Corso Como 10": [9.18, 45.48],
+}
+
+
+class FakeGeocoder(OpenRouteService):
+    def __init__(self):
+        self.calls = []
+
+    def get_coordinates(self, address, postal_code, city, country):
+        self.calls.append(address)
+        return KNOWN_ADDRESSES[address]
+
+
+def order_payload(address):
+    return {
+        "customer_name": "Mario",
+        "customer_phone": "123456",
+        "delivery_address": {"address": address, "postal_code": "20100", "city": "Milan"},
+        "items": {"food": ["Margherita"], "drink": None},
+        "estimated_prep_time": 10,
+        "desired_delivery_time": "2030-01-01T20:00:00",
+    }
+
+
+def test_routes_create_orders_batch(client, session):
+    session.add(User(id=1, email="batch@example.com", full_name="Batch", hashed_password="x"))
+    session.commit()
+    get_geocode_cache().clear()
+    geocoder = FakeGeocoder()
+    app.dependency_overrides[get_route_planner] = lambda: geocoder
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(id=1)
+
+    on_event_loop = []
+
+    def record(conn, cursor, statement, *args):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(statement)
+        except RuntimeError:
+            pass
+
+    addresses = ["Via Roma 1", "Corso Como 10", "Via Roma 1", "Unknown street 5", " via roma 1"]
+    event.listen(session.get_bind(), "before_cursor_execute", record)
+    try:
+        response = client.post(
+            url=ORDERS_BATCH_ENDPOINT,
+            json={"orders": [order_payload(address) for address in addresses]},
+        )
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", record)
+    # The INSERT and the commit do not block the event loop
+    assert on_event_loop == []
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (4, 1)
+
+    # Identical addresses are geocoded once
+    assert sorted(geocoder.calls) == ["Corso Como 10", "Unknown street 5", "Via Roma 1"]
+
+    results = data["results"]
+    assert [r["index"] for r in results] == list(range(len(addresses)))
+    assert results[3]["order"] is None and "Geocoding failed" in results[3]["error"]
+    created = [r["order"] for r in results if r["order"]]
+    assert all(order["creator_id"] == 1 and order["status"] == "pending" for order in created)
+    assert created[1]["delivery_address"]["address"] == "Corso Como 10"
+    assert session.query(Order).count() == 4
+
+
+def test_routes_create_orders_batch_rejects_empty_batch(client):
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(id=1)
+    response = client.post(url=ORDERS_BATCH_ENDPOINT, json={"orders": []})
+    assert response.status_code == 422
+
+
+def test_routes_create_orders_batch_rejects_unknown_restaurants(client, session):
+    session.add(User(id=1, email="batch@example.com", full_name="Batch", hashed_password="x"))
+    restaurant = Restaurant(
+        name="Bella Calda Navigli",
+        lat=45.452,
+        lon=9.175,
+        address="Via Vigevano 18",
+        postal_code="20144",
+        city="Milan",
+    )
+    closed = Restaurant(
+        name="Bella Calda Isola",
+        lat=45.487,
+        lon=9.19,
+        address="Via Borsieri 5",
+        postal_code="20159",
+        city="Milan",
+        is_active=False,
+    )
+    session.add_all([restaurant, closed])
+    session.commit()
+    get_geocode_cache().clear()
+    geocoder = FakeGeocoder()
+    app.dependency_overrides[get_route_planner] = lambda: geocoder
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(id=1)
+
+    restaurant_ids = [restaurant.id, 999, closed.id, None]
+    response = client.post(
+        url=ORDERS_BATCH_ENDPOINT,
+        json={
+            "orders": [
+                {**order_payload(address), "restaurant_id": restaurant_id}
+                for address, restaurant_id in zip(
+                    ["Via Roma 1", "Corso Como 10", "Corso Como 10", "Via Roma 1"], restaurant_ids
+                )
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 2)
+    results = data["results"]
+    assert results[1]["error"] == "Unknown restaurant: 999"
+    assert results[2]["error"] == f"Unknown restaurant: {closed.id}"
+    # Rejected orders are not geocoded
+    assert geocoder.calls == ["Via Roma 1"]
+    assert [o.restaurant_id for o in session.query(Order).order_by(Order.id)] == [restaurant.id, None]
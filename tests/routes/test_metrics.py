@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from app.metrics import REGISTRY, Counter, Histogram, MetricsRegistry
+from app.models.driver import Driver
+from app.models.order import Order
+from app.services.route_planner import MeteredRoutePlanner
+from app.services.route_planner.open_route_service import OpenRouteService
+from scripts.constants import DRIVERS_ENDPOINT
+
+
+def test_counter_sums_thread_slots():
+    counter = Counter("test_events_total", "Events", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.labels("a").inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.labels("a").value == 4000
+
+
+def test_histogram_text_exposition():
+    registry = MetricsRegistry()
+    histogram = registry.register(
+        Histogram("test_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    )
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels('/a"b').observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == [
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+    ]
+    assert lines[2:] == [
+        'test_latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'test_latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/a\\"b"} 3.65',
+        'test_latency_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+class FailingPlanner(OpenRouteService):
+    def __init__(self):
+        self.metric = "duration"
+
+    def get_coordinates(self, address, postal_code, city, country):
+        raise RuntimeError("quota exceeded")
+
+
+def test_metered_route_planner_records_outcome():
+    requests = REGISTRY.get("route_planner_requests_total")
+    errors_before = requests.labels("get_coordinates", "error").value
+    planner = MeteredRoutePlanner(FailingPlanner())
+    assert planner.metric == "duration"
+    with pytest.raises(RuntimeError):
+        planner.get_coordinates(
+            address="Via Roma 1", postal_code="20100", city="Milan", country="Italy"
+        )
+    assert requests.labels("get_coordinates", "error").value == errors_before + 1
+
+
+def test_metrics_endpoint(client, session, orders, create_user_drivers):
+    for order in orders:
+        session.add(order)
+    session.commit()
+    assert client.get(url=DRIVERS_ENDPOINT).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert f"dispatch_pending_orders {session.query(Order).count()}" in body
+    assert (
+        f"dispatch_available_drivers {session.query(Driver).count()}" in body
+    )
+    assert "dispatch_unassigned_clusters 0" in body
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/api/v1/drivers/",status="200"}'
+        in body
+    )
@@ -0,0 +1,66 @@
+import json
+
+from app.models.user import User
+from scripts.constants import DRIVERS_ENDPOINT, GET_AVAILABLE_ORDERS_ENDPOINT, TEST_USER_DRIVERS
+
+DRIVERS_PAGE_ENDPOINT = f"{DRIVERS_ENDPOINT}page"
+DRIVERS_STREAM_ENDPOINT = f"{DRIVERS_ENDPOINT}stream"
+AVAILABLE_ORDERS_PAGE_ENDPOINT = GET_AVAILABLE_ORDERS_ENDPOINT.rstrip("/") + "/page"
+AVAILABLE_ORDERS_STREAM_ENDPOINT = GET_AVAILABLE_ORDERS_ENDPOINT.rstrip("/") + "/stream"
+
+
+def collect_pages(client, url, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url=url, params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) <= limit
+        ids.extend(item["id"] for item in data["items"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_routes_drivers_page_and_stream(client, create_user_drivers):
+    ids, pages = collect_pages(client, DRIVERS_PAGE_ENDPOINT, limit=4)
+    assert pages == 3
+    assert len(ids) == len(set(ids)) == len(TEST_USER_DRIVERS)
+
+    response = client.get(url=DRIVERS_STREAM_ENDPOINT, params={"batch_size": 3})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert streamed == ids
+
+    response = client.get(url=DRIVERS_PAGE_ENDPOINT, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_routes_available_orders_page_and_stream(client, session, orders):
+    session.add(
+        User(id=0, email="creator@example.com", full_name="Creator", hashed_password="x")
+    )
+    for order in orders:
+        session.add(order)
+    session.commit()
+    pending_ids = sorted(o.id for o in orders)
+
+    ids, _ = collect_pages(client, AVAILABLE_ORDERS_PAGE_ENDPOINT, limit=3)
+    assert sorted(ids) == pending_ids
+
+    # Radius filter applied while paginating
+    params = {"limit": 2, "lat": orders[0].lat, "lon": orders[0].lon, "radius_km": 0.1}
+    response = client.get(url=AVAILABLE_ORDERS_PAGE_ENDPOINT, params=params)
+    assert response.status_code == 200
+    near = {item["id"] for item in response.json()["items"]}
+    assert orders[0].id in near and len(near) < len(orders)
+
+    response = client.get(url=AVAILABLE_ORDERS_STREAM_ENDPOINT, params={"batch_size": 2})
+    assert response.status_code == 200
+    streamed = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert streamed == ids
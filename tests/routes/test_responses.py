@@ -0,0 +1,23 @@
+import json
+from datetime import datetime
+from typing import Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.responses import PydanticJSONResponse, get_type_adapter
+from app.schemas import OrderResponse
+
+
+def test_pydantic_json_response_matches_default_encoding(orders, orders_optimizer):
+    time_buckets = orders_optimizer.cluster_orders_by_time_window(orders=orders)
+    response_type = Dict[datetime, List[OrderResponse]]
+
+    response = PydanticJSONResponse(time_buckets, response_type)
+
+    expected = jsonable_encoder(
+        TypeAdapter(response_type).validate_python(time_buckets, from_attributes=True)
+    )
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == expected
+    assert get_type_adapter(response_type) is get_type_adapter(response_type)
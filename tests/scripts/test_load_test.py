@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+
+from app.api.routes.orders import (
+    get_clustering_settings,
+    get_optimizer,
+    get_pizza_prep_settings,
+)
+from app.main import app
+from app.services.orders import OrdersOptimizer
+from app.services.route_planner.factory import get_route_planner
+from app.services.route_planner.geocoding import get_geocode_cache
+from app.services.synthetic import SyntheticRoutePlanner
+from scripts.load_test import LoadTest, parse_args, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_load_test_against_app(client, session, logger):
+    route_planner = SyntheticRoutePlanner()
+    get_geocode_cache().clear()
+    app.dependency_overrides[get_route_planner] = lambda: route_planner
+    app.dependency_overrides[get_optimizer] = lambda: OrdersOptimizer(
+        db=session,
+        route_planner=route_planner,
+        clustering_settings=get_clustering_settings(),
+        pizza_prep_settings=get_pizza_prep_settings(),
+        logger=logger,
+    )
+    # One request at a time: the test session is shared by all requests
+    args = parse_args(
+        [
+            "--duration", "1.5",
+            "--order-rate", "6",
+            "--driver-rate", "4",
+            "--optimize-interval", "1",
+            "--users", "2",
+            "--drivers", "2",
+            "--max-in-flight", "1",
+        ]
+    )
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await LoadTest(http, args).run()
+
+    report = asyncio.run(run())
+
+    assert set(report["setup"]) >= {"signup", "login", "create_driver"}
+    endpoints = report["endpoints"]
+    assert endpoints["optimize"]["requests"] == 1
+    for name, summary in endpoints.items():
+        assert summary["error_rate"] == 0, (name, summary["statuses"])
+        assert summary["p50_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+    assert "password" not in report["config"]
@@ -0,0 +1,199 @@
+from datetime import timedelta
+
+import pytest
+
+from app.models.driver import Driver, DriverStatus
+from app.services.orders import OrdersOptimizer
+from app.services.simulation import (
+    SimulatedClock,
+    SimulationConfig,
+    Simulator,
+    parameter_grid,
+    simulate,
+    sweep,
+    with_overrides,
+)
+from app.services.simulation.engine import DEFAULT_START, Kitchen
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    ScenarioConfig,
+    generate_scenario,
+    persist_scenario,
+)
+
+
+def small_config(**overrides) -> SimulationConfig:
+    config = SimulationConfig(
+        scenario=ScenarioConfig(
+            seed=5,
+            start=DEFAULT_START,
+            demand=DemandConfig(
+                n_orders=25, horizon_minutes=90, min_lead_minutes=0, peak_minutes=None
+            ),
+            fleet=FleetConfig(n_drivers=4),
+        ),
+        order_lead_minutes=(20.0, 40.0),
+    )
+    return with_overrides(config, overrides)
+
+
+def test_kitchen_queues_clusters():
+    scenario = generate_scenario(ScenarioConfig(seed=1, start=DEFAULT_START))
+    settings = scenario.pizza_prep_settings
+    optimizer = OrdersOptimizer(
+        db=None,
+        route_planner=None,
+        clustering_settings=None,
+        pizza_prep_settings=settings,
+        logger=None,
+    )
+    kitchen = Kitchen(settings, opens_at=DEFAULT_START)
+    first = kitchen.cook(7, DEFAULT_START)
+    # Idle kitchen: the optimizer's own estimate
+    assert first == optimizer.estimate_latest_pizza_ready_time(
+        total_pizzas=7,
+        chefs=settings.CHEFS,
+        chef_experience=settings.CHEF_EXPERIENCE,
+        chef_capacity=settings.CHEF_CAPACITY,
+        bake_times=settings.BAKE_TIMES,
+        num_ovens=settings.NUM_OVENS,
+        single_oven_capacity=settings.SINGLE_OVEN_CAPACITY,
+        pizza_type=settings.PIZZA_TYPE,
+        now=DEFAULT_START,
+    )
+    # Prepared in the next cycle, while the first batch bakes
+    cycle = timedelta(seconds=OrdersOptimizer.PREP_CYCLE_SECONDS)
+    bake = timedelta(seconds=settings.BAKE_TIMES[settings.PIZZA_TYPE])
+    assert first == DEFAULT_START + cycle + bake
+    assert kitchen.cook(2, DEFAULT_START) == DEFAULT_START + 2 * cycle + bake
+    # An idle kitchen later in the evening starts from scratch
+    later = DEFAULT_START + timedelta(hours=1)
+    assert kitchen.cook(1, later) == later + cycle + bake
+
+
+def test_optimizer_uses_injected_clock(session, logger):
+    scenario = generate_scenario(ScenarioConfig(seed=2, start=DEFAULT_START))
+    persist_scenario(session, scenario)
+    clock = SimulatedClock(DEFAULT_START - timedelta(hours=1))
+    optimizer = OrdersOptimizer(
+        db=session,
+        route_planner=scenario.route_planner(),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+        clock=clock,
+    )
+    delivering = session.query(Driver).filter(Driver.status == DriverStatus.DELIVERING).all()
+    assert delivering
+
+    def ids():
+        return {d.id for d in optimizer.fetch_available_drivers_with_location(10)}
+
+    assert not ids() & {d.id for d in delivering}
+    clock.now = max(d.estimated_finish_time for d in delivering)
+    assert ids() >= {d.id for d in delivering}
+
+
+@pytest.mark.asyncio
+async def test_simulation_timeline_is_consistent():
+    result = await simulate(small_config())
+    summary = result.summary()
+    assert summary["orders"] == 25
+    assert summary["delivered"] + summary["undelivered"] == 25
+    assert summary["delivered"] > 0 and summary["optimizer_runs"] > 0
+
+    for outcome in result.orders.values():
+        if outcome.delivered_at is None:
+            continue
+        assert outcome.placed_at <= outcome.dispatched_at <= outcome.ready_at < outcome.delivered_at
+        assert outcome.lateness_s >= 0
+    assert 0 < max(summary["driver_utilization"].values()) <= 1
+
+    # Deterministic, wall times aside
+    again = (await simulate(small_config())).summary()
+    for key in ("wall_s", "optimizer_wall_s"):
+        again.pop(key), summary.pop(key)
+    assert again == summary
+
+
+@pytest.mark.asyncio
+async def test_simulation_runs_chained_trips():
+    config = small_config(
+        **{"scenario.fleet.n_drivers": 2, "clustering.MULTI_TRIP_HORIZON_MINUTES": 45}
+    )
+    simulator = Simulator(config)
+    result = await simulator.run()
+    # Some trips were chained, and were all carried out
+    assert simulator.chain_end
+    assert result.summary()["delivered"] > 0
+    for outcome in result.orders.values():
+        if outcome.delivered_at is not None:
+            assert outcome.placed_at <= outcome.dispatched_at <= outcome.ready_at < outcome.delivered_at
+
+
+@pytest.mark.asyncio
+async def test_slo_report_splits_priority_orders():
+    result = await simulate(small_config(**{"scenario.demand.priority_share": 0.3}))
+    slo = result.summary()["slo"]
+    assert set(slo) == {"priority", "normal"}
+    assert slo["priority"]["orders"] > 0
+    assert slo["priority"]["orders"] + slo["normal"]["orders"] == 25
+    for report in slo.values():
+        if report["delivered"]:
+            assert report["latency_min"]["p50"] <= report["latency_min"]["p99"]
+            assert 0 <= report["within_slo_rate"] <= 1
+
+
+@pytest.mark.asyncio
+async def test_simulation_stops_when_stalled():
+    # Without drivers nothing can be delivered: the run ends after the last order arrives
+    simulator = Simulator(small_config(**{"scenario.fleet.n_drivers": 0}))
+    result = await simulator.run()
+    assert result.summary()["undelivered"] == 25
+    last_arrival = max(o.placed_at for o in result.orders.values())
+    assert result.end <= last_arrival + timedelta(minutes=simulator.config.dispatch_interval_minutes)
+
+
+def test_overrides_and_sweep():
+    config = small_config()
+    changed = with_overrides(
+        config,
+        {
+            "clustering.CLUSTER_DISTANCE_THRESHOLD": 60,
+            "scenario.kitchen.chefs": 3,
+            "relaxation": [],
+        },
+    )
+    assert changed.clustering == {"CLUSTER_DISTANCE_THRESHOLD": 60}
+    assert changed.scenario.kitchen.chefs == 3 and changed.relaxation == []
+    # The original is untouched
+    assert config.clustering == {} and config.scenario.kitchen.chefs == 2
+    with pytest.raises(ValueError):
+        with_overrides(config, {"scenario.kitchen.sous_chefs": 1})
+
+    grid = {"dispatch_interval_minutes": [5, 10], "relaxation": [["hotness"], []]}
+    assert len(parameter_grid(grid)) == 4
+    results = sweep(
+        with_overrides(config, {"scenario.demand.n_orders": 10}),
+        {"dispatch_interval_minutes": [5, 10]},
+        workers=1,
+    )
+    assert [r["params"] for r in results] == [
+        {"dispatch_interval_minutes": 5},
+        {"dispatch_interval_minutes": 10},
+    ]
+    assert results[0]["summary"]["optimizer_runs"] > results[1]["summary"]["optimizer_runs"]
+
+
+def test_sweep_applies_clustering_settings():
+    results = sweep(
+        small_config(),
+        {"clustering.CLUSTER_DISTANCE_THRESHOLD": [1, 1000]},
+        workers=1,
+    )
+    summaries = [r["summary"] for r in results]
+    for summary in summaries:
+        summary.pop("wall_s"), summary.pop("optimizer_wall_s")
+    # Orders a second apart only share a cluster with the larger threshold
+    assert summaries[0] != summaries[1]
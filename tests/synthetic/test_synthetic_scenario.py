@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.models.driver import Driver
+from app.models.order import Order
+from app.services.orders import OrdersOptimizer
+from app.services.route_planner.geometry import haversine_m, haversine_matrix
+from app.services.synthetic import (
+    DemandConfig,
+    FleetConfig,
+    Hotspot,
+    ScenarioConfig,
+    SyntheticCity,
+    SyntheticRoutePlanner,
+    generate_scenario,
+    persist_scenario,
+)
+
+START = datetime(2025, 1, 4, 20, 0)
+
+
+def small_config(seed=7, start=START, n_orders=40, n_drivers=6):
+    return ScenarioConfig(
+        seed=seed,
+        start=start,
+        demand=DemandConfig(n_orders=n_orders, n_creators=3),
+        fleet=FleetConfig(n_drivers=n_drivers),
+    )
+
+
+def snapshot(scenario):
+    return [
+        (o.lon, o.lat, o.desired_delivery_time, tuple(o.items["food"]))
+        for o in scenario.orders
+    ] + [(d.lon, d.lat, d.status, d.estimated_finish_time) for d in scenario.drivers]
+
+
+def test_scenario_is_deterministic():
+    assert snapshot(generate_scenario(small_config())) == snapshot(
+        generate_scenario(small_config())
+    )
+    assert snapshot(generate_scenario(small_config())) != snapshot(
+        generate_scenario(small_config(seed=8))
+    )
+
+
+def test_scenario_distributions():
+    config = small_config(n_orders=2000)
+    config.demand.pizzas_per_order = {2: 1.0}
+    scenario = generate_scenario(config)
+    assert len(scenario.orders) == 2000 and len(scenario.drivers) == 6
+    assert all(len(o.items["food"]) == 2 for o in scenario.orders)
+    offsets = [(o.desired_delivery_time - START).total_seconds() / 60 for o in scenario.orders]
+    assert min(offsets) >= config.demand.min_lead_minutes
+    assert max(offsets) <= config.demand.horizon_minutes
+
+    # Every order lies within the city; hotspots are denser than the rest of the city
+    city = config.city
+    coords = [(o.lon, o.lat) for o in scenario.orders]
+    from_center = haversine_matrix([(city.center_lon, city.center_lat)], coords)[0]
+    assert np.mean(from_center <= city.radius_km * 1000 * 1.01) > 0.99
+    hotspot = city.hotspots[0]
+    near_hotspot = haversine_matrix([(hotspot.lon, hotspot.lat)], coords)[0] < 1000
+    assert near_hotspot.mean() > 0.1
+
+
+def test_synthetic_route_planner_matches_ors_shapes():
+    city = SyntheticCity(hotspots=[Hotspot(lon=9.19, lat=45.46)])
+    planner = SyntheticRoutePlanner(city=city, detour_factor=1.0, speed_kmh=36.0)
+    coords = [(9.19, 45.46), (9.20, 45.47), (9.18, 45.45)]
+    durations = np.array(planner.compute_distance_matrix(coords)["durations"])
+    assert durations.shape == (3, 3)
+    assert np.allclose(durations, durations.T) and np.all(np.diag(durations) == 0)
+    # 36 km/h = 10 m/s
+    assert durations[0, 1] == pytest.approx(haversine_m(*coords[0], *coords[1]) / 10, abs=0.01)
+
+    assert planner.get_coordinates("Via Roma 1", "20100", "Milan", "Italy") == (
+        planner.get_coordinates("via roma 1", "20100", "Milan", "Italy")
+    )
+
+    route_coords = [coords[0], coords[1], coords[2], coords[1], coords[0]]
+    response = planner.get_directions(route_coords, optimize_waypoints=True, format="json")
+    parsed = planner.format_direction_response(
+        coordinates=route_coords, direction_response=response
+    )
+    assert sorted(parsed["visited_to_coord"].values()) == [0, 1, 2]
+    assert len(parsed["route"]["segments"]) == 4
+    assert parsed["duration"] == pytest.approx(
+        sum(s["duration"] for s in parsed["route"]["segments"]), abs=0.5
+    )
+
+
+@pytest.mark.asyncio
+async def test_optimizer_runs_offline_on_synthetic_scenario(session, logger):
+    scenario = generate_scenario(small_config(start=None, n_orders=30, n_drivers=8))
+    persist_scenario(session, scenario)
+    assert session.query(Order).count() == 30
+    assert session.query(Driver).count() == 8
+
+    optimizer = OrdersOptimizer(
+        db=session,
+        route_planner=scenario.route_planner(),
+        clustering_settings=scenario.clustering_settings(),
+        pizza_prep_settings=scenario.pizza_prep_settings,
+        logger=logger,
+    )
+    out = await optimizer.run()
+    assert out["profile"]["route_planner"]["directions"]["calls"] > 0
+    assigned = out["driver_to_cluster"]
+    unassigned = out["unassigned_clusters"]
+    assert assigned or unassigned